@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if settings.DB_FAULT_DELAY or settings.DB_FAULT_ERROR_RATE:
+            from foodgram.db import faults
+
+            connection_created.connect(faults.install)
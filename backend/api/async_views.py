@@ -0,0 +1,299 @@
+"""
+Асинхронные версии читающих эндпоинтов для запуска под ASGI.
+
+Аутентификация, права, троттлинг, фильтры, пагинация и рендеринг
+берутся из тех же DRF-viewset, что и в синхронной версии, поэтому
+ответы совпадают байт в байт. Асинхронной становится только работа
+с БД и кэшем: независимые запросы (страница, COUNT, состав рецептов,
+фасеты) выполняются одновременно, и медленный запрос не занимает
+воркер целиком. Маршруты подключаются при ASYNC_READ_VIEWS_ENABLED
+(профиль asgi в gunicorn.conf.py).
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from const.errors import ERROR_MESSAGES
+from foodgram.cache import aversioned_key, get_or_compute
+from recipes.models import Recipe, RecipeShortLink
+from . import fast_read
+from .facets import get_facets, parse_facets
+from .relations import get_relations
+from .views import (
+    IngredientViewSet,
+    RecipeViewSet,
+    UserProfileViewSet,
+    short_link_recipe_id,
+)
+
+
+def concurrently(function):
+    """
+    Обёртка для синхронной функции с запросами, которую можно ждать
+    параллельно с другими: каждая выполняется в своём потоке со своим
+    соединением. При ASYNC_CONCURRENT_QUERIES=False (например, в
+    тестах внутри транзакции) всё выполняется в общем потоке запроса.
+    """
+    if not settings.ASYNC_CONCURRENT_QUERIES:
+        return sync_to_async(function)()
+
+    def run():
+        try:
+            return function()
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)()
+
+
+async def fetch(queryset):
+    return [row async for row in queryset]
+
+
+def start_view(viewset_class, django_request, action, **kwargs):
+    """
+    Создаёт viewset так же, как as_view() роутера, и выполняет
+    initial(): аутентификацию, права, троттлинг и согласование формата.
+    """
+    initkwargs = {"basename": None, "detail": bool(kwargs)}
+    handler = getattr(viewset_class, action)
+    initkwargs.update(getattr(handler, "kwargs", {}))
+    view = viewset_class(action_map={"get": action}, **initkwargs)
+    view.action = action
+    view.args, view.kwargs = (), kwargs
+    view.format_kwarg = None
+    request = view.initialize_request(django_request, **kwargs)
+    view.request = request
+    view.headers = view.default_response_headers
+    try:
+        view.initial(request, **kwargs)
+    except Exception as exc:
+        return view, request, view.handle_exception(exc)
+    return view, request, None
+
+
+def finish(view, request, response):
+    response = view.finalize_response(request, response)
+    return response.render()
+
+
+def handle(view, request, exc):
+    if not isinstance(exc, (APIException, Http404)):
+        raise exc
+    return finish(view, request, view.handle_exception(exc))
+
+
+async def recipe_list(django_request):
+    view, request, error = await sync_to_async(start_view)(
+        RecipeViewSet, django_request, "list"
+    )
+    if error is not None:
+        return finish(view, request, error)
+    try:
+        return finish(view, request, await list_recipes(view, request))
+    except Exception as exc:
+        return handle(view, request, exc)
+
+
+def prepare_recipes(view, request):
+    """Синхронная подготовка: фильтры, фасеты и множества связей."""
+    facets = parse_facets(request)
+    fields = view.get_fieldset()
+    queryset = view.filter_queryset(view.get_queryset())
+    if request.user.is_authenticated:
+        relations = get_relations(request)
+        for field, name in (
+            ("is_favorited", "favorites"),
+            ("is_in_shopping_cart", "cart"),
+        ):
+            if fields is None or field in fields:
+                relations.get(name)
+    return facets, fields, queryset
+
+
+async def list_recipes(view, request):
+    facets, fields, queryset = await sync_to_async(prepare_recipes)(
+        view, request
+    )
+    paginator = view.paginator
+    paginator.limit = paginator.get_limit(request)
+    paginator.offset = paginator.get_offset(request)
+    stop = paginator.offset + paginator.limit + 1
+    rows = fast_read.recipe_rows(queryset, fields)[paginator.offset:stop]
+
+    tasks = [fetch(rows)]
+    if paginator.count_requested(request):
+        tasks.append(
+            concurrently(lambda: paginator.get_cached_count(queryset))
+        )
+    else:
+        tasks.append(asyncio.sleep(0))
+    if fast_read.wants_ingredients(fields):
+        tasks.append(
+            fetch(fast_read.ingredient_rows(rows.values("id")))
+        )
+    if facets:
+        tasks.append(
+            concurrently(
+                lambda: get_facets(
+                    view.filter_queryset(Recipe.objects.all()),
+                    facets,
+                    request,
+                )
+            )
+        )
+    page_rows, count, *rest = await asyncio.gather(*tasks)
+
+    ingredients = None
+    if fast_read.wants_ingredients(fields):
+        ingredients = fast_read.group_ingredients(rest.pop(0))
+    page = paginator.paginate_fetched(request, page_rows, count)
+    response = paginator.get_paginated_response(
+        fast_read.build_recipes(page, request, fields, ingredients)
+    )
+    if facets:
+        response.data["facets"] = rest.pop(0)
+    return response
+
+
+async def recipe_detail(django_request, pk):
+    view, request, error = await sync_to_async(start_view)(
+        RecipeViewSet, django_request, "retrieve", pk=pk
+    )
+    if error is not None:
+        return finish(view, request, error)
+    try:
+        _, fields, queryset = await sync_to_async(prepare_recipes)(
+            view, request
+        )
+        rows = fast_read.recipe_rows(queryset, fields).filter(pk=pk)
+        tasks = [fetch(rows)]
+        if fast_read.wants_ingredients(fields):
+            tasks.append(fetch(fast_read.ingredient_rows(rows.values("id"))))
+        found, *ingredients = await asyncio.gather(*tasks)
+        if not found:
+            raise Http404(
+                f"No {Recipe._meta.object_name} matches the given query."
+            )
+        data = fast_read.build_recipes(
+            found,
+            request,
+            fields,
+            fast_read.group_ingredients(ingredients[0])
+            if ingredients
+            else None,
+        )
+        return finish(view, request, Response(data[0]))
+    except Exception as exc:
+        return handle(view, request, exc)
+
+
+async def ingredient_list(django_request):
+    view, request, error = await sync_to_async(start_view)(
+        IngredientViewSet, django_request, "list"
+    )
+    if error is not None:
+        return finish(view, request, error)
+    try:
+        queryset = view.filter_queryset(view.get_queryset())
+        key = await aversioned_key(
+            "ingredients", "ingredient", queryset.db, queryset.query
+        )
+        data = await sync_to_async(get_or_compute)(
+            key,
+            lambda: list(queryset.values("id", "name", "measurement_unit")),
+            settings.INGREDIENTS_CACHE_TIMEOUT,
+            negative_errors=(),
+        )
+        return finish(view, request, Response(data))
+    except Exception as exc:
+        return handle(view, request, exc)
+
+
+async def subscriptions(django_request):
+    view, request, error = await sync_to_async(start_view)(
+        UserProfileViewSet, django_request, "subscriptions"
+    )
+    if error is not None:
+        return finish(view, request, error)
+    try:
+        return finish(view, request, await list_subscriptions(view, request))
+    except Exception as exc:
+        return handle(view, request, exc)
+
+
+async def list_subscriptions(view, request):
+    queryset = view.get_subscriptions_queryset()
+    paginator = view.pagination_class()
+    paginator.limit = paginator.get_limit(request)
+    paginator.offset = paginator.get_offset(request)
+    stop = paginator.offset + paginator.limit + 1
+    authors = queryset[paginator.offset:stop]
+    # Превью рецептов читаются одновременно со страницей авторов:
+    # авторы страницы подставляются в запрос подзапросом.
+    previews = Recipe.objects.filter(
+        author__in=authors.values("id")
+    ).values("author_id", *fast_read.SHORT_RECIPE_FIELDS)
+
+    tasks = [
+        queryset.aexists(),
+        fetch(authors.values(*fast_read.USER_COLUMNS)),
+        fetch(previews),
+    ]
+    if paginator.count_requested(request):
+        tasks.append(
+            concurrently(lambda: paginator.get_cached_count(queryset))
+        )
+    exists, author_rows, recipe_rows, *count = await asyncio.gather(*tasks)
+    if not exists:
+        return Response(
+            ERROR_MESSAGES["no_subscriptions"],
+            status=400,
+        )
+
+    recipes_limit = request.query_params.get("recipes_limit")
+    page = paginator.paginate_fetched(
+        request, author_rows, count[0] if count else None
+    )
+    return paginator.get_paginated_response(
+        fast_read.build_followed_authors(
+            page,
+            recipe_rows,
+            request,
+            int(recipes_limit)
+            if recipes_limit and recipes_limit.isdigit()
+            else None,
+        )
+    )
+
+
+async def short_link_redirect(request, url_hash):
+    try:
+        recipe_id = await sync_to_async(short_link_recipe_id)(url_hash)
+    except RecipeShortLink.DoesNotExist:
+        return JsonResponse(
+            {"error": ERROR_MESSAGES["recipe_not_found"]}, status=404
+        )
+    return redirect(f"{settings.BASE_URL}/api/recipes/{recipe_id}")
+
+
+def read_async(async_view, sync_view):
+    """
+    Маршрут, в котором GET/HEAD обслуживает асинхронная версия,
+    а остальные методы — прежний синхронный DRF-view.
+    """
+    sync_view = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            return await async_view(request, *args, **kwargs)
+        return await sync_view(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
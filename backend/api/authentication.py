@@ -0,0 +1,122 @@
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from foodgram import metrics
+from foodgram.cache import LRUCache
+from users.models import COUNTER_FIELDS
+
+
+TOKEN_CACHE_KEY = "auth_user:{key}"
+
+token_cache = LRUCache(
+    max_entries=settings.AUTH_TOKEN_L1_MAX_ENTRIES,
+    timeout=settings.AUTH_TOKEN_L1_TIMEOUT,
+)
+
+
+class TokenCacheStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+
+    def hit(self, tier):
+        with self.lock:
+            setattr(self, f"{tier}_hits", getattr(self, f"{tier}_hits") + 1)
+
+    def miss(self):
+        with self.lock:
+            self.misses += 1
+
+    def as_dict(self):
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        return {
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                (self.l1_hits + self.l2_hits) / lookups if lookups else 0.0
+            ),
+            "l1_entries": len(token_cache.entries),
+        }
+
+
+token_stats = TokenCacheStats()
+metrics.register("auth_token_cache", token_stats.as_dict)
+
+
+def invalidate_token(key):
+    token_cache.delete(key)
+    cache.delete(TOKEN_CACHE_KEY.format(key=key))
+
+
+def cached_fields():
+    return [
+        field.attname
+        for field in get_user_model()._meta.concrete_fields
+        if field.attname not in COUNTER_FIELDS
+    ]
+
+
+def user_values(user):
+    return tuple(getattr(user, name) for name in cached_fields())
+
+
+def user_from_values(values):
+    """
+    Новый экземпляр на каждый запрос, счётчики отложены: их чтение
+    идёт в БД, а save() без update_fields пишет только загруженные поля.
+    """
+    model = get_user_model()
+    return model.from_db(
+        router.db_for_write(model), cached_fields(), values
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication без запроса Token + User на каждый вызов.
+
+    Поля пользователя по ключу токена ищутся сначала в LRU процесса
+    (короткий TTL, чтобы воркеры не расходились надолго), затем в
+    общем кэше. Записи сбрасываются сигналами при удалении токена
+    (logout), сохранении пользователя (смена пароля, деактивация).
+    Счётчики не кэшируются: они меняются UPDATE без сигналов, и
+    устаревшее значение затёрло бы их при полном save().
+    """
+
+    def authenticate_credentials(self, key):
+        values = token_cache.get(key)
+        if values is not None:
+            token_stats.hit("l1")
+        else:
+            values = cache.get(TOKEN_CACHE_KEY.format(key=key))
+            if values is not None:
+                token_stats.hit("l2")
+                token_cache.set(key, values)
+
+        if values is None:
+            token_stats.miss()
+            user, token = super().authenticate_credentials(key)
+            values = user_values(user)
+            cache.set(
+                TOKEN_CACHE_KEY.format(key=key),
+                values,
+                settings.AUTH_TOKEN_CACHE_TIMEOUT,
+            )
+            token_cache.set(key, values)
+            token.user = user_from_values(values)
+            return token.user, token
+
+        user = user_from_values(values)
+        if not user.is_active:
+            invalidate_token(key)
+            return super().authenticate_credentials(key)
+        return user, Token(key=key, user=user)
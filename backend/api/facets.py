@@ -0,0 +1,148 @@
+"""
+Фасетные счётчики для фильтров списка рецептов (`?facets=`).
+
+Все запрошенные фасеты считаются одним GROUP BY по их сочетанию,
+после чего счётчики каждого фасета получаются суммированием строк.
+Результат кэшируется по сигнатуре отфильтрованного запроса в
+версионируемом пространстве «recipe».
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Case, Count, IntegerField, Value, When
+from rest_framework.exceptions import ValidationError
+
+from foodgram.cache import get_or_compute, versioned_key
+from .relations import get_relations
+
+
+FACETS_QUERY_PARAM = "facets"
+
+COOKING_TIME_BUCKETS = (
+    ("0-15", 0, 15),
+    ("16-30", 16, 30),
+    ("31-60", 31, 60),
+    ("61+", 61, None),
+)
+
+USER_FACETS = {
+    "is_favorited": "favorites",
+    "is_in_shopping_cart": "cart",
+}
+FACETS = ("author", "cooking_time", *USER_FACETS)
+
+
+def parse_facets(request):
+    value = request.query_params.get(FACETS_QUERY_PARAM, "")
+    facets = sorted({name for name in value.split(",") if name})
+    unknown = [name for name in facets if name not in FACETS]
+    if unknown:
+        raise ValidationError(
+            {FACETS_QUERY_PARAM: [f"Unknown facets: {', '.join(unknown)}"]}
+        )
+    return facets
+
+
+def cooking_time_bucket():
+    return Case(
+        *(
+            When(
+                cooking_time__gte=low,
+                **({"cooking_time__lte": high} if high else {}),
+                then=Value(label),
+            )
+            for label, low, high in COOKING_TIME_BUCKETS
+        )
+    )
+
+
+def grouping(facets, request):
+    """Выражения для GROUP BY: {имя колонки: выражение или None}."""
+    columns = {}
+    if "author" in facets:
+        columns["author_id"] = None
+        columns["author__username"] = None
+    if "cooking_time" in facets:
+        columns["facet_cooking_time"] = cooking_time_bucket()
+    relations = get_relations(request)
+    for facet, relation in USER_FACETS.items():
+        if facet in facets:
+            columns[f"facet_{facet}"] = Case(
+                When(id__in=relations.get(relation), then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+    return columns
+
+
+def count_facets(queryset, facets, request):
+    columns = grouping(facets, request)
+    annotations = {
+        name: expression
+        for name, expression in columns.items()
+        if expression is not None
+    }
+    rows = (
+        queryset.order_by()
+        .annotate(**annotations)
+        .values(*columns)
+        .annotate(facet_count=Count("id"))
+    )
+
+    counters = {facet: Counter() for facet in facets}
+    usernames = {}
+    for row in rows:
+        count = row["facet_count"]
+        if "author" in facets:
+            counters["author"][row["author_id"]] += count
+            usernames[row["author_id"]] = row["author__username"]
+        if "cooking_time" in facets:
+            counters["cooking_time"][row["facet_cooking_time"]] += count
+        for facet in USER_FACETS:
+            if facet in facets:
+                counters[facet][row[f"facet_{facet}"]] += count
+
+    result = {}
+    if "author" in facets:
+        result["author"] = [
+            {"id": author_id, "username": usernames[author_id], "count": count}
+            for author_id, count in sorted(
+                counters["author"].items(),
+                key=lambda item: (-item[1], item[0]),
+            )[:settings.FACETS_AUTHOR_LIMIT]
+        ]
+    if "cooking_time" in facets:
+        result["cooking_time"] = [
+            {"value": label, "count": counters["cooking_time"][label]}
+            for label, _, _ in COOKING_TIME_BUCKETS
+        ]
+    for facet in USER_FACETS:
+        if facet in facets:
+            result[facet] = [
+                {"value": value, "count": counters[facet][value]}
+                for value in (1, 0)
+            ]
+    return result
+
+
+def get_facets(queryset, facets, request):
+    """Фасеты отфильтрованного queryset с кэшированием по сигнатуре."""
+    per_user = any(facet in USER_FACETS for facet in facets)
+    try:
+        key = versioned_key(
+            "facets",
+            queryset.model._meta.model_name,
+            queryset.db,
+            queryset.order_by().query,
+            ",".join(facets),
+            request.user.pk if per_user else "",
+        )
+    except EmptyResultSet:
+        return count_facets(queryset, facets, request)
+    return get_or_compute(
+        key,
+        lambda: count_facets(queryset, facets, request),
+        settings.FACETS_CACHE_TIMEOUT,
+        negative_errors=(),
+    )
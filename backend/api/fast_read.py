@@ -0,0 +1,245 @@
+"""
+Быстрый путь чтения рецептов без полей сериализаторов DRF.
+
+Рецепты читаются через .values(), а ответ собирается по заранее
+скомпилированному плану: для каждого набора полей один раз строится
+список пар (имя поля, функция значения). Результат совпадает с
+RecipeReadSerializer и ShortRecipeSerializer байт в байт — это
+проверяют тесты в tests/test_api/test_fast_read.py.
+"""
+from functools import lru_cache
+
+from recipes.models import Recipe, RecipeIngredient, User
+from .relations import get_relations
+from .serializers import (
+    FollowSerializer,
+    RecipeReadSerializer,
+    UserSerializer,
+)
+
+
+RECIPE_FIELDS = RecipeReadSerializer.Meta.fields
+USER_FIELDS = UserSerializer.Meta.fields
+SHORT_RECIPE_FIELDS = ("id", "name", "image", "cooking_time")
+FOLLOW_FIELDS = FollowSerializer.Meta.fields
+# Колонки пользователя для FollowSerializer (кроме вычисляемых полей).
+USER_COLUMNS = tuple(
+    name for name in FOLLOW_FIELDS if name not in ("is_subscribed", "recipes")
+)
+
+# Колонки .values(), нужные для каждого поля ответа.
+RECIPE_COLUMNS = {
+    "id": ("id",),
+    "name": ("name",),
+    "author": ("author_id",) + tuple(
+        f"author__{name}" for name in USER_FIELDS
+        if name not in ("id", "is_subscribed")
+    ),
+    "text": ("text",),
+    "image": ("image",),
+    "ingredients": (),
+    "cooking_time": ("cooking_time",),
+    "is_favorited": (),
+    "is_in_shopping_cart": (),
+    "favorites_count": ("favorites_count",),
+    "in_cart_count": ("in_cart_count",),
+}
+
+RECIPE_STORAGE = Recipe._meta.get_field("image").storage
+AVATAR_STORAGE = User._meta.get_field("avatar").storage
+
+
+class ReadContext:
+    """Данные одного запроса, общие для всех строк страницы."""
+
+    def __init__(self, request, ingredients=None):
+        self.request = request
+        self.ingredients = ingredients or {}
+
+    @property
+    def is_authenticated(self):
+        return (
+            self.request is not None and self.request.user.is_authenticated
+        )
+
+    def file_url(self, storage, name):
+        # Повторяет ImageField.to_representation с use_url=True.
+        if not name:
+            return None
+        url = storage.url(name)
+        if self.request is not None:
+            return self.request.build_absolute_uri(url)
+        return url
+
+    def is_subscribed(self, row):
+        annotated = row.get("author_is_subscribed")
+        if annotated is not None:
+            return annotated
+        if not self.is_authenticated:
+            return False
+        return row["author_id"] in get_relations(self.request).following
+
+    def in_relation(self, name, recipe_id):
+        if not self.is_authenticated:
+            return False
+        return recipe_id in get_relations(self.request).get(name)
+
+
+def ingredient_rows(recipe_ids):
+    """Состав рецептов; `recipe_ids` может быть и подзапросом."""
+    return (
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by("id")
+        .values_list(
+            "recipe_id",
+            "ingredient_id",
+            "ingredient__name",
+            "ingredient__measurement_unit",
+            "amount",
+        )
+    )
+
+
+def group_ingredients(rows):
+    ingredients = {}
+    for recipe_id, ingredient_id, name, unit, amount in rows:
+        ingredients.setdefault(recipe_id, []).append(
+            {
+                "id": ingredient_id,
+                "name": name,
+                "measurement_unit": unit,
+                "amount": amount,
+            }
+        )
+    return ingredients
+
+
+def column(name):
+    return lambda row, context: row[name]
+
+
+def author_value(row, context):
+    author = {}
+    for name in USER_FIELDS:
+        if name == "id":
+            author[name] = row["author_id"]
+        elif name == "is_subscribed":
+            author[name] = context.is_subscribed(row)
+        elif name == "avatar":
+            author[name] = context.file_url(
+                AVATAR_STORAGE, row["author__avatar"]
+            )
+        else:
+            author[name] = row[f"author__{name}"]
+    return author
+
+
+SPECIAL_VALUES = {
+    "author": author_value,
+    "image": lambda row, context: context.file_url(
+        RECIPE_STORAGE, row["image"]
+    ),
+    "ingredients": lambda row, context: context.ingredients.get(
+        row["id"], []
+    ),
+    "is_favorited": lambda row, context: context.in_relation(
+        "favorites", row["id"]
+    ),
+    "is_in_shopping_cart": lambda row, context: context.in_relation(
+        "cart", row["id"]
+    ),
+}
+
+
+@lru_cache(maxsize=64)
+def compile_plan(fields):
+    """План ответа для набора полей (None — все поля)."""
+    return tuple(
+        (name, SPECIAL_VALUES.get(name) or column(name))
+        for name in RECIPE_FIELDS
+        if fields is None or name in fields
+    )
+
+
+def recipe_rows(queryset, fields=None):
+    """Превращает queryset рецептов в .values() с нужными колонками."""
+    plan = compile_plan(frozenset(fields) if fields is not None else None)
+    columns = [
+        column_name
+        for name, _ in plan
+        for column_name in RECIPE_COLUMNS[name]
+    ]
+    if "author_is_subscribed" in queryset.query.annotations:
+        columns.append("author_is_subscribed")
+    if "id" not in columns:
+        columns.append("id")
+    return queryset.prefetch_related(None).values(*columns)
+
+
+def wants_ingredients(fields):
+    return fields is None or "ingredients" in fields
+
+
+def build_recipes(rows, request, fields=None, ingredients=None):
+    """
+    Ответ по строкам recipe_rows(). Состав рецептов читается здесь же,
+    если его не передали заранее в `ingredients`.
+    """
+    plan = compile_plan(frozenset(fields) if fields is not None else None)
+    rows = list(rows)
+    if ingredients is None and wants_ingredients(fields):
+        ingredients = group_ingredients(
+            ingredient_rows([row["id"] for row in rows])
+        )
+    context = ReadContext(request, ingredients)
+    return [
+        {name: value(row, context) for name, value in plan} for row in rows
+    ]
+
+
+def build_short_recipes(rows, request=None, prefix=""):
+    """
+    Аналог ShortRecipeSerializer(many=True) для строк .values();
+    `prefix` — префикс колонок, если рецепт читается через связь.
+    """
+    context = ReadContext(request)
+    return [
+        {
+            name: (
+                context.file_url(RECIPE_STORAGE, row[prefix + name])
+                if name == "image"
+                else row[prefix + name]
+            )
+            for name in SHORT_RECIPE_FIELDS
+        }
+        for row in rows
+    ]
+
+
+def build_followed_authors(rows, recipes, request, recipes_limit=None):
+    """
+    Аналог FollowSerializer(many=True) для подписок: `rows` — строки
+    пользователей с колонками USER_COLUMNS, `recipes` — строки
+    рецептов этих авторов (с author_id) в порядке Recipe.Meta.ordering.
+    """
+    by_author = {}
+    for recipe in recipes:
+        by_author.setdefault(recipe["author_id"], []).append(recipe)
+    context = ReadContext(request)
+    result = []
+    for row in rows:
+        previews = by_author.get(row["id"], [])
+        if recipes_limit is not None:
+            previews = previews[:recipes_limit]
+        author = {}
+        for name in FOLLOW_FIELDS:
+            if name == "is_subscribed":
+                author[name] = True
+            elif name == "avatar":
+                author[name] = context.file_url(AVATAR_STORAGE, row[name])
+            elif name == "recipes":
+                author[name] = build_short_recipes(previews, request)
+            else:
+                author[name] = row[name]
+        result.append(author)
+    return result
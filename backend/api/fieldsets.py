@@ -0,0 +1,56 @@
+"""
+Разреженные наборы полей ответа: `?fields=`, `?omit=` и `?view=`.
+
+Выбранный набор передаётся сериализатору через контекст и заодно
+определяет, какие колонки и связи view читает из базы.
+"""
+from rest_framework.exceptions import ValidationError
+
+
+FIELDS_QUERY_PARAM = "fields"
+OMIT_QUERY_PARAM = "omit"
+VIEW_QUERY_PARAM = "view"
+ALWAYS_INCLUDED = ("id",)
+
+
+def split(value):
+    return {name for name in value.split(",") if name}
+
+
+def check_known(param, names, available):
+    unknown = sorted(names - set(available))
+    if unknown:
+        raise ValidationError(
+            {param: [f"Unknown fields: {', '.join(unknown)}"]}
+        )
+
+
+def parse_fieldset(request, available, views):
+    """
+    Возвращает множество полей для ответа или None, если клиент
+    не ограничивал набор. `views` — именованные наборы для `?view=`.
+    """
+    params = request.query_params
+    selected = None
+
+    view = params.get(VIEW_QUERY_PARAM)
+    if view:
+        if view not in views:
+            raise ValidationError(
+                {VIEW_QUERY_PARAM: [f"Unknown view: {view}"]}
+            )
+        selected = set(views[view])
+
+    fields = split(params.get(FIELDS_QUERY_PARAM, ""))
+    if fields:
+        check_known(FIELDS_QUERY_PARAM, fields, available)
+        selected = fields if selected is None else selected & fields
+
+    omit = split(params.get(OMIT_QUERY_PARAM, ""))
+    if omit:
+        check_known(OMIT_QUERY_PARAM, omit, available)
+        selected = (set(available) if selected is None else selected) - omit
+
+    if selected is None:
+        return None
+    return selected | set(ALWAYS_INCLUDED)
@@ -1,6 +1,8 @@
 import django_filters
+from django.conf import settings
 
 from recipes.models import Recipe, Ingredient
+from .relations import get_relations
 
 
 class IngredientFilter(django_filters.FilterSet):
@@ -14,22 +16,64 @@ class IngredientFilter(django_filters.FilterSet):
         fields = ['name']
 
 
+# Каждой сортировке соответствует составной индекс модели Recipe.
+RECIPE_ORDERINGS = {
+    'created_at': ('created_at', 'id'),
+    '-created_at': ('-created_at', '-id'),
+    'cooking_time': ('cooking_time', 'id'),
+    'name': ('name', 'id'),
+    'popular': ('-popularity', '-id'),
+    'trending': ('-trending_score', '-id'),
+}
+
+
 class RecipeFilter(django_filters.FilterSet):
     is_favorited = django_filters.NumberFilter(method='filter_is_favorited')
     is_in_shopping_cart = django_filters.NumberFilter(
         method='filter_is_in_shopping_cart'
     )
+    cooking_time_min = django_filters.NumberFilter(
+        field_name='cooking_time', lookup_expr='gte'
+    )
+    cooking_time_max = django_filters.NumberFilter(
+        field_name='cooking_time', lookup_expr='lte'
+    )
+    ordering = django_filters.ChoiceFilter(
+        choices=[(name, name) for name in RECIPE_ORDERINGS],
+        method='filter_ordering',
+    )
 
     class Meta:
         model = Recipe
-        fields = ['author', 'is_favorited', 'is_in_shopping_cart']
+        fields = [
+            'author',
+            'is_favorited',
+            'is_in_shopping_cart',
+            'cooking_time_min',
+            'cooking_time_max',
+            'ordering',
+        ]
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
+
+    def filter_by_relation(self, queryset, relation, lookup):
+        ids = get_relations(self.request).get(relation)
+        if len(ids) > settings.RELATIONS_INLINE_MAX_IDS:
+            # Длинный список в IN хуже соединения по индексу связи.
+            return queryset.filter(**{lookup: self.request.user})
+        return queryset.filter(id__in=ids)
 
     def filter_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(favorite__user=self.request.user)
+            return self.filter_by_relation(
+                queryset, 'favorites', 'favorite__user'
+            )
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(shoppingcart__user=self.request.user)
+            return self.filter_by_relation(
+                queryset, 'cart', 'shoppingcart__user'
+            )
         return queryset
@@ -0,0 +1,90 @@
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import fast_read
+from api.management.commands.benchmark_read_path import (
+    Command as ReadPathBenchmark,
+)
+from api.views import shopping_list_content
+from foodgram.cache_serializers import SERIALIZERS
+from recipes.follow_graph import encode
+from recipes.models import Recipe, ShoppingCart
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare size and speed of cache serializers, with and without "
+        "compression, on payloads built from temporary seed data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=200)
+        parser.add_argument("--ingredients", type=int, default=8)
+        parser.add_argument("--limit", type=int, default=50)
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            payloads = self.payloads(options)
+            transaction.set_rollback(True)
+
+        client = getattr(cache, "_cache", None)
+        parser = getattr(client, "_pool_options", {}).get("parser_class")
+        if parser is not None:
+            self.stdout.write(f"Redis parser: {parser.__name__}")
+        for name, payload in payloads.items():
+            self.stdout.write(name)
+            for format_name, serializer_class in SERIALIZERS.items():
+                for compress in (False, True):
+                    serializer = serializer_class(
+                        compress_min_bytes=None if compress else 0
+                    )
+                    self.report(
+                        f"{format_name}{' + zlib' if compress else ''}",
+                        serializer,
+                        payload,
+                        options["iterations"],
+                    )
+
+    def report(self, label, serializer, payload, iterations):
+        data = serializer.dumps(payload)
+        # Целые числа сериализатор отдаёт как есть, Redis вернёт строку.
+        stored = data if isinstance(data, bytes) else str(data).encode()
+        dumps, loads = [], []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            serializer.dumps(payload)
+            dumps.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            serializer.loads(stored)
+            loads.append(time.perf_counter() - start)
+        self.stdout.write(
+            f"  {label:<15} {len(stored):9d} B   "
+            f"dumps {statistics.median(dumps) * 1e6:9.1f} us   "
+            f"loads {statistics.median(loads) * 1e6:9.1f} us"
+        )
+
+    def payloads(self, options):
+        user, _ = ReadPathBenchmark().seed(
+            options["recipes"], options["ingredients"]
+        )
+        recipes = Recipe.objects.filter(author=user)
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=user, recipe=recipe)
+            for recipe in recipes[:options["limit"]]
+        )
+        page = fast_read.build_recipes(
+            fast_read.recipe_rows(recipes)[:options["limit"]], None
+        )
+        return {
+            "recipe list page": page,
+            "recipe detail": page[0],
+            "shopping list": shopping_list_content(user),
+            "follow graph edges": encode(range(0, 2000, 3)),
+            "token user": user,
+            "count": recipes.count(),
+        }
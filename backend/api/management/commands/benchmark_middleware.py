@@ -0,0 +1,67 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import path
+from django.views.decorators.cache import never_cache
+
+
+@never_cache
+def ping(request):
+    return HttpResponse(b"{}", content_type="application/json")
+
+
+# Собственный urlconf команды: view без работы, чтобы измерялись
+# только middleware. never_cache не даёт кэшу страниц подменить ответ.
+urlpatterns = [
+    path("api/bench/", ping),
+    path("admin-bench/", ping),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request middleware overhead for API paths with and "
+        "without the lean middleware lane, relative to an empty stack"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        lean_paths = settings.LEAN_MIDDLEWARE_PATHS
+        cases = (
+            ("no middleware", "/api/bench/", {"MIDDLEWARE": []}),
+            ("api, lean lane", "/api/bench/", {}),
+            ("api, full stack", "/api/bench/", {"LEAN_MIDDLEWARE_PATHS": ()}),
+            ("admin path", "/admin-bench/", {}),
+        )
+        timings = {}
+        with override_settings(
+            ROOT_URLCONF=__name__,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            LEAN_MIDDLEWARE_PATHS=lean_paths,
+        ):
+            for name, url, overrides in cases:
+                with override_settings(**overrides):
+                    timings[name] = self.measure(url, options["iterations"])
+        baseline = timings["no middleware"]
+        for name, median in timings.items():
+            self.stdout.write(
+                f"{name:<16} {median:8.1f} us   "
+                f"middleware {median - baseline:8.1f} us"
+            )
+
+    def measure(self, url, iterations):
+        client = Client()
+        client.get(url)
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            client.get(url)
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples) * 1_000_000
@@ -0,0 +1,107 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import RecipeViewSet
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    User,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare recipe list/retrieve latency of the DRF serializer path "
+        "and the serializer-free fast path on temporary seed data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=200)
+        parser.add_argument("--ingredients", type=int, default=8)
+        parser.add_argument("--limit", type=int, default=50)
+        parser.add_argument("--iterations", type=int, default=30)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        user, recipe = self.seed(options["recipes"], options["ingredients"])
+        factory = APIRequestFactory()
+        cases = (
+            (
+                "list",
+                RecipeViewSet.as_view({"get": "list"}),
+                {},
+                {"limit": options["limit"]},
+            ),
+            (
+                "list summary",
+                RecipeViewSet.as_view({"get": "list"}),
+                {},
+                {"limit": options["limit"], "view": "summary"},
+            ),
+            (
+                "retrieve",
+                RecipeViewSet.as_view({"get": "retrieve"}),
+                {"pk": recipe.pk},
+                {},
+            ),
+        )
+        for name, view, kwargs, params in cases:
+            timings, contents = {}, {}
+            for enabled in (False, True):
+                with override_settings(FAST_READ_PATH_ENABLED=enabled):
+                    samples = []
+                    for _ in range(options["iterations"]):
+                        request = factory.get("/api/recipes/", params)
+                        force_authenticate(request, user=user)
+                        start = time.perf_counter()
+                        response = view(request, **kwargs).render()
+                        samples.append(time.perf_counter() - start)
+                    timings[enabled] = statistics.median(samples) * 1000
+                    contents[enabled] = response.content
+            if contents[False] != contents[True]:
+                raise CommandError(f"{name}: fast path output differs")
+            self.stdout.write(
+                f"{name:<14} serializers {timings[False]:8.2f} ms   "
+                f"fast path {timings[True]:8.2f} ms   "
+                f"x{timings[False] / timings[True]:.1f}"
+            )
+        self.stdout.write("Seed data rolled back")
+
+    def seed(self, count, per_recipe):
+        user = User.objects.create(
+            email="bench_user@example.com", username="bench_user"
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"bench ingredient {index}", measurement_unit="g")
+            for index in range(max(per_recipe, 1))
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                name=f"bench recipe {index}",
+                author=user,
+                text="text " * 100,
+                image=f"recipes/images/bench_{index}.png",
+                cooking_time=index % 120 + 1,
+            )
+            for index in range(max(count, 1))
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in recipes
+            for ingredient in ingredients
+        )
+        Favorite.objects.bulk_create(
+            Favorite(user=user, recipe=recipe) for recipe in recipes[::3]
+        )
+        return user, recipes[0]
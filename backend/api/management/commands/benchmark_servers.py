@@ -0,0 +1,125 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+DEFAULT_PATHS = (
+    "/api/recipes/?limit=20",
+    "/api/recipes/?limit=20&view=summary",
+    "/api/ingredients/?name=%D0%B0",
+)
+
+
+def wait_ready(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(url, timeout=1):
+                return
+        except HTTPError:
+            return
+        except (URLError, OSError):
+            time.sleep(0.2)
+    raise CommandError(f"Server at {url} did not start in {timeout}s")
+
+
+def request_once(url):
+    start = time.perf_counter()
+    try:
+        with urlopen(url, timeout=30) as response:
+            response.read()
+            status = response.status
+    except HTTPError as error:
+        status = error.code
+    return time.perf_counter() - start, status
+
+
+def run_load(base_url, paths, requests, concurrency):
+    """
+    Отправляет `requests` GET-запросов по кругу `paths` в `concurrency`
+    потоков. Возвращает req/s, медиану и p95 задержки в мс и число
+    ответов с ошибкой.
+    """
+    urls = cycle([base_url + path for path in paths])
+    targets = [next(urls) for _ in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(request_once, targets))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(duration * 1000 for duration, _ in results)
+    return {
+        "rps": len(results) / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(int(len(latencies) * 0.95) - 1, 0)],
+        "errors": sum(status >= 400 for _, status in results),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn with the wsgi and asgi profiles from "
+        "gunicorn.conf.py at the same worker count and compare the "
+        "throughput of read endpoints"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profiles", nargs="+", default=["wsgi", "asgi"]
+        )
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--path", dest="paths", action="append")
+        parser.add_argument("--startup-timeout", type=int, default=30)
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or DEFAULT_PATHS
+        base_url = f"http://127.0.0.1:{options['port']}"
+        for profile in options["profiles"]:
+            server = self.start(profile, options)
+            try:
+                wait_ready(base_url + paths[0], options["startup_timeout"])
+                # Прогрев: соединения, кэши и ленивые импорты воркеров.
+                run_load(
+                    base_url, paths, options["workers"] * 10,
+                    options["concurrency"],
+                )
+                result = run_load(
+                    base_url, paths, options["requests"],
+                    options["concurrency"],
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            self.stdout.write(
+                f"{profile:<5} workers {options['workers']}   "
+                f"{result['rps']:8.1f} req/s   "
+                f"p50 {result['p50']:7.2f} ms   "
+                f"p95 {result['p95']:7.2f} ms   "
+                f"errors {result['errors']}"
+            )
+
+    def start(self, profile, options):
+        env = dict(
+            os.environ,
+            GUNICORN_PROFILE=profile,
+            GUNICORN_WORKERS=str(options["workers"]),
+            GUNICORN_BIND=f"127.0.0.1:{options['port']}",
+        )
+        return subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.relations import RELATIONS, rebuild_relation
+from foodgram.db.router import pin_primary
+from foodgram.redis_client import get_redis
+from recipes.models import User
+
+
+class Command(BaseCommand):
+    help = "Rebuild cached favorite, cart and following sets in Redis"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        client = get_redis()
+        if client is None:
+            raise CommandError("Redis is disabled (REDIS_URL is empty)")
+
+        users = User.objects.order_by("id").values_list("id", flat=True)
+        if options["user"]:
+            users = users.filter(id__in=options["user"])
+
+        rebuilt = 0
+        with pin_primary():
+            for user_id in users.iterator(chunk_size=options["batch_size"]):
+                for name in RELATIONS:
+                    rebuild_relation(client, user_id, name)
+                rebuilt += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt relations for {rebuilt} users")
+        )
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from foodgram.sql_stats import load_flushed, reset_flushed, top_statements
+
+
+SORT_FIELDS = ("calls", "total_time", "mean_time", "rows")
+
+
+class Command(BaseCommand):
+    help = "Show the top normalized SQL statements collected by workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sort", choices=SORT_FIELDS, default="calls"
+        )
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help=(
+                "Reset statistics of all workers after printing; a worker "
+                "drops its totals on its next flush, which happens only "
+                "when it records a query"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        directory = settings.SQL_STATS_DIR
+        entries = top_statements(
+            load_flushed(directory), options["sort"], options["limit"]
+        )
+        if not entries:
+            self.stdout.write(
+                self.style.WARNING(f"No statistics found in {directory}")
+            )
+        for entry in entries:
+            self.stdout.write(
+                f"{entry['calls']:>8} calls "
+                f"{entry['total_time']:>10.2f} ms total "
+                f"{entry['mean_time']:>8.3f} ms mean "
+                f"{entry['rows']:>8} rows  "
+                f"{entry['view'] or '-'} / {entry['origin'] or '-'}"
+            )
+            self.stdout.write(f"    {entry['query']}")
+        if options["reset"]:
+            reset_flushed(directory)
+            self.stdout.write(self.style.SUCCESS("Statistics reset"))
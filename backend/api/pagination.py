@@ -0,0 +1,200 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    LimitOffsetPagination,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from foodgram.cache import get_or_compute, versioned_key
+from recipes.feed import feed_page
+
+
+FALSE_VALUES = ("0", "false", "no")
+
+
+class CachedCountPagination(LimitOffsetPagination):
+    """
+    LimitOffsetPagination без COUNT(*) на каждой странице.
+
+    Количество кэшируется по сигнатуре отфильтрованного запроса и
+    инвалидируется версией пространства модели (см. api.signals).
+    Для больших выборок в PostgreSQL берётся оценка планировщика,
+    а с `?count=false` подсчёт не выполняется вовсе.
+    """
+
+    count_query_param = "count"
+    count_cache_timeout = settings.PAGINATION_COUNT_CACHE_TIMEOUT
+    estimate_threshold = settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.offset = self.get_offset(request)
+        self.count = None
+        self.count_is_exact = False
+        if self.count_requested(request):
+            self.count, self.count_is_exact = self.get_cached_count(queryset)
+            if self.count > self.limit and self.template is not None:
+                self.display_page_controls = True
+            if self.count_is_exact and (
+                self.count == 0 or self.offset > self.count
+            ):
+                self.has_next = False
+                return []
+
+        if self.count_is_exact:
+            self.has_next = self.offset + self.limit < self.count
+            return list(queryset[self.offset:self.offset + self.limit])
+
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[:self.limit]
+
+    def paginate_fetched(self, request, rows, count):
+        """
+        Страница из заранее выбранных строк [offset, offset + limit + 1)
+        и результата get_cached_count (None, если подсчёт не нужен).
+        Нужна асинхронным views, которые читают счётчик и страницу
+        одновременно; результат тот же, что у paginate_queryset.
+        """
+        self.request = request
+        self.count, self.count_is_exact = count or (None, False)
+        if self.count is not None:
+            if self.count > self.limit and self.template is not None:
+                self.display_page_controls = True
+            if self.count_is_exact and (
+                self.count == 0 or self.offset > self.count
+            ):
+                self.has_next = False
+                return []
+        if self.count_is_exact:
+            self.has_next = self.offset + self.limit < self.count
+        else:
+            self.has_next = len(rows) > self.limit
+        return list(rows[:self.limit])
+
+    def count_requested(self, request):
+        value = request.query_params.get(self.count_query_param, "")
+        return value.lower() not in FALSE_VALUES
+
+    def get_cached_count(self, queryset):
+        """Возвращает пару (количество, точное ли оно)."""
+        try:
+            key = versioned_key(
+                "count",
+                queryset.model._meta.model_name,
+                queryset.db,
+                queryset.query,
+            )
+        except EmptyResultSet:
+            return 0, True
+        return get_or_compute(
+            key,
+            lambda: self.count_queryset(queryset),
+            self.count_cache_timeout,
+            negative_errors=(),
+        )
+
+    def count_queryset(self, queryset):
+        estimate = self.estimate_count(queryset)
+        if estimate is not None and estimate >= self.estimate_threshold:
+            return estimate, False
+        return self.get_count(queryset), True
+
+    def estimate_count(self, queryset):
+        """Оценка числа строк по плану PostgreSQL без выполнения запроса."""
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        payload = {
+            "count": self.count,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is None:
+            del payload["count"]
+        return Response(payload)
+
+
+class FeedPagination(CursorPagination):
+    """
+    Keyset-пагинация ленты по (created_at, id рецепта). Ключи страницы
+    берёт recipes.feed.feed_page, затем рецепты загружаются из
+    queryset по id. Курсор хранит ключ последнего рецепта страницы;
+    ссылка только вперёд.
+    """
+
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+        keys = feed_page(
+            request.user,
+            self.position_key(self.cursor),
+            self.page_size + 1,
+        )
+        self.has_next = len(keys) > self.page_size
+        keys = keys[:self.page_size]
+        self.last_key = keys[-1] if keys else None
+        recipes = queryset.in_bulk([recipe_id for _, recipe_id in keys])
+        return [
+            recipes[recipe_id] for _, recipe_id in keys if recipe_id in recipes
+        ]
+
+    def position_key(self, cursor):
+        if cursor is None:
+            return None
+        created_at, _, recipe_id = (cursor.position or "").partition("|")
+        created_at = parse_datetime(created_at)
+        if created_at is None or not recipe_id.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, int(recipe_id)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        created_at, recipe_id = self.last_key
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=False,
+                position=f"{created_at.isoformat()}|{recipe_id}",
+            )
+        )
+
+    def get_previous_link(self):
+        return None
@@ -0,0 +1,198 @@
+"""
+Множества связей пользователя: избранное, корзина и подписки.
+
+Хранятся в Redis как SET (с меткой SENTINEL, чтобы отличать пустое
+множество от отсутствующего ключа), обновляются сквозной записью при
+добавлении/удалении связей и лениво перестраиваются из БД при промахе.
+Каждое изменение увеличивает счётчик поколения множества; перестроение
+записывает снимок из БД, только если поколение не изменилось с момента
+чтения, иначе снимок мог пропустить это изменение.
+На время запроса множества кэшируются в объекте запроса.
+"""
+import logging
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from foodgram.db.router import pin_primary
+from foodgram.redis_client import get_redis
+from recipes.models import Favorite, Follow, ShoppingCart
+
+
+logger = logging.getLogger(__name__)
+
+RELATION_KEY = "relations:{user_id}:{name}"
+GENERATION_KEY = "relations:{user_id}:{name}:generation"
+SENTINEL = 0
+
+RELATIONS = {
+    "favorites": (Favorite, "recipe_id"),
+    "cart": (ShoppingCart, "recipe_id"),
+    "following": (Follow, "author_id"),
+}
+RELATION_MODELS = {
+    model: (name, field) for name, (model, field) in RELATIONS.items()
+}
+
+# KEYS: множество, поколение; ARGV: id, TTL поколения.
+ADD_IF_EXISTS_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('SADD', KEYS[1], ARGV[1])
+end
+return 0
+"""
+REMOVE_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return redis.call('SREM', KEYS[1], ARGV[1])
+"""
+# KEYS: множество, поколение; ARGV: поколение до чтения БД, TTL, id...
+# SADD идёт пачками: unpack() больше ~8000 значений упирается в стек Lua.
+REBUILD_IF_UNCHANGED_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for first = 3, #ARGV, 1000 do
+    local last = math.min(first + 999, #ARGV)
+    redis.call('SADD', KEYS[1], unpack(ARGV, first, last))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+def relation_key(user_id, name):
+    return RELATION_KEY.format(user_id=user_id, name=name)
+
+
+def generation_key(user_id, name):
+    return GENERATION_KEY.format(user_id=user_id, name=name)
+
+
+def load_from_db(user_id, name):
+    model, field = RELATIONS[name]
+    return set(
+        model.objects.filter(user_id=user_id).values_list(field, flat=True)
+    )
+
+
+def rebuild_relation(client, user_id, name):
+    """
+    Перестраивает множество из БД. Если во время чтения связь
+    изменилась, снимок не записывается: его построит следующий промах.
+    """
+    generation = client.get(generation_key(user_id, name)) or b""
+    # Снимок живёт сутки: строить его по отстающей реплике нельзя.
+    with pin_primary():
+        ids = load_from_db(user_id, name)
+    client.eval(
+        REBUILD_IF_UNCHANGED_SCRIPT,
+        2,
+        relation_key(user_id, name),
+        generation_key(user_id, name),
+        generation,
+        settings.RELATIONS_CACHE_TIMEOUT,
+        SENTINEL,
+        *ids,
+    )
+    return ids
+
+
+def load_relation(user_id, name):
+    client = get_redis()
+    if client is None:
+        return load_from_db(user_id, name)
+    try:
+        members = client.smembers(relation_key(user_id, name))
+        if members:
+            return {int(member) for member in members} - {SENTINEL}
+        return rebuild_relation(client, user_id, name)
+    except RedisError as error:
+        logger.warning(f"Relations cache unavailable: {error}")
+        return load_from_db(user_id, name)
+
+
+def add_relation(user_id, name, object_id):
+    """Добавляет id в множество, только если оно уже построено."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.eval(
+            ADD_IF_EXISTS_SCRIPT,
+            2,
+            relation_key(user_id, name),
+            generation_key(user_id, name),
+            object_id,
+            settings.RELATIONS_CACHE_TIMEOUT,
+        )
+    except RedisError as error:
+        logger.warning(f"Relations cache unavailable: {error}")
+        forget_relation(user_id, name)
+
+
+def remove_relation(user_id, name, object_id):
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.eval(
+            REMOVE_SCRIPT,
+            2,
+            relation_key(user_id, name),
+            generation_key(user_id, name),
+            object_id,
+            settings.RELATIONS_CACHE_TIMEOUT,
+        )
+    except RedisError as error:
+        logger.warning(f"Relations cache unavailable: {error}")
+        forget_relation(user_id, name)
+
+
+def forget_relation(user_id, name):
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.delete(relation_key(user_id, name))
+    except RedisError:
+        logger.exception(f"Could not drop {relation_key(user_id, name)}")
+
+
+class UserRelations:
+    """Снимок множеств связей пользователя на время одного запроса."""
+
+    def __init__(self, user):
+        self.user = user
+        self.sets = {}
+
+    def get(self, name):
+        if name not in self.sets:
+            if self.user.is_authenticated:
+                self.sets[name] = load_relation(self.user.pk, name)
+            else:
+                self.sets[name] = set()
+        return self.sets[name]
+
+    @property
+    def favorites(self):
+        return self.get("favorites")
+
+    @property
+    def cart(self):
+        return self.get("cart")
+
+    @property
+    def following(self):
+        return self.get("following")
+
+
+def get_relations(request):
+    relations = getattr(request, "_user_relations", None)
+    if relations is None or relations.user != request.user:
+        relations = UserRelations(request.user)
+        request._user_relations = relations
+    return relations
@@ -0,0 +1,67 @@
+"""
+Рендереры ответов: быстрый JSON на orjson и MessagePack.
+
+Вывод FastJSONRenderer совпадает с JSONRenderer DRF при настройках
+по умолчанию (компактный UTF-8, экранирование U+2028/U+2029); даты,
+время и типы, которых orjson не знает, сериализуются энкодером DRF
+(aware datetime в UTC — с суффиксом Z). Исключение — NaN и
+бесконечности: DRF отказывается их сериализовать, а orjson пишет
+null; проверка каждого числа обошлась бы дороже самого рендеринга.
+"""
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+encoder = JSONEncoder()
+
+LINE_SEPARATORS = (
+    ("\u2028".encode(), b"\\u2028"),
+    ("\u2029".encode(), b"\\u2029"),
+)
+
+
+def default(obj):
+    """Даты и типы вне JSON (Decimal, lazy-строки...) как в DRF."""
+    return encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson; отступы по `; indent=` — через stdlib."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        ret = orjson.dumps(
+            data,
+            default=default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=default, use_bin_type=True)
@@ -3,14 +3,18 @@ import binascii
 
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
+from django.db import transaction
 from rest_framework import serializers
 
 from const.errors import ERROR_MESSAGES
+from .relations import get_relations
 from const.const import (
     MIN_COOKING_TIME,
     MIN_INGREDIENT_AMOUNT,
     ALLOWED_IMAGE_FORMATS,
 )
+from recipes.feed import fan_out_recipe
+from recipes.similarity import refresh_recipe
 from recipes.models import (
     Ingredient,
     Recipe,
@@ -89,13 +93,24 @@ class UserSerializer(serializers.ModelSerializer):
             "username",
             "is_subscribed",
             "avatar",
+            "recipes_count",
+            "followers_count",
+            "following_count",
+        )
+        read_only_fields = (
+            "recipes_count",
+            "followers_count",
+            "following_count",
         )
 
     def get_is_subscribed(self, obj):
+        annotated = getattr(obj, "is_subscribed", None)
+        if annotated is not None:
+            return annotated
         request = self.context.get("request")
         if not request or not request.user.is_authenticated:
             return False
-        return request.user.follower.filter(author=obj).exists()
+        return obj.pk in get_relations(request).following
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
@@ -108,9 +123,6 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
 
 class FollowSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source="recipes.count", read_only=True
-    )
 
     class Meta:
         model = User
@@ -124,6 +136,8 @@ class FollowSerializer(UserSerializer):
             "avatar",
             "recipes",
             "recipes_count",
+            "followers_count",
+            "following_count",
         )
 
     def get_recipes(self, obj):
@@ -147,7 +161,18 @@ class RecipeIngredientCreateSerializer(serializers.Serializer):
     amount = serializers.IntegerField(min_value=MIN_INGREDIENT_AMOUNT)
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """Оставляет только поля из context["fields"] (см. api.fieldsets)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        allowed = self.context.get("fields")
+        if allowed is not None:
+            for name in set(self.fields) - allowed:
+                self.fields.pop(name)
+
+
+class RecipeReadSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     ingredients = RecipeIngredientSerializer(
         source='ingredients_items', many=True
@@ -168,19 +193,27 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             "cooking_time",
             "is_favorited",
             "is_in_shopping_cart",
+            "favorites_count",
+            "in_cart_count",
         )
 
+    def to_representation(self, instance):
+        subscribed = getattr(instance, "author_is_subscribed", None)
+        if subscribed is not None:
+            instance.author.is_subscribed = subscribed
+        return super().to_representation(instance)
+
     def get_is_favorited(self, obj):
         request = self.context.get("request")
         if not request or not request.user.is_authenticated:
             return False
-        return request.user.favorites.filter(recipe=obj).exists()
+        return obj.id in get_relations(request).favorites
 
     def get_is_in_shopping_cart(self, obj):
         request = self.context.get("request")
         if not request or not request.user.is_authenticated:
             return False
-        return request.user.shopping_carts.filter(recipe=obj).exists()
+        return obj.id in get_relations(request).cart
 
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
@@ -241,23 +274,29 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         recipe.ingredients_items.all().delete()
         self._create_ingredients(recipe, ingredients_data)
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("ingredients")
         validated_data['author'] = self.context['request'].user
         recipe = Recipe.objects.create(**validated_data)
         self._create_ingredients(recipe, ingredients_data)
+        transaction.on_commit(lambda: refresh_recipe(recipe.pk))
+        fan_out_recipe(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop("ingredients", None)
-        instance = super().update(instance, validated_data)
-
-        if "image" in validated_data:
-            instance.image = validated_data.get("image", instance.image)
-            instance.save()
+        # Пишем только изменённые поля: полное сохранение вернуло бы
+        # устаревшие значения счётчиков, которые меняются через F().
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if validated_data:
+            instance.save(update_fields=list(validated_data))
 
         if ingredients_data is not None:
             self._update_ingredients(instance, ingredients_data)
+            transaction.on_commit(lambda: refresh_recipe(instance.pk))
 
         return instance
 
@@ -271,3 +310,10 @@ class AddAvatar(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ("avatar",)
+
+    def update(self, instance, validated_data):
+        # Пользователь может быть из кэша токенов: сохраняем только
+        # аватар, чтобы не затереть счётчики подписчиков и рецептов.
+        instance.avatar = validated_data["avatar"]
+        instance.save(update_fields=("avatar",))
+        return instance
@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from foodgram.cache import bump_version
+from .authentication import invalidate_token
+from .relations import RELATION_MODELS, add_relation, remove_relation
+from recipes.models import (
+    Favorite,
+    Follow,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    User,
+)
+
+
+# Какие пространства версий кэша устаревают при изменении модели.
+VERSIONED_NAMESPACES = {
+    Recipe: ("recipe",),
+    RecipeIngredient: ("recipe",),
+    Favorite: ("recipe",),
+    ShoppingCart: ("recipe",),
+    User: ("user", "recipe"),
+    Follow: ("user",),
+    Ingredient: ("ingredient",),
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_cache_versions(sender, **kwargs):
+    for namespace in VERSIONED_NAMESPACES.get(sender, ()):
+        bump_version(namespace)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    for key in Token.objects.filter(user=instance).values_list(
+        "key", flat=True
+    ):
+        invalidate_token(key)
+
+
+@receiver(post_save)
+def add_user_relation(sender, instance, created, **kwargs):
+    if sender not in RELATION_MODELS or not created:
+        return
+    name, field = RELATION_MODELS[sender]
+    transaction.on_commit(
+        lambda: add_relation(instance.user_id, name, getattr(instance, field))
+    )
+
+
+@receiver(post_delete)
+def remove_user_relation(sender, instance, **kwargs):
+    if sender not in RELATION_MODELS:
+        return
+    name, field = RELATION_MODELS[sender]
+    transaction.on_commit(
+        lambda: remove_relation(
+            instance.user_id, name, getattr(instance, field)
+        )
+    )
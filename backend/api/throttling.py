@@ -0,0 +1,186 @@
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from redis.exceptions import RedisError
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+from foodgram.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# Скользящее окно из двух фиксированных счётчиков: запросы прошлого
+# окна учитываются с весом, убывающим по мере хода текущего окна.
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local weighted = previous * (window - elapsed) / window + current
+if weighted + cost > limit then
+    return {0, current, previous}
+end
+redis.call('INCRBY', KEYS[1], cost)
+redis.call('EXPIRE', KEYS[1], window * 2)
+return {1, current + cost, previous}
+"""
+
+
+def window_position(now, window):
+    index = int(now // window)
+    return index, now - index * window
+
+
+def wait_time(current, previous, limit, window, elapsed, cost):
+    """Через сколько секунд запрос со стоимостью cost будет разрешён."""
+    remaining = window - elapsed
+    if current + cost > limit or not previous:
+        return remaining
+    needed = (limit - current - cost) / previous
+    return max(0.0, min(remaining, remaining - needed * window))
+
+
+class LocalWindowBackend:
+    """Тот же алгоритм в памяти процесса, если Redis недоступен."""
+
+    max_keys = 100000
+
+    def __init__(self):
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def consume(self, key, limit, window, cost, now):
+        index, elapsed = window_position(now, window)
+        with self.lock:
+            current, previous = self.counts(key, index)
+            weighted = previous * (window - elapsed) / window + current
+            if weighted + cost > limit:
+                return False, wait_time(
+                    current, previous, limit, window, elapsed, cost
+                )
+            self.windows[key] = (index, current + cost, previous)
+            if len(self.windows) > self.max_keys:
+                self.purge(index)
+        return True, None
+
+    def counts(self, key, index):
+        state = self.windows.get(key)
+        if state is None or state[0] < index - 1:
+            return 0, 0
+        if state[0] == index:
+            return state[1], state[2]
+        return 0, state[1]
+
+    def purge(self, index):
+        self.windows = {
+            key: state for key, state in self.windows.items()
+            if state[0] >= index - 1
+        }
+
+    def clear(self):
+        with self.lock:
+            self.windows.clear()
+
+
+class RedisWindowBackend:
+    """Атомарный скользящий счётчик на Lua-скрипте в Redis."""
+
+    def __init__(self, client):
+        self.client = client
+        self.script = client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def consume(self, key, limit, window, cost, now):
+        index, elapsed = window_position(now, window)
+        allowed, current, previous = self.script(
+            keys=[f"{key}:{index}", f"{key}:{index - 1}"],
+            args=[limit, window, elapsed, cost],
+        )
+        if allowed:
+            return True, None
+        return False, wait_time(
+            int(current), int(previous), limit, window, elapsed, cost
+        )
+
+
+local_backend = LocalWindowBackend()
+
+
+class ThrottleBackendSelector:
+    """
+    Выбирает Redis, а при ошибке подключения временно переключается
+    на локальный счётчик, не дёргая Redis на каждом запросе.
+    """
+
+    def __init__(self):
+        self.redis_backends = {}
+        self.unavailable_until = 0
+
+    def consume(self, key, limit, window, cost, now):
+        client = get_redis()
+        if client is not None and time.monotonic() >= self.unavailable_until:
+            backend = self.redis_backends.get(id(client))
+            if backend is None:
+                backend = self.redis_backends[id(client)] = (
+                    RedisWindowBackend(client)
+                )
+            try:
+                return backend.consume(key, limit, window, cost, now)
+            except RedisError as error:
+                logger.warning(f"Redis throttling unavailable: {error}")
+                self.unavailable_until = (
+                    time.monotonic() + settings.THROTTLE_REDIS_RETRY_INTERVAL
+                )
+        return local_backend.consume(key, limit, window, cost, now)
+
+
+backend_selector = ThrottleBackendSelector()
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Замена истории запросов SimpleRateThrottle на скользящее окно.
+
+    Стоимость запроса задаётся во view словарём
+    `throttle_costs = {"action": стоимость}`, по умолчанию 1.
+    """
+
+    backend = backend_selector
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self.wait_seconds = self.backend.consume(
+            self.key,
+            self.num_requests,
+            self.duration,
+            self.get_cost(view),
+            self.timer(),
+        )
+        return allowed
+
+    def get_cost(self, view):
+        costs = getattr(view, "throttle_costs", {})
+        return costs.get(getattr(view, "action", None), 1)
+
+    def wait(self):
+        if self.wait_seconds is None:
+            return None
+        return math.ceil(self.wait_seconds)
+
+
+class AnonSlidingWindowThrottle(SlidingWindowThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class UserSlidingWindowThrottle(SlidingWindowThrottleMixin, UserRateThrottle):
+    pass
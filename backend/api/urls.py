@@ -1,7 +1,14 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from rest_framework import routers
 
-from .views import RecipeViewSet, IngredientViewSet, UserProfileViewSet
+from . import async_views
+from .views import (
+    IngredientViewSet,
+    MetricsView,
+    RecipeViewSet,
+    UserProfileViewSet,
+)
 
 
 router = routers.DefaultRouter()
@@ -10,7 +17,56 @@ router.register(r"ingredients", IngredientViewSet)
 router.register(r"users", UserProfileViewSet, basename="users")
 
 urlpatterns = [
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path("", include(router.urls)),
     path("", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
 ]
+
+if settings.ASYNC_READ_VIEWS_ENABLED:
+    # Под ASGI чтение обслуживают асинхронные версии (api.async_views),
+    # а запись по тем же адресам — прежние viewset'ы.
+    urlpatterns = [
+        path(
+            "recipes/",
+            async_views.read_async(
+                async_views.recipe_list,
+                RecipeViewSet.as_view({"get": "list", "post": "create"}),
+            ),
+            name="recipe-list",
+        ),
+        re_path(
+            r"^recipes/(?P<pk>\d+)/$",
+            async_views.read_async(
+                async_views.recipe_detail,
+                RecipeViewSet.as_view(
+                    {
+                        "get": "retrieve",
+                        "put": "update",
+                        "patch": "partial_update",
+                        "delete": "destroy",
+                    }
+                ),
+            ),
+            name="recipe-detail",
+        ),
+        path(
+            "ingredients/",
+            async_views.read_async(
+                async_views.ingredient_list,
+                IngredientViewSet.as_view({"get": "list"}),
+            ),
+            name="ingredient-list",
+        ),
+        path(
+            "users/subscriptions/",
+            async_views.read_async(
+                async_views.subscriptions,
+                UserProfileViewSet.as_view(
+                    {"get": "subscriptions"},
+                    **UserProfileViewSet.subscriptions.kwargs,
+                ),
+            ),
+            name="users-subscriptions",
+        ),
+    ] + urlpatterns
@@ -4,22 +4,36 @@ import hashlib
 import base64
 import logging
 
-from rest_framework import status, viewsets
+from rest_framework import generics, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import (
+    IsAdminUser,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly
 )
-from rest_framework.pagination import LimitOffsetPagination
-from django.http import HttpResponse
+from rest_framework.views import APIView
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Sum, Value
 from django.conf import settings
+from django.contrib.auth import update_session_auth_hash
 from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from djoser import utils as djoser_utils
+from djoser.compat import get_user_email
+from djoser.conf import settings as djoser_settings
 from djoser.views import UserViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 
+from foodgram import metrics
+from foodgram.cache import get_or_compute
+
+from . import fast_read
+from .facets import get_facets, parse_facets
+from .fieldsets import parse_fieldset
+from .pagination import CachedCountPagination, FeedPagination
 from .permissions import IsAuthorOrReadOnly
 from .filters import RecipeFilter, IngredientFilter
 from const.errors import ERROR_MESSAGES
@@ -32,6 +46,8 @@ from .serializers import (
     FollowSerializer,
     AddAvatar,
 )
+from recipes.follow_graph import invalidate_following, suggest_authors
+from users.models import COUNTER_FIELDS
 from recipes.models import (
     Recipe,
     Ingredient,
@@ -41,11 +57,46 @@ from recipes.models import (
     RecipeShortLink,
     User,
     Follow,
+    RecipeSimilarity,
 )
 
 
 logger = logging.getLogger(__name__)
 
+RECIPE_READ_ACTIONS = ("list", "retrieve", "feed")
+# Карточка рецепта в списке: без текста и состава.
+RECIPE_VIEWS = {
+    "summary": ("id", "name", "image", "author", "cooking_time"),
+}
+# Колонки, которые не читаются из БД, если поле не запрошено.
+DEFERRABLE_FIELDS = ("text", "image")
+SHORT_LINK_CACHE_KEY = "recipe_hash_{url_hash}"
+
+
+def shopping_list_content(user):
+    """Список покупок пользователя в виде TSV с суммой по ингредиентам."""
+    ingredients = (
+        RecipeIngredient.objects.filter(recipe__shoppingcart__user=user)
+        .values("ingredient__name", "ingredient__measurement_unit")
+        .annotate(total_amount=Sum("amount"))
+        .order_by("ingredient__name")
+    )
+
+    with io.StringIO() as buffer:
+        writer = csv.writer(buffer, delimiter="\t")
+        writer.writerow(["Список покупок"])
+        writer.writerow(["Ингредиенты", "Количество", "Ед. измерения"])
+
+        for item in ingredients:
+            writer.writerow(
+                [
+                    item["ingredient__name"],
+                    item["total_amount"],
+                    item["ingredient__measurement_unit"],
+                ]
+            )
+        return buffer.getvalue()
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
@@ -59,7 +110,19 @@ class UserProfileViewSet(UserViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = CachedCountPagination
+    throttle_costs = {"avatar": 3}
+
+    def get_queryset(self):
+        queryset = super().get_queryset().order_by("id")
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset
+        return queryset.annotate(
+            is_subscribed=Exists(
+                Follow.objects.filter(user=user, author=OuterRef("pk"))
+            )
+        )
 
     @action(
         detail=True,
@@ -67,6 +130,7 @@ class UserProfileViewSet(UserViewSet):
         permission_classes=[IsAuthenticated],
         url_path="subscribe",
     )
+    @transaction.atomic
     def subscribe(self, request, id=None):
         user = request.user
         author = get_object_or_404(User, id=id)
@@ -83,6 +147,8 @@ class UserProfileViewSet(UserViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             Follow.objects.create(user=user, author=author)
+            transaction.on_commit(lambda: invalidate_following(user.pk))
+            author.refresh_from_db(fields=COUNTER_FIELDS)
             serializer = FollowSerializer(author, context={"request": request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -94,6 +160,7 @@ class UserProfileViewSet(UserViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             follow.delete()
+            transaction.on_commit(lambda: invalidate_following(user.pk))
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         return Response(
@@ -101,6 +168,38 @@ class UserProfileViewSet(UserViewSet):
             status=status.HTTP_405_METHOD_NOT_ALLOWED
         )
 
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        url_path="suggestions",
+    )
+    def suggestions(self, request):
+        try:
+            limit = int(
+                request.query_params.get(
+                    "limit", settings.FOLLOW_SUGGESTIONS_LIMIT
+                )
+            )
+        except ValueError:
+            limit = settings.FOLLOW_SUGGESTIONS_LIMIT
+        limit = max(1, min(limit, settings.FOLLOW_SUGGESTIONS_MAX_LIMIT))
+
+        data = []
+        for author, overlap in suggest_authors(request.user.pk, limit):
+            author.is_subscribed = False
+            item = UserSerializer(author, context={"request": request}).data
+            item["followed_by_following"] = overlap
+            data.append(item)
+        return Response(data)
+
+    def get_subscriptions_queryset(self):
+        return (
+            User.objects.filter(following__user=self.request.user)
+            .annotate(is_subscribed=Value(True))
+            .order_by("id")
+        )
+
     @action(
         detail=False,
         methods=["get"],
@@ -108,11 +207,10 @@ class UserProfileViewSet(UserViewSet):
         url_path="subscriptions",
     )
     def subscriptions(self, request):
-        user = request.user
-        queryset = User.objects.filter(
-            following__user=user
-        ).prefetch_related("recipes")
-        if not queryset:
+        queryset = self.get_subscriptions_queryset().prefetch_related(
+            "recipes"
+        )
+        if not queryset.exists():
             return Response(
                 ERROR_MESSAGES["no_subscriptions"],
                 status=status.HTTP_400_BAD_REQUEST
@@ -126,12 +224,55 @@ class UserProfileViewSet(UserViewSet):
         )
         return paginator.get_paginated_response(serializer.data)
 
+    # Смена пароля и логина сохраняет только изменённое поле: полный
+    # save() пользователя затёр бы счётчики, изменённые UPDATE.
+    @action(["post"], detail=False)
+    def set_password(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        user = request.user
+        user.set_password(serializer.data["new_password"])
+        user.save(update_fields=("password",))
+
+        if djoser_settings.PASSWORD_CHANGED_EMAIL_CONFIRMATION:
+            djoser_settings.EMAIL.password_changed_confirmation(
+                request, {"user": user}
+            ).send([get_user_email(user)])
+
+        if djoser_settings.LOGOUT_ON_PASSWORD_CHANGE:
+            djoser_utils.logout_user(request)
+        elif djoser_settings.CREATE_SESSION_ON_LOGIN:
+            update_session_auth_hash(request, user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(["post"], detail=False, url_path=f"set_{User.USERNAME_FIELD}")
+    def set_username(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        user = request.user
+        setattr(
+            user,
+            User.USERNAME_FIELD,
+            serializer.data["new_" + User.USERNAME_FIELD],
+        )
+        user.save(update_fields=(User.USERNAME_FIELD,))
+
+        if djoser_settings.USERNAME_CHANGED_EMAIL_CONFIRMATION:
+            djoser_settings.EMAIL.username_changed_confirmation(
+                request, {"user": user}
+            ).send([get_user_email(user)])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(
         detail=False,
         methods=["get"],
         permission_classes=[IsAuthenticated]
     )
     def me(self, request):
+        # Пользователь мог прийти из кэша токенов: счётчики берём из БД.
+        request.user.refresh_from_db(fields=COUNTER_FIELDS)
         serializer = UserSerializer(request.user, context={"request": request})
         return Response(serializer.data)
 
@@ -160,7 +301,7 @@ class UserProfileViewSet(UserViewSet):
 
         if request.method == "DELETE":
             user.avatar = None
-            user.save()
+            user.save(update_fields=("avatar",))
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         return Response(
@@ -172,21 +313,155 @@ class UserProfileViewSet(UserViewSet):
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
-    pagination_class = LimitOffsetPagination
+    pagination_class = CachedCountPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    throttle_costs = {
+        "create": 3,
+        "update": 3,
+        "partial_update": 3,
+        "download_shopping_cart": 10,
+    }
+
+    def get_fieldset(self):
+        if self.action not in RECIPE_READ_ACTIONS:
+            return None
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = parse_fieldset(
+                self.request,
+                RecipeReadSerializer.Meta.fields,
+                RECIPE_VIEWS,
+            )
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_fieldset()
+        return context
+
+    def get_queryset(self):
+        fields = self.get_fieldset()
+
+        def wanted(name):
+            return fields is None or name in fields
+
+        queryset = Recipe.objects.all()
+        deferred = [name for name in DEFERRABLE_FIELDS if not wanted(name)]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        if wanted("ingredients"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "ingredients_items",
+                    queryset=RecipeIngredient.objects.select_related(
+                        "ingredient"
+                    ).order_by("id"),
+                )
+            )
+        if not wanted("author"):
+            return queryset
+        queryset = queryset.select_related("author")
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset
+        return queryset.annotate(
+            author_is_subscribed=Exists(
+                Follow.objects.filter(user=user, author=OuterRef("author"))
+            )
+        )
+
+    def list(self, request, *args, **kwargs):
+        facets = parse_facets(request)
+        if settings.FAST_READ_PATH_ENABLED:
+            response = self.fast_list(request)
+        else:
+            response = super().list(request, *args, **kwargs)
+        if facets and isinstance(response.data, dict):
+            response.data["facets"] = get_facets(
+                self.filter_queryset(Recipe.objects.all()), facets, request
+            )
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.FAST_READ_PATH_ENABLED:
+            return super().retrieve(request, *args, **kwargs)
+        # Проверки прав на объект для GET нет (IsAuthorOrReadOnly
+        # ограничивает только изменение), поэтому модель не нужна.
+        fields = self.get_fieldset()
+        rows = fast_read.recipe_rows(
+            self.filter_queryset(self.get_queryset()), fields
+        )
+        try:
+            rows = rows.filter(
+                pk=kwargs[self.lookup_url_kwarg or self.lookup_field]
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Как generics.get_object_or_404: некорректный pk — это 404.
+            raise Http404
+        data = fast_read.build_recipes(rows, request, fields)
+        if not data:
+            raise Http404(
+                f"No {Recipe._meta.object_name} matches the given query."
+            )
+        return Response(data[0])
+
+    def fast_list(self, request):
+        """list() без сериализаторов: .values() и план полей."""
+        fields = self.get_fieldset()
+        rows = fast_read.recipe_rows(
+            self.filter_queryset(self.get_queryset()), fields
+        )
+        page = self.paginate_queryset(rows)
+        data = fast_read.build_recipes(
+            rows if page is None else page, request, fields
+        )
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
 
     def get_serializer_class(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in RECIPE_READ_ACTIONS:
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        url_path="feed",
+        pagination_class=FeedPagination,
+        filter_backends=[],
+    )
+    def feed(self, request):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["get"], url_path="similar")
+    def similar(self, request, pk=None):
+        # Вариант DRF: некорректный pk — 404, а не ошибка приведения типа.
+        recipe = generics.get_object_or_404(Recipe, pk=pk)
+        neighbours = (
+            RecipeSimilarity.objects.filter(recipe=recipe)
+            .order_by("-score", "similar_id")
+            .values(
+                *(
+                    f"similar__{name}"
+                    for name in fast_read.SHORT_RECIPE_FIELDS
+                )
+            )[:settings.SIMILAR_RECIPES_TOP_K]
+        )
+        return Response(
+            fast_read.build_short_recipes(neighbours, prefix="similar__")
+        )
+
     @action(
         detail=True,
         methods=["post", "delete"],
         permission_classes=[IsAuthenticated],
         url_path="favorite",
     )
+    @transaction.atomic
     def favorite(self, request, pk=None):
         recipe = get_object_or_404(Recipe, id=pk)
         user = request.user
@@ -221,6 +496,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated],
         url_path="shopping_cart",
     )
+    @transaction.atomic
     def shopping_cart(self, request, pk=None):
         recipe = get_object_or_404(Recipe, id=pk)
         user = request.user
@@ -261,43 +537,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def download_shopping_cart(self, request):
         user = request.user
-        cache_key = f"shopping_cart_{user.id}"
-        cached_data = cache.get(cache_key)
-
-        if cached_data:
-            response = HttpResponse(cached_data, content_type="text/csv")
-            response["Content-Disposition"] = (
-                'attachment; '
-                'filename="shopping_list.txt"'
-            )
-            return response
-
-        ingredients = (
-            RecipeIngredient.objects.filter(recipe__shoppingcart__user=user)
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(total_amount=Sum("amount"))
-            .order_by("ingredient__name")
+        content = get_or_compute(
+            f"shopping_cart_{user.id}",
+            lambda: shopping_list_content(user),
+            300,
         )
 
-        buffer = io.StringIO()
-        writer = csv.writer(buffer, delimiter="\t")
-        writer.writerow(["Список покупок"])
-        writer.writerow(["Ингредиенты", "Количество", "Ед. измерения"])
-
-        for item in ingredients:
-            writer.writerow(
-                [
-                    item["ingredient__name"],
-                    item["total_amount"],
-                    item["ingredient__measurement_unit"],
-                ]
-            )
-
-        content = buffer.getvalue()
-        buffer.close()
-
-        cache.set(cache_key, content, 300)
-
         response = HttpResponse(content, content_type="text/csv")
         content_disposition = (
             'attachment; '
@@ -315,6 +560,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
         short_link, created = RecipeShortLink.objects.get_or_create(
             recipe=recipe, defaults={"url_hash": url_hash}
         )
+        if created:
+            # Сбрасываем закэшированный отказ, если хэш уже запрашивали.
+            cache.delete(SHORT_LINK_CACHE_KEY.format(url_hash=url_hash))
 
         short_url = f"{settings.BASE_URL}/a/r/{short_link.url_hash}"
         return Response({"short-link": short_url})
@@ -325,20 +573,38 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return base64.urlsafe_b64encode(hash_bytes).decode()[:8]
 
 
-def recipe_hash_redirect(request, url_hash):
-    try:
-        cache_key = f"recipe_hash_{url_hash}"
-        recipe_id = cache.get(cache_key)
+class MetricsView(APIView):
+    """Метрики кэшей и пулов текущего процесса для персонала."""
 
-        if not recipe_id:
-            short_link = get_object_or_404(RecipeShortLink, url_hash=url_hash)
-            recipe_id = short_link.recipe.id
-            cache.set(cache_key, recipe_id, 3600)
+    permission_classes = [IsAdminUser]
 
+    def get(self, request):
+        return Response(metrics.collect())
+
+
+def short_link_recipe_id(url_hash):
+    """
+    id рецепта по хэшу короткой ссылки. Отсутствующий хэш тоже
+    кэшируется (RecipeShortLink.DoesNotExist) на CACHE_NEGATIVE_TIMEOUT.
+    """
+    return get_or_compute(
+        SHORT_LINK_CACHE_KEY.format(url_hash=url_hash),
+        lambda: RecipeShortLink.objects.values_list(
+            "recipe_id", flat=True
+        ).get(url_hash=url_hash),
+        3600,
+    )
+
+
+def recipe_hash_redirect(request, url_hash):
+    try:
+        recipe_id = short_link_recipe_id(url_hash)
         return redirect(f"{settings.BASE_URL}/api/recipes/{recipe_id}")
-    except Exception as e:
+    except RecipeShortLink.DoesNotExist as e:
+        # Ошибки БД не маскируются под 404: их обрабатывает
+        # foodgram.stale.StaleWhileRevalidateMiddleware.
         logger.error(f"Error redirecting hash {url_hash}: {str(e)}")
-        return Response(
+        return JsonResponse(
             {"error": ERROR_MESSAGES["recipe_not_found"]},
             status=status.HTTP_404_NOT_FOUND
         )
@@ -0,0 +1,202 @@
+"""Общие помощники для работы с кэшем."""
+import hashlib
+import math
+import random
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404
+
+
+VERSION_KEY = "version:{namespace}"
+
+
+def get_version(namespace):
+    """Текущая версия пространства ключей (по умолчанию 1)."""
+    return cache.get(VERSION_KEY.format(namespace=namespace)) or 1
+
+
+async def aget_version(namespace):
+    return await cache.aget(VERSION_KEY.format(namespace=namespace)) or 1
+
+
+def bump_version(namespace):
+    """
+    Инвалидирует все ключи пространства, увеличивая его версию.
+    Старые записи не удаляются, а просто перестают читаться.
+    """
+    key = VERSION_KEY.format(namespace=namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 2, None)
+
+
+def signature(*parts):
+    """Короткий стабильный хэш для построения ключей кэша."""
+    raw = "|".join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def versioned_key(prefix, namespace, *parts):
+    return f"{prefix}:{namespace}:v{get_version(namespace)}:" + signature(
+        *parts
+    )
+
+
+async def aversioned_key(prefix, namespace, *parts):
+    version = await aget_version(namespace)
+    return f"{prefix}:{namespace}:v{version}:" + signature(*parts)
+
+
+class LRUCache:
+    """
+    Потокобезопасный LRU-кэш в памяти процесса с ограничением
+    по числу записей и временем жизни записи.
+    """
+
+    def __init__(self, max_entries=1024, timeout=60):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None or item[1] < time.monotonic():
+                if item is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, timeout=None):
+        expires = time.monotonic() + (
+            self.timeout if timeout is None else timeout
+        )
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+LOCK_KEY = "lock:{key}"
+LOCK_POLL_INTERVAL = 0.05
+
+# Запись get_or_compute: значение (или исключение для отрицательного
+# кэша), момент истечения и длительность вычисления в секундах.
+Entry = namedtuple("Entry", ("value", "expires", "delta", "error"))
+
+
+def should_refresh(entry, beta):
+    """
+    Вероятностное раннее обновление (XFetch): чем ближе истечение и
+    дольше вычисление, тем вероятнее, что этот запрос пересчитает
+    значение заранее — один, а не все сразу после истечения.
+    """
+    jitter = -entry.delta * beta * math.log(1.0 - random.random())
+    return time.time() + jitter >= entry.expires
+
+
+def unpack(entry):
+    if entry.error is not None:
+        raise entry.error
+    return entry.value
+
+
+def store(key, compute, timeout, negative_timeout, negative_errors):
+    start = time.monotonic()
+    try:
+        value = compute()
+    except negative_errors as error:
+        delta = time.monotonic() - start
+        cache.set(
+            key,
+            Entry(None, time.time() + negative_timeout, delta, error),
+            negative_timeout,
+        )
+        raise
+    delta = time.monotonic() - start
+    cache.set(key, Entry(value, time.time() + timeout, delta, None), timeout)
+    return value
+
+
+def get_or_compute(
+    key,
+    compute,
+    timeout,
+    negative_timeout=None,
+    negative_errors=(ObjectDoesNotExist, Http404),
+    beta=None,
+):
+    """
+    Значение из кэша или результат compute() с защитой от лавины
+    пересчётов.
+
+    Пересчитывает только держатель блокировки lock:<key> (cache.add
+    атомарен в Redis, поэтому один на все воркеры); остальные ждут
+    его результата до CACHE_LOCK_TIMEOUT секунд, а при раннем
+    обновлении отдают текущее значение. Исключения из negative_errors
+    кэшируются на negative_timeout секунд и выбрасываются повторно без
+    вызова compute().
+    """
+    if negative_timeout is None:
+        negative_timeout = settings.CACHE_NEGATIVE_TIMEOUT
+    if beta is None:
+        beta = settings.CACHE_EARLY_REFRESH_BETA
+    lock_timeout = settings.CACHE_LOCK_TIMEOUT
+
+    entry = cache.get(key)
+    if not isinstance(entry, Entry):
+        entry = None
+    if entry is not None and not should_refresh(entry, beta):
+        return unpack(entry)
+
+    lock_key = LOCK_KEY.format(key=key)
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            return store(
+                key, compute, timeout, negative_timeout, negative_errors
+            )
+        finally:
+            cache.delete(lock_key)
+    if entry is not None:
+        return unpack(entry)
+
+    # Значения нет, пересчитывает другой процесс: ждём его результат.
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if isinstance(entry, Entry):
+            return unpack(entry)
+        if not cache.has_key(lock_key):
+            break
+    return store(key, compute, timeout, negative_timeout, negative_errors)
@@ -0,0 +1,139 @@
+"""
+Сериализаторы значений для RedisCache (OPTIONS["serializer"]).
+
+Значение кодируется выбранным форматом (pickle, msgpack или JSON) и
+сжимается zlib, если закодированное больше CACHE_COMPRESS_MIN_BYTES.
+Первый байт записи указывает формат; заглавная буква означает сжатие.
+Значения, которые формат не передаёт без потерь (модели, кортежи,
+datetime), записываются через pickle. Целые числа, как и в
+стандартном RedisSerializer, хранятся как есть, чтобы работал INCR.
+Записи старого формата (чистый pickle) читаются по-прежнему.
+"""
+import pickle
+import zlib
+
+import msgpack
+import orjson
+from django.conf import settings
+
+
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+PICKLE_HEADER = b"\x80"
+JSON_TYPES = (dict, list, str, int, float, bool, type(None))
+
+
+class CacheSerializer:
+    """Базовый сериализатор: формат pickle, сжатие по порогу."""
+
+    marker = b"p"
+
+    def __init__(self, compress_min_bytes=None, compress_level=None):
+        self.compress_min_bytes = (
+            settings.CACHE_COMPRESS_MIN_BYTES
+            if compress_min_bytes is None
+            else compress_min_bytes
+        )
+        self.compress_level = (
+            settings.CACHE_COMPRESS_LEVEL
+            if compress_level is None
+            else compress_level
+        )
+        self.decoders = {
+            PickleSerializer.marker: pickle.loads,
+            MsgpackSerializer.marker: MsgpackSerializer.decode,
+            JSONSerializer.marker: orjson.loads,
+        }
+
+    def encode(self, obj):
+        """(маркер, байты) или None, если формат не подходит."""
+
+    def dumps(self, obj):
+        if type(obj) is int:
+            return obj
+        encoded = self.encode(obj)
+        marker, data = encoded or (
+            PickleSerializer.marker,
+            pickle.dumps(obj, PICKLE_PROTOCOL),
+        )
+        if self.compress_min_bytes and len(data) >= self.compress_min_bytes:
+            compressed = zlib.compress(data, self.compress_level)
+            if len(compressed) < len(data):
+                return marker.upper() + compressed
+        return marker + data
+
+    def loads(self, data):
+        marker = data[:1]
+        if marker == PICKLE_HEADER:
+            return pickle.loads(data)
+        decoder = self.decoders.get(marker.lower())
+        if decoder is None:
+            return int(data)
+        payload = data[1:]
+        if marker.isupper():
+            payload = zlib.decompress(payload)
+        return decoder(payload)
+
+
+class PickleSerializer(CacheSerializer):
+    marker = b"p"
+
+
+class MsgpackSerializer(CacheSerializer):
+    """
+    msgpack со strict_types: кортежи, подклассы dict и прочие типы
+    не превращаются молча в списки и словари, а уходят в pickle.
+    """
+
+    marker = b"m"
+
+    def encode(self, obj):
+        try:
+            return self.marker, msgpack.packb(
+                obj, use_bin_type=True, strict_types=True
+            )
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+    @staticmethod
+    def decode(data):
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+class JSONSerializer(CacheSerializer):
+    """
+    JSON через orjson для значений из dict/list/str/чисел с
+    строковыми ключами; остальное уходит в pickle.
+    """
+
+    marker = b"j"
+
+    def encode(self, obj):
+        if not is_json_value(obj):
+            return None
+        return self.marker, orjson.dumps(obj)
+
+
+def is_json_value(obj):
+    """Значение переживёт JSON без изменения типов."""
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        kind = type(value)
+        if kind not in JSON_TYPES:
+            return False
+        if kind is dict:
+            if any(type(key) is not str for key in value):
+                return False
+            stack.extend(value.values())
+        elif kind is list:
+            stack.extend(value)
+        elif kind is int and not -(2 ** 63) <= value < 2 ** 64:
+            return False
+    return True
+
+
+SERIALIZERS = {
+    "pickle": PickleSerializer,
+    "msgpack": MsgpackSerializer,
+    "json": JSONSerializer,
+}
@@ -0,0 +1,54 @@
+"""
+Внесение неисправностей в запросы к БД: задержка и случайные ошибки.
+
+Нужно, чтобы проверить деградацию (см. foodgram.stale) без настоящей
+аварии: в тестах — через inject_faults(), на стенде — переменными
+DB_FAULT_DELAY и DB_FAULT_ERROR_RATE, при которых обёртка ставится на
+каждое новое соединение.
+"""
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import OperationalError, connections
+
+
+class FaultInjector:
+    """execute_wrapper: задержка и/или ошибка перед запросом."""
+
+    def __init__(self, delay=0.0, error_rate=0.0, error=OperationalError):
+        self.delay = delay
+        self.error_rate = error_rate
+        self.error = error
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error_rate and random.random() < self.error_rate:
+            raise self.error("Injected database fault")
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def inject_faults(delay=0.0, error_rate=0.0, using=None):
+    """Неисправности для соединений текущего потока внутри блока."""
+    injector = FaultInjector(delay, error_rate)
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(injector))
+        yield injector
+
+
+def install(sender, connection, **kwargs):
+    """Получатель connection_created для DB_FAULT_DELAY/ERROR_RATE."""
+    # Список обёрток переживает переподключение, ставим её один раз.
+    if any(
+        isinstance(wrapper, FaultInjector)
+        for wrapper in connection.execute_wrappers
+    ):
+        return
+    connection.execute_wrappers.append(
+        FaultInjector(settings.DB_FAULT_DELAY, settings.DB_FAULT_ERROR_RATE)
+    )
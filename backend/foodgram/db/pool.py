@@ -0,0 +1,247 @@
+"""
+Пул соединений с БД внутри процесса.
+
+Django до 5.1 не умеет пулить соединения, а CONN_MAX_AGE держит
+соединение за потоком: под ASGI и в потоках sync_to_async это даёт
+по соединению на поток. Пул общий для всех потоков процесса, поэтому
+и синхронные view, и асинхронные (через sync_to_async) берут
+соединения из одного ограниченного набора. Бэкенды
+foodgram.db.postgresql и foodgram.db.sqlite3 подключают его к
+DatabaseWrapper; параметры задаются ключом POOL в DATABASES.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+from foodgram import metrics
+
+
+class PoolExhaustedError(OperationalError):
+    """Свободное соединение не появилось за время ожидания."""
+
+
+def ping(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    finally:
+        cursor.close()
+
+
+class PooledConnection:
+    __slots__ = ("raw", "created_at", "used_at")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = self.used_at = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Ограниченный пул DB-API соединений.
+
+    `connect` открывает новое соединение, `check` проверяет соединение,
+    простоявшее дольше `check_interval` секунд, перед выдачей;
+    соединения старше `max_lifetime` закрываются при возврате.
+    """
+
+    def __init__(
+        self,
+        connect,
+        max_size=10,
+        timeout=5.0,
+        max_lifetime=1800,
+        check_interval=30,
+        check=ping,
+    ):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+        self.check = check
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.in_use = {}
+        self.opening = 0
+        self.created = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.timeouts = 0
+        self.health_check_failures = 0
+
+    @property
+    def size(self):
+        return len(self.idle) + len(self.in_use) + self.opening
+
+    def checkout(self):
+        start = time.monotonic()
+        waited = False
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolExhaustedError(
+                        f"No free database connection in {self.timeout}s "
+                        f"(pool size {self.max_size})"
+                    )
+                waited = True
+                self.condition.wait(remaining)
+            entry = self.idle.pop() if self.idle else None
+            # Место под соединение занимаем до connect() и проверки,
+            # чтобы параллельные потоки не превысили max_size.
+            self.opening += 1
+        try:
+            if entry is not None:
+                entry = self.validate(entry)
+            if entry is None:
+                entry = PooledConnection(self.connect())
+                with self.condition:
+                    self.created += 1
+        except BaseException:
+            with self.condition:
+                self.opening -= 1
+                self.condition.notify()
+            raise
+
+        with self.condition:
+            self.opening -= 1
+            self.in_use[id(entry.raw)] = entry
+            self.checkouts += 1
+            if waited:
+                elapsed = time.monotonic() - start
+                self.waits += 1
+                self.wait_time += elapsed
+                self.max_wait_time = max(self.max_wait_time, elapsed)
+        return entry.raw
+
+    def validate(self, entry):
+        """Проверка соединения после простоя; None — соединение закрыто."""
+        if time.monotonic() - entry.used_at < self.check_interval:
+            return entry
+        try:
+            self.check(entry.raw)
+        except Exception:
+            with self.condition:
+                self.health_check_failures += 1
+            self.dispose(entry.raw)
+            return None
+        return entry
+
+    def checkin(self, raw, discard=False):
+        """Возвращает соединение в пул; `discard` закрывает его."""
+        with self.condition:
+            entry = self.in_use.pop(id(raw), None)
+            self.condition.notify()
+        if entry is None:
+            self.dispose(raw)
+            return
+        now = time.monotonic()
+        if discard or now - entry.created_at >= self.max_lifetime:
+            self.dispose(raw)
+            return
+        try:
+            # Незавершённая транзакция не должна уйти следующему потоку.
+            raw.rollback()
+        except Exception:
+            self.dispose(raw)
+            return
+        entry.used_at = now
+        with self.condition:
+            self.idle.append(entry)
+            self.condition.notify()
+
+    def dispose(self, raw):
+        with self.condition:
+            self.closed += 1
+            self.condition.notify()
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        with self.condition:
+            idle, self.idle = list(self.idle), deque()
+        for entry in idle:
+            self.dispose(entry.raw)
+
+    def stats(self):
+        with self.condition:
+            return {
+                "max_size": self.max_size,
+                "size": self.size,
+                "idle": len(self.idle),
+                "in_use": len(self.in_use),
+                "created": self.created,
+                "closed": self.closed,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "mean_wait_ms": (
+                    self.wait_time / self.waits * 1000 if self.waits else 0.0
+                ),
+                "max_wait_ms": self.max_wait_time * 1000,
+                "timeouts": self.timeouts,
+                "health_check_failures": self.health_check_failures,
+            }
+
+
+pools = {}
+pools_lock = threading.Lock()
+pools_pid = os.getpid()
+
+
+def get_pool(alias, connect, options):
+    """Пул для псевдонима БД; после fork воркера создаётся заново."""
+    global pools_pid
+    with pools_lock:
+        if pools_pid != os.getpid():
+            pools.clear()
+            pools_pid = os.getpid()
+        if alias not in pools:
+            pools[alias] = ConnectionPool(connect, **options)
+        return pools[alias]
+
+
+def collect_stats():
+    return {alias: pool.stats() for alias, pool in list(pools.items())}
+
+
+metrics.register("db_pool", collect_stats)
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Берёт соединения DatabaseWrapper из пула процесса и возвращает их
+    туда вместо закрытия. Используется с CONN_MAX_AGE=0: соединение
+    отдаётся обратно в конце каждого запроса.
+    """
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        pool = get_pool(
+            self.alias,
+            lambda: connect(conn_params),
+            self.settings_dict.get("POOL", {}),
+        )
+        return pool.checkout()
+
+    def _close(self):
+        pool = pools.get(self.alias)
+        if pool is None:
+            super()._close()
+            return
+        # Соединение, закрываемое посреди atomic() или после ошибки,
+        # в пул не возвращается, если оно в непонятном состоянии.
+        discard = self.in_atomic_block or (
+            self.errors_occurred and not self.is_usable()
+        )
+        with self.wrap_database_errors:
+            pool.checkin(self.connection, discard=discard)
@@ -0,0 +1,91 @@
+"""
+Чтение с реплик с «прилипанием» к основной БД после записи.
+
+Безопасные чтения моделей из REPLICA_READ_APPS уходят на одну из
+реплик DATABASE_REPLICAS. Запрос с небезопасным методом целиком
+работает с основной БД и на REPLICA_PIN_SECONDS закрепляет за
+клиентом (токен или сессия) чтение с основной БД, чтобы он не
+увидел устаревших данных из-за отставания реплики.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from foodgram.cache import signature
+
+
+PIN_KEY = "replica_pin:{client}"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+use_primary = ContextVar("use_primary", default=False)
+
+
+@contextmanager
+def pin_primary():
+    """Все чтения внутри блока идут в основную БД."""
+    token = use_primary.set(True)
+    try:
+        yield
+    finally:
+        use_primary.reset(token)
+
+
+def client_key(request):
+    """Ключ закрепления клиента: токен или cookie сессии."""
+    credentials = request.META.get("HTTP_AUTHORIZATION") or (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not credentials:
+        return None
+    return PIN_KEY.format(client=signature(credentials))
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or use_primary.get()
+            or model._meta.app_label not in settings.REPLICA_READ_APPS
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Закрепляет запрос за основной БД: запись — всегда, чтение — если
+    клиент недавно писал.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key = client_key(request)
+        writing = request.method not in SAFE_METHODS
+        pinned = writing or (key is not None and cache.get(key) is not None)
+        token = use_primary.set(pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_primary.reset(token)
+        if writing and key is not None:
+            cache.set(key, 1, settings.REPLICA_PIN_SECONDS)
+        return response
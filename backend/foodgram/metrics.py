@@ -0,0 +1,12 @@
+"""Реестр метрик процесса, доступных через /api/metrics/."""
+
+collectors = {}
+
+
+def register(name, collector):
+    """Регистрирует функцию без аргументов, возвращающую словарь метрик."""
+    collectors[name] = collector
+
+
+def collect():
+    return {name: collector() for name, collector in collectors.items()}
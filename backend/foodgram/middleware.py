@@ -0,0 +1,78 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.db import connections
+from django.middleware.csrf import CsrfViewMiddleware
+
+from foodgram.sql_stats import StatementRecorder, stats
+
+
+class SqlStatsMiddleware:
+    """Собирает нормализованную статистику SQL по каждому запросу."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = StatementRecorder(stats, request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            return self.get_response(request)
+
+
+def is_lean_path(path):
+    """Запросы API и коротких ссылок идут без сессий, сообщений и CSRF."""
+    return path.startswith(settings.LEAN_MIDDLEWARE_PATHS)
+
+
+class LeanPathMixin:
+    """
+    Пропускает middleware для путей LEAN_MIDDLEWARE_PATHS: API
+    аутентифицируется токеном, и сессии, сообщения и CSRF ему не нужны.
+    Остальные пути (например, /admin/) обрабатываются как обычно.
+    """
+
+    def __call__(self, request):
+        if is_lean_path(request.path_info):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class LeanSessionMiddleware(LeanPathMixin, SessionMiddleware):
+    pass
+
+
+class LeanMessageMiddleware(LeanPathMixin, MessageMiddleware):
+    pass
+
+
+class LeanCsrfViewMiddleware(LeanPathMixin, CsrfViewMiddleware):
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_lean_path(request.path_info):
+            return None
+        return super().process_view(
+            request, callback, callback_args, callback_kwargs
+        )
+
+
+class LeanAuthenticationMiddleware(LeanPathMixin, AuthenticationMiddleware):
+
+    def __call__(self, request):
+        if is_lean_path(request.path_info):
+            # Без сессии пользователь Django анонимный; DRF заменит его
+            # пользователем из токена при аутентификации.
+            request.user = AnonymousUser()
+        return super().__call__(request)
+
+
+def show_toolbar(request):
+    """SHOW_TOOLBAR_CALLBACK: debug toolbar только вне быстрых путей."""
+    from debug_toolbar.middleware import show_toolbar as default
+
+    return not is_lean_path(request.path_info) and default(request)
@@ -0,0 +1,23 @@
+"""Общий клиент Redis для компонентов, которым мало API кэша Django."""
+import redis
+from django.conf import settings
+
+
+clients = {}
+
+
+def get_redis():
+    """
+    Возвращает клиент Redis по settings.REDIS_URL
+    или None, если Redis отключён.
+    """
+    url = settings.REDIS_URL
+    if not url:
+        return None
+    if url not in clients:
+        clients[url] = redis.Redis.from_url(
+            url,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return clients[url]
@@ -71,25 +71,72 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "foodgram.db.router.ReplicaPinningMiddleware",
+    "foodgram.middleware.LeanSessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.cache.UpdateCacheMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.cache.FetchFromCacheMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "foodgram.middleware.LeanCsrfViewMiddleware",
+    "foodgram.middleware.LeanAuthenticationMiddleware",
+    "foodgram.middleware.LeanMessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Пути без сессий, сообщений и CSRF (см. foodgram.middleware)
+LEAN_MIDDLEWARE_PATHS = tuple(
+    path
+    for path in os.getenv("LEAN_MIDDLEWARE_PATHS", "/api/,/a/r/").split(",")
+    if path
+)
+
 CACHE_MIDDLEWARE_ALIAS = "default"
 CACHE_MIDDLEWARE_SECONDS = 1000
 CACHE_MIDDLEWARE_KEY_PREFIX = "sitefood"
 
+# Статистика нормализованных SQL-запросов (см. manage.py sql_stats)
+SQL_STATS_ENABLED = os.getenv("SQL_STATS_ENABLED", "False").lower() == "true"
+SQL_STATS_MAX_ENTRIES = int(os.getenv("SQL_STATS_MAX_ENTRIES", 500))
+SQL_STATS_FLUSH_INTERVAL = int(os.getenv("SQL_STATS_FLUSH_INTERVAL", 60))
+SQL_STATS_DIR = Path(os.getenv("SQL_STATS_DIR", BASE_DIR / "sql_stats"))
+
+if SQL_STATS_ENABLED:
+    MIDDLEWARE.append("foodgram.middleware.SqlStatsMiddleware")
+
+# Последние исправные копии ответов при деградации БД (foodgram.stale)
+SWR_ENABLED = os.getenv("SWR_ENABLED", "True").lower() == "true"
+SWR_PATHS = tuple(
+    path
+    for path in os.getenv(
+        "SWR_PATHS",
+        r"^/api/recipes/(\d+/)?$,^/api/ingredients/(\d+/)?$,^/a/r/[^/]+/$",
+    ).split(",")
+    if path
+)
+SWR_DB_SLOW_SECONDS = float(os.getenv("SWR_DB_SLOW_SECONDS", 0.5))
+SWR_DEGRADED_SECONDS = int(os.getenv("SWR_DEGRADED_SECONDS", 30))
+SWR_STALE_TIMEOUT = int(os.getenv("SWR_STALE_TIMEOUT", 24 * 60 * 60))
+SWR_STORE_INTERVAL = int(os.getenv("SWR_STORE_INTERVAL", 10))
+SWR_REFRESH_TIMEOUT = int(os.getenv("SWR_REFRESH_TIMEOUT", 30))
+
+if SWR_ENABLED:
+    # Снаружи страничного кэша, чтобы копии не попадали в него.
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.cache.UpdateCacheMiddleware"),
+        "foodgram.stale.StaleWhileRevalidateMiddleware",
+    )
+
+# Внесение неисправностей в запросы к БД (foodgram.db.faults)
+DB_FAULT_DELAY = float(os.getenv("DB_FAULT_DELAY", 0))
+DB_FAULT_ERROR_RATE = float(os.getenv("DB_FAULT_ERROR_RATE", 0))
+
 if DEBUG:
     MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
     INSTALLED_APPS.append("debug_toolbar")
     INTERNAL_IPS = ["127.0.0.1"]
+    DEBUG_TOOLBAR_CONFIG = {
+        "SHOW_TOOLBAR_CALLBACK": "foodgram.middleware.show_toolbar",
+    }
 
 ROOT_URLCONF = "foodgram.urls"
 
@@ -122,14 +169,63 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
         "HOST": os.getenv("DB_HOST", "db"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        # Постоянное соединение на поток воркера с проверкой перед
+        # повторным использованием в новом запросе
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Пул соединений процесса (foodgram.db.pool), общий для синхронных
+# view и потоков sync_to_async; соединение возвращается в пул в конце
+# запроса, поэтому CONN_MAX_AGE с ним не нужен
+DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "False").lower() == "true"
+POOLED_ENGINES = {
+    "django.db.backends.postgresql": "foodgram.db.postgresql",
+    "django.db.backends.sqlite3": "foodgram.db.sqlite3",
+}
+if DB_POOL_ENABLED:
+    DATABASES["default"].update(
+        ENGINE=POOLED_ENGINES[DATABASES["default"]["ENGINE"]],
+        CONN_MAX_AGE=0,
+        POOL={
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", 5)),
+            "max_lifetime": int(os.getenv("DB_POOL_MAX_LIFETIME", 1800)),
+            "check_interval": int(os.getenv("DB_POOL_CHECK_INTERVAL", 30)),
+        },
+    )
+
+# Реплики для чтения (foodgram.db.router): хосты через запятую,
+# остальные параметры подключения — как у основной БД
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    host for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host
+):
+    alias = f"replica_{index}"
+    DATABASES[alias] = dict(
+        DATABASES["default"], HOST=host, TEST={"MIRROR": "default"}
+    )
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ["foodgram.db.router.ReplicaRouter"]
+# Приложения, чтения моделей которых можно отдавать репликам
+REPLICA_READ_APPS = ("recipes", "users")
+# Сколько секунд после записи клиент читает из основной БД
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 5))
+
 if any('pytest' in arg for arg in sys.argv):
-    DATABASES['default'] = {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': ':memory:',
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+        # Отдельная БД для тестов маршрутизации на реплики
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
     }
+    DATABASE_REPLICAS = []
 
 
 # Password validation
@@ -188,17 +284,107 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "api.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.parsers.FastJSONParser",
+        "api.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_PAGINATION_CLASS": ("rest_framework.pagination.PageNumberPagination"),
     "PAGE_SIZE": 6,
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "api.throttling.AnonSlidingWindowThrottle",
+        "api.throttling.UserSlidingWindowThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "100/hour", "user": "1000/hour"},
 }
 
+# Пауза перед повторной попыткой Redis в api.throttling после ошибки
+THROTTLE_REDIS_RETRY_INTERVAL = int(
+    os.getenv("THROTTLE_REDIS_RETRY_INTERVAL", 30)
+)
+
+# Кэширование COUNT(*) в api.pagination.CachedCountPagination
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv("PAGINATION_COUNT_CACHE_TIMEOUT", 300)
+)
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv("PAGINATION_COUNT_ESTIMATE_THRESHOLD", 10000)
+)
+
+# Кэш token -> user в api.authentication.CachedTokenAuthentication
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv("AUTH_TOKEN_CACHE_TIMEOUT", 300))
+AUTH_TOKEN_L1_TIMEOUT = int(os.getenv("AUTH_TOKEN_L1_TIMEOUT", 5))
+AUTH_TOKEN_L1_MAX_ENTRIES = int(os.getenv("AUTH_TOKEN_L1_MAX_ENTRIES", 10000))
+
+# Время жизни множеств связей пользователя в api.relations
+RELATIONS_CACHE_TIMEOUT = int(os.getenv("RELATIONS_CACHE_TIMEOUT", 86400))
+# Больше стольких id фильтр по множеству уходит в подзапрос к БД
+RELATIONS_INLINE_MAX_IDS = int(os.getenv("RELATIONS_INLINE_MAX_IDS", 1000))
+
+# Лента подписок (recipes.feed): авторы с большим числом подписчиков
+# не раскладываются по лентам при публикации, а подмешиваются при чтении
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv("FEED_FANOUT_MAX_FOLLOWERS", 10000))
+FEED_FANOUT_BATCH_SIZE = int(os.getenv("FEED_FANOUT_BATCH_SIZE", 1000))
+FEED_BACKFILL_SIZE = int(os.getenv("FEED_BACKFILL_SIZE", 50))
+
+# Рейтинги ?ordering=popular|trending (recipes.ranking)
+RANKING_FAVORITE_WEIGHT = int(os.getenv("RANKING_FAVORITE_WEIGHT", 2))
+RANKING_CART_WEIGHT = int(os.getenv("RANKING_CART_WEIGHT", 1))
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 24))
+
+# Похожие рецепты (recipes.similarity)
+SIMILAR_RECIPES_TOP_K = int(os.getenv("SIMILAR_RECIPES_TOP_K", 10))
+SIMILARITY_EXACT_MAX_RECIPES = int(
+    os.getenv("SIMILARITY_EXACT_MAX_RECIPES", 20000)
+)
+SIMILARITY_MINHASH_PERMUTATIONS = int(
+    os.getenv("SIMILARITY_MINHASH_PERMUTATIONS", 64)
+)
+SIMILARITY_LSH_BANDS = int(os.getenv("SIMILARITY_LSH_BANDS", 16))
+# Точечный пересчёт: ингредиенты чаще этого числа рецептов (соль, вода)
+# не дают кандидатов, кандидатов не больше SIMILARITY_REFRESH_CANDIDATES
+SIMILARITY_COMMON_INGREDIENT_RECIPES = int(
+    os.getenv("SIMILARITY_COMMON_INGREDIENT_RECIPES", 1000)
+)
+SIMILARITY_REFRESH_CANDIDATES = int(
+    os.getenv("SIMILARITY_REFRESH_CANDIDATES", 500)
+)
+
+# Рекомендации авторов по графу подписок (recipes.follow_graph)
+FOLLOW_GRAPH_CACHE_TIMEOUT = int(
+    os.getenv("FOLLOW_GRAPH_CACHE_TIMEOUT", 60 * 60 * 24)
+)
+FOLLOW_SUGGESTIONS_LIMIT = int(os.getenv("FOLLOW_SUGGESTIONS_LIMIT", 10))
+FOLLOW_SUGGESTIONS_MAX_LIMIT = 50
+FOLLOW_SUGGESTIONS_SHORTLIST_FACTOR = 5
+
+# Фасетные счётчики списка рецептов (api.facets)
+FACETS_CACHE_TIMEOUT = int(os.getenv("FACETS_CACHE_TIMEOUT", 300))
+FACETS_AUTHOR_LIMIT = int(os.getenv("FACETS_AUTHOR_LIMIT", 20))
+
+# Чтение рецептов без сериализаторов DRF (api.fast_read)
+FAST_READ_PATH_ENABLED = (
+    os.getenv("FAST_READ_PATH_ENABLED", "True").lower() == "true"
+)
+
+# Асинхронные читающие эндпоинты (api.async_views) под ASGI-профилем
+ASYNC_READ_VIEWS_ENABLED = (
+    os.getenv("ASYNC_READ_VIEWS_ENABLED", "False").lower() == "true"
+)
+# Независимые запросы async-view в отдельных потоках и соединениях
+ASYNC_CONCURRENT_QUERIES = (
+    os.getenv("ASYNC_CONCURRENT_QUERIES", "True").lower() == "true"
+)
+INGREDIENTS_CACHE_TIMEOUT = int(os.getenv("INGREDIENTS_CACHE_TIMEOUT", 3600))
+
 DJOSER = {
     "LOGIN_FIELD": "email",
     "HIDE_USERS": False,
@@ -240,10 +426,51 @@ LOGGING = {
 }
 
 # Cache settings
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/1")
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.25))
+
+# Защита от лавины пересчётов (foodgram.cache.get_or_compute):
+# время блокировки пересчёта, отрицательного кэша и коэффициент
+# раннего обновления (0 — без раннего обновления)
+CACHE_LOCK_TIMEOUT = int(os.getenv("CACHE_LOCK_TIMEOUT", 10))
+CACHE_NEGATIVE_TIMEOUT = int(os.getenv("CACHE_NEGATIVE_TIMEOUT", 30))
+CACHE_EARLY_REFRESH_BETA = float(os.getenv("CACHE_EARLY_REFRESH_BETA", 1.0))
+
+# Формат значений в Redis (foodgram.cache_serializers): pickle, msgpack
+# или json; значения от CACHE_COMPRESS_MIN_BYTES байт сжимаются zlib
+CACHE_SERIALIZERS = {
+    "pickle": "foodgram.cache_serializers.PickleSerializer",
+    "msgpack": "foodgram.cache_serializers.MsgpackSerializer",
+    "json": "foodgram.cache_serializers.JSONSerializer",
+}
+CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "pickle")
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", 1024))
+CACHE_COMPRESS_LEVEL = int(os.getenv("CACHE_COMPRESS_LEVEL", 6))
+
+# Redis с L1-кэшем в памяти процесса (foodgram.tiered_cache) для
+# горячих редко меняющихся ключей; CACHE_L1_MAX_BYTES=0 — только Redis
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.redis.RedisCache",
-        "LOCATION": "redis://redis:6379/1",
+        "BACKEND": "foodgram.tiered_cache.TwoTierRedisCache",
+        "LOCATION": REDIS_URL,
+        "OPTIONS": {
+            # Пул соединений на процесс; парсер ответов — hiredis,
+            # redis-py выбирает его сам, если пакет установлен
+            "max_connections": int(os.getenv("CACHE_MAX_CONNECTIONS", 50)),
+            "serializer": CACHE_SERIALIZERS[CACHE_SERIALIZER],
+            "L1_MAX_BYTES": int(
+                os.getenv("CACHE_L1_MAX_BYTES", 16 * 1024 * 1024)
+            ),
+            "L1_TIMEOUT": int(os.getenv("CACHE_L1_TIMEOUT", 30)),
+            "L1_KEY_PREFIXES": tuple(
+                prefix
+                for prefix in os.getenv(
+                    "CACHE_L1_KEY_PREFIXES",
+                    "recipe_hash_,ingredients:,version:",
+                ).split(",")
+                if prefix
+            ),
+        },
     }
 }
 
@@ -0,0 +1,255 @@
+"""
+Нормализованная статистика SQL-запросов в духе pg_stat_statements.
+
+Каждый запрос приводится к отпечатку (литералы и IN-списки заменяются
+заглушками), после чего агрегируются число вызовов, время, строки,
+а также view и метод сериализатора, из которого запрос был выполнен.
+
+Каждый процесс хранит таблицу в памяти и сохраняет её в SQL_STATS_DIR
+не чаще раза в SQL_STATS_FLUSH_INTERVAL секунд — и только при записи
+очередного запроса: простаивающий воркер не сохраняет ни новые данные,
+ни сброс. `sql_stats --reset` меняет метку сброса в каталоге; увидев
+её при сохранении, процесс очищает свою таблицу, а не возвращает на
+диск накопленное до сброса.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+
+STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL_RE = re.compile(r"(?<![\w.\"])-?\d+(?:\.\d+)?\b")
+PLACEHOLDER_RE = re.compile(r"%s|\?")
+IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+VALUES_RE = re.compile(
+    r"\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE
+)
+WHITESPACE_RE = re.compile(r"\s+")
+RESET_FILE = "reset"
+
+PROJECT_APPS = ("api", "recipes", "users", "foodgram")
+# Обёртки запросов проекта, которые не считаются источником запроса.
+WRAPPER_MODULES = ("foodgram.stale", "foodgram.db.faults")
+
+
+def normalize_sql(sql):
+    """Приводит SQL к виду без литералов и с схлопнутыми списками."""
+    normalized = STRING_LITERAL_RE.sub("?", sql)
+    normalized = NUMBER_LITERAL_RE.sub("?", normalized)
+    normalized = PLACEHOLDER_RE.sub("?", normalized)
+    normalized = IN_LIST_RE.sub("IN (...)", normalized)
+    normalized = VALUES_RE.sub(r"VALUES \1, ...", normalized)
+    return WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.md5(normalized_sql.encode()).hexdigest()[:16]
+
+
+def find_origin():
+    """
+    Ищет ближайший кадр стека из кода проекта и возвращает
+    его в виде `Класс.метод` (например,
+    `RecipeReadSerializer.get_is_favorited`).
+    """
+    base_dir = str(settings.BASE_DIR)
+    this_file = os.path.abspath(__file__)
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (
+            filename != this_file
+            and filename.startswith(base_dir)
+            and os.path.relpath(filename, base_dir).split(os.sep)[0]
+            in PROJECT_APPS
+            and frame.f_globals.get("__name__") not in WRAPPER_MODULES
+        ):
+            owner = frame.f_locals.get("self")
+            name = frame.f_code.co_name
+            if owner is not None:
+                return f"{type(owner).__name__}.{name}"
+            return f"{frame.f_globals.get('__name__')}.{name}"
+        frame = frame.f_back
+    return ""
+
+
+def reset_marker(directory):
+    try:
+        return (Path(directory) / RESET_FILE).read_text(encoding="utf-8")
+    except OSError:
+        return ""
+
+
+def reset_flushed(directory):
+    """Сбрасывает статистику всех процессов: новая метка и удаление файлов."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    marker = directory / RESET_FILE
+    tmp_path = marker.with_suffix(".tmp")
+    tmp_path.write_text(uuid.uuid4().hex, encoding="utf-8")
+    os.replace(tmp_path, marker)
+    for path in directory.glob("*.json"):
+        path.unlink(missing_ok=True)
+
+
+class StatementStats:
+    """
+    Ограниченная по размеру таблица агрегатов по отпечаткам запросов.
+
+    При переполнении вытесняются самые редко вызываемые записи,
+    как это делает pg_stat_statements.
+    """
+
+    def __init__(self, max_entries=500, flush_interval=60, directory=None):
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.directory = Path(directory) if directory else None
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.reset_marker = (
+            reset_marker(self.directory) if self.directory else ""
+        )
+
+    def record(self, sql, duration, rows, view="", origin=""):
+        # Сохранение до записи: после сброса этот запрос уже учитывается.
+        self.maybe_flush()
+        normalized = normalize_sql(sql)
+        key = (fingerprint(normalized), view, origin)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                if len(self.entries) >= self.max_entries:
+                    self._evict()
+                entry = self.entries[key] = {
+                    "fingerprint": key[0],
+                    "query": normalized,
+                    "view": view,
+                    "origin": origin,
+                    "calls": 0,
+                    "total_time": 0.0,
+                    "min_time": duration,
+                    "max_time": duration,
+                    "rows": 0,
+                }
+            entry["calls"] += 1
+            entry["total_time"] += duration
+            entry["min_time"] = min(entry["min_time"], duration)
+            entry["max_time"] = max(entry["max_time"], duration)
+            entry["rows"] += max(rows, 0)
+
+    def _evict(self):
+        victims = sorted(
+            self.entries, key=lambda key: self.entries[key]["calls"]
+        )[:max(1, self.max_entries // 20)]
+        for key in victims:
+            del self.entries[key]
+
+    def snapshot(self):
+        with self.lock:
+            return [dict(entry) for entry in self.entries.values()]
+
+    def reset(self):
+        with self.lock:
+            self.entries.clear()
+
+    def maybe_flush(self):
+        """Вызывается только из record(): таймера сохранения нет."""
+        if self.directory is None:
+            return
+        if time.monotonic() - self.last_flush < self.flush_interval:
+            return
+        self.flush()
+
+    def flush(self):
+        """Сохраняет таблицу текущего процесса в `<directory>/<pid>.json`."""
+        if self.directory is None:
+            return
+        self.last_flush = time.monotonic()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        marker = reset_marker(self.directory)
+        if marker != self.reset_marker:
+            # Был sql_stats --reset: накопленное до него не сохраняем.
+            self.reset_marker = marker
+            self.reset()
+        path = self.directory / f"{os.getpid()}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+def load_flushed(directory):
+    """Объединяет сохранённые на диск таблицы всех процессов."""
+    merged = {}
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    for path in directory.glob("*.json"):
+        try:
+            entries = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for entry in entries:
+            key = (entry["fingerprint"], entry["view"], entry["origin"])
+            current = merged.get(key)
+            if current is None:
+                merged[key] = dict(entry)
+                continue
+            current["calls"] += entry["calls"]
+            current["total_time"] += entry["total_time"]
+            current["rows"] += entry["rows"]
+            current["min_time"] = min(current["min_time"], entry["min_time"])
+            current["max_time"] = max(current["max_time"], entry["max_time"])
+    return list(merged.values())
+
+
+def top_statements(entries, sort="calls", limit=20):
+    for entry in entries:
+        entry["mean_time"] = entry["total_time"] / entry["calls"]
+    return sorted(entries, key=lambda entry: entry[sort], reverse=True)[
+        :limit
+    ]
+
+
+class StatementRecorder:
+    """execute_wrapper, записывающий запросы текущего HTTP-запроса."""
+
+    def __init__(self, stats, request=None):
+        self.stats = stats
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            rowcount = getattr(context.get("cursor"), "rowcount", -1)
+            self.stats.record(
+                sql,
+                duration,
+                rowcount if rowcount is not None else -1,
+                view=self.view_name(),
+                origin=find_origin(),
+            )
+
+    def view_name(self):
+        match = getattr(self.request, "resolver_match", None)
+        if match is None:
+            return ""
+        return match.view_name or match._func_path
+
+
+stats = StatementStats(
+    max_entries=settings.SQL_STATS_MAX_ENTRIES,
+    flush_interval=settings.SQL_STATS_FLUSH_INTERVAL,
+    directory=settings.SQL_STATS_DIR,
+)
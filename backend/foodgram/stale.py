@@ -0,0 +1,233 @@
+"""
+Stale-while-revalidate для читающих эндпоинтов при деградации БД.
+
+Успешные GET-ответы путей SWR_PATHS (список и карточка рецепта,
+ингредиенты, короткие ссылки) сохраняются в кэше как последняя
+исправная копия — не чаще раза в SWR_STORE_INTERVAL секунд на ключ.
+Ключ учитывает полный путь, Accept и заголовок Authorization, поэтому
+копия отдаётся только тому же клиенту.
+
+Запрос к БД дольше SWR_DB_SLOW_SECONDS или ошибка соединения
+переводят процесс в режим деградации на SWR_DEGRADED_SECONDS. В этом
+режиме запрос с сохранённой копией получает её сразу (заголовки Age и
+Warning), а свежий ответ строится в фоне, один на ключ. Если view
+упал с ошибкой БД, вместо 500 тоже отдаётся копия. Быстрый успешный
+запрос к БД выводит процесс из режима деградации.
+"""
+import io
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import InterfaceError, OperationalError, connections
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+
+from foodgram import metrics
+from foodgram.cache import LOCK_KEY, signature
+
+
+STALE_KEY = "stale:{key}"
+STORED_KEY = "stale_stored:{key}"
+WARNING_STALE = '110 - "Response is Stale"'
+WARNING_REVALIDATION_FAILED = '111 - "Revalidation Failed"'
+STORED_STATUSES = (200, 301, 302)
+SKIPPED_HEADERS = ("age", "warning", "expires")
+OUTAGE_ERRORS = (OperationalError, InterfaceError)
+
+
+class DatabaseHealth:
+    """Состояние БД глазами процесса: до какого момента она деградирует."""
+
+    def __init__(self):
+        self.degraded_until = 0.0
+        self.lock = threading.Lock()
+        self.slow_queries = 0
+        self.errors = 0
+        self.served_stale = 0
+        self.refreshes = 0
+
+    def degraded(self):
+        return time.monotonic() < self.degraded_until
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def mark(self, name):
+        """Медленный запрос или ошибка: продлевает деградацию."""
+        self.count(name)
+        self.degraded_until = (
+            time.monotonic() + settings.SWR_DEGRADED_SECONDS
+        )
+
+    def recover(self):
+        self.degraded_until = 0.0
+
+    def stats(self):
+        return {
+            "degraded": self.degraded(),
+            "slow_queries": self.slow_queries,
+            "errors": self.errors,
+            "served_stale": self.served_stale,
+            "refreshes": self.refreshes,
+        }
+
+
+health = DatabaseHealth()
+metrics.register("stale_while_revalidate", health.stats)
+
+
+class LatencyMonitor:
+    """execute_wrapper: считает запросы и отмечает медленные."""
+
+    def __init__(self):
+        self.queries = 0
+        self.slow = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            if time.monotonic() - start > settings.SWR_DB_SLOW_SECONDS:
+                self.slow = True
+                health.mark("slow_queries")
+
+
+@contextmanager
+def monitored(monitor):
+    """
+    Ставит монитор внешней обёрткой всех соединений потока, чтобы он
+    видел и задержки остальных обёрток (например, FaultInjector).
+    """
+    wrapped = list(connections.all())
+    for connection in wrapped:
+        connection.execute_wrappers.insert(0, monitor)
+    try:
+        yield monitor
+    finally:
+        for connection in wrapped:
+            connection.execute_wrappers.remove(monitor)
+
+
+def run_in_background(function):
+    def run():
+        try:
+            function()
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=run, name="stale-refresh", daemon=True).start()
+
+
+class StaleWhileRevalidateMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = [re.compile(path) for path in settings.SWR_PATHS]
+
+    def __call__(self, request):
+        key = self.key(request)
+        if key is None:
+            return self.get_response(request)
+        if health.degraded():
+            response = self.stale_response(key, WARNING_STALE)
+            if response is not None:
+                self.refresh(request, key)
+                return response
+        return self.fetch(request, key)
+
+    def process_exception(self, request, exception):
+        key = getattr(request, "stale_key", None)
+        if key is None or not isinstance(exception, OUTAGE_ERRORS):
+            return None
+        health.mark("errors")
+        return self.stale_response(key, WARNING_REVALIDATION_FAILED)
+
+    def key(self, request):
+        if request.method != "GET" or not any(
+            path.match(request.path_info) for path in self.paths
+        ):
+            return None
+        return signature(
+            request.get_full_path(),
+            request.META.get("HTTP_ACCEPT", ""),
+            request.META.get("HTTP_AUTHORIZATION", ""),
+        )
+
+    def fetch(self, request, key, force=False):
+        request.stale_key = key
+        with monitored(LatencyMonitor()) as monitor:
+            response = self.get_response(request)
+        if getattr(response, "stale", False):
+            return response
+        if monitor.queries and not monitor.slow:
+            health.recover()
+        if (
+            response.status_code in STORED_STATUSES
+            and not response.streaming
+            and (
+                force
+                or cache.add(
+                    STORED_KEY.format(key=key), 1, settings.SWR_STORE_INTERVAL
+                )
+            )
+        ):
+            self.store(key, response)
+        return response
+
+    def store(self, key, response):
+        headers = [
+            (header, value)
+            for header, value in response.items()
+            if header.lower() not in SKIPPED_HEADERS
+        ]
+        cache.set(
+            STALE_KEY.format(key=key),
+            (response.status_code, headers, response.content, time.time()),
+            settings.SWR_STALE_TIMEOUT,
+        )
+
+    def stale_response(self, key, warning):
+        stored = cache.get(STALE_KEY.format(key=key))
+        if stored is None:
+            return None
+        status, headers, content, stored_at = stored
+        response = HttpResponse(content, status=status)
+        for header, value in headers:
+            response[header] = value
+        response["Age"] = str(max(int(time.time() - stored_at), 0))
+        response["Warning"] = warning
+        # Копию не должны сохранять ни страничный кэш, ни прокси.
+        patch_cache_control(response, private=True, max_age=0)
+        response.stale = True
+        health.count("served_stale")
+        return response
+
+    def refresh(self, request, key):
+        """Строит свежий ответ в фоне; один на ключ во всех процессах."""
+        lock_key = LOCK_KEY.format(key=STALE_KEY.format(key=key))
+        if not cache.add(lock_key, 1, settings.SWR_REFRESH_TIMEOUT):
+            return
+        environ = {
+            name: value
+            for name, value in request.META.items()
+            if isinstance(value, str)
+        }
+        environ["wsgi.input"] = io.BytesIO()
+        environ["wsgi.url_scheme"] = request.scheme
+
+        def revalidate():
+            try:
+                self.fetch(WSGIRequest(environ), key, force=True)
+            finally:
+                cache.delete(lock_key)
+
+        health.count("refreshes")
+        run_in_background(revalidate)
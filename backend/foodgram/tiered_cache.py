@@ -0,0 +1,403 @@
+"""
+Двухуровневый кэш: LRU в памяти процесса (L1) перед Redis (L2).
+
+L1 ограничен суммарным размером записей в байтах и коротким TTL и
+хранит только ключи с префиксами из L1_KEY_PREFIXES (редко меняющиеся
+и часто читаемые: короткие ссылки, ингредиенты, версии пространств).
+Значения лежат в L1 в виде pickle, поэтому вызывающий код не может
+испортить запись, изменив полученный объект.
+
+Любая запись в L2 публикуется в канал Redis; фоновый поток каждого
+процесса удаляет полученные ключи из своего L1. Каждая инвалидация
+увеличивает поколение L1: значение, прочитанное из Redis до неё, в L1
+не попадает, иначе процесс держал бы устаревшую копию до L1_TIMEOUT.
+Пока подписка не установлена (Redis недоступен, переподключение), L1
+не используется и кэш работает как обычный RedisCache. При L1_MAX_BYTES=0 L1
+отключён полностью.
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache
+
+from foodgram import metrics
+
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+CLEAR_ALL = "*"
+KEY_SEPARATOR = "\n"
+
+
+class ByteLRU:
+    """
+    LRU с ограничением суммарного размера значений и TTL. Поколение
+    растёт при каждой инвалидации (invalidate, clear).
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.evictions = 0
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            if item[1] < time.monotonic():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return item[0]
+
+    def set(self, key, blob, timeout, generation=None):
+        """
+        generation — поколение до чтения значения: если с тех пор была
+        инвалидация, значение могло устареть и не сохраняется.
+        """
+        if len(blob) > self.max_bytes:
+            self.delete(key)
+            return
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._remove(key)
+            self.entries[key] = (blob, time.monotonic() + timeout)
+            self.size += len(blob)
+            while self.size > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def invalidate(self, keys):
+        with self.lock:
+            self.generation += 1
+            for key in keys:
+                self._remove(key)
+
+    def _remove(self, key):
+        item = self.entries.pop(key, None)
+        if item is not None:
+            self.size -= len(item[0])
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.size = 0
+
+
+class LocalTier:
+    """
+    L1 процесса для одного Redis и канала. Django создаёт бэкенд
+    кэша на каждый поток, поэтому L1, подписка и счётчики общие и
+    хранятся в реестре `tiers`.
+    """
+
+    def __init__(self, max_bytes, channel, subscribe, retry_interval):
+        self.lru = ByteLRU(max_bytes)
+        self.channel = channel
+        self.subscribe = subscribe
+        self.retry_interval = retry_interval
+        self.node = uuid.uuid4().hex
+        self.pid = os.getpid()
+        self.listening = False
+        self.thread = None
+        self.lock = threading.Lock()
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def ensure_listener(self):
+        """Запускает поток подписки (заново — после fork воркера)."""
+        if self.thread is not None and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.node = uuid.uuid4().hex
+                self.listening = False
+                self.lru.clear()
+                self.thread = None
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.listen, name="cache-invalidation", daemon=True
+                )
+                self.thread.start()
+
+    def listen(self):
+        while True:
+            try:
+                pubsub = self.subscribe()
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message["type"] == "subscribe":
+                        # Всё, что могло измениться до подписки, сбрасываем.
+                        self.lru.clear()
+                        self.listening = True
+                    elif message["type"] == "message":
+                        self.receive(message["data"])
+            except Exception:
+                logger.warning(
+                    "L1 invalidation listener failed, L1 is off until "
+                    "it resubscribes",
+                    exc_info=True,
+                )
+            # Пропущенные сообщения не восстановить: без подписки L1 не
+            # используется и очищается до переподключения.
+            self.listening = False
+            self.lru.clear()
+            time.sleep(self.retry_interval)
+
+    def receive(self, data):
+        node, _, keys = data.decode().partition(" ")
+        if node == self.node:
+            return
+        self.invalidations += 1
+        if keys == CLEAR_ALL:
+            self.lru.clear()
+            return
+        self.lru.invalidate(keys.split(KEY_SEPARATOR))
+
+    def message(self, keys):
+        return f"{self.node} {KEY_SEPARATOR.join(keys)}"
+
+    def count(self, name, amount=1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def stats(self):
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        return {
+            "listening": self.listening,
+            "l1_entries": len(self.lru.entries),
+            "l1_bytes": self.lru.size,
+            "l1_max_bytes": self.lru.max_bytes,
+            "l1_evictions": self.lru.evictions,
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "l1_hit_rate": self.l1_hits / lookups if lookups else 0.0,
+            "l2_hit_rate": self.l2_hits / lookups if lookups else 0.0,
+            "invalidations_received": self.invalidations,
+        }
+
+
+tiers = {}
+tiers_lock = threading.Lock()
+
+
+def collect_stats():
+    return {name: tier.stats() for name, tier in list(tiers.items())}
+
+
+metrics.register("two_tier_cache", collect_stats)
+
+
+class TwoTierRedisCache(RedisCache):
+    """
+    RedisCache с L1 в памяти процесса. Дополнительные OPTIONS:
+    L1_MAX_BYTES, L1_TIMEOUT, L1_KEY_PREFIXES, INVALIDATION_CHANNEL,
+    INVALIDATION_RETRY_INTERVAL.
+    """
+
+    def __init__(self, server, params):
+        params = dict(params)
+        options = dict(params.get("OPTIONS", {}))
+        max_bytes = int(options.pop("L1_MAX_BYTES", 16 * 1024 * 1024))
+        self.l1_timeout = int(options.pop("L1_TIMEOUT", 30))
+        self.l1_prefixes = tuple(options.pop("L1_KEY_PREFIXES", ()))
+        channel = options.pop("INVALIDATION_CHANNEL", "cache:invalidate")
+        retry_interval = float(options.pop("INVALIDATION_RETRY_INTERVAL", 1))
+        params["OPTIONS"] = options
+        super().__init__(server, params)
+
+        self.tier = None
+        if max_bytes > 0:
+            name = f"{server}|{channel}"
+            with tiers_lock:
+                if name not in tiers:
+                    tiers[name] = LocalTier(
+                        max_bytes,
+                        channel,
+                        self.new_pubsub,
+                        retry_interval,
+                    )
+                self.tier = tiers[name]
+
+    def new_pubsub(self):
+        return self._cache.get_client().pubsub()
+
+    def shared(self, key):
+        """Ключ может лежать в L1 какого-либо процесса."""
+        return self.tier is not None and key.startswith(self.l1_prefixes)
+
+    def in_l1(self, key):
+        """Ключ подходит для L1, и L1 сейчас согласован с Redis."""
+        if not self.shared(key):
+            return False
+        self.tier.ensure_listener()
+        return self.tier.listening
+
+    def l1_timeout_for(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return self.l1_timeout if timeout is None else min(
+            timeout, self.l1_timeout
+        )
+
+    def remember(
+        self, full_key, value, timeout=DEFAULT_TIMEOUT, generation=None
+    ):
+        self.tier.lru.set(
+            full_key,
+            pickle.dumps(value),
+            self.l1_timeout_for(timeout),
+            generation,
+        )
+
+    def invalidate(self, keys, version=None):
+        """
+        Удаляет изменённые ключи из своего L1 и рассылает их остальным
+        процессам. Ключи без префиксов L1 не публикуются.
+        """
+        full_keys = [
+            self.make_and_validate_key(key, version=version)
+            for key in keys
+            if self.shared(key)
+        ]
+        if not full_keys:
+            return
+        self.tier.lru.invalidate(full_keys)
+        self._cache.get_client(write=True).publish(
+            self.tier.channel, self.tier.message(full_keys)
+        )
+
+    def get(self, key, default=None, version=None):
+        if not self.in_l1(key):
+            return super().get(key, default, version=version)
+        full_key = self.make_and_validate_key(key, version=version)
+        blob = self.tier.lru.get(full_key)
+        if blob is not None:
+            self.tier.count("l1_hits")
+            return pickle.loads(blob)
+        generation = self.tier.lru.generation
+        value = self._cache.get(full_key, MISSING)
+        if value is MISSING:
+            self.tier.count("misses")
+            return default
+        self.tier.count("l2_hits")
+        self.remember(full_key, value, generation=generation)
+        return value
+
+    def get_many(self, keys, version=None):
+        result = {}
+        remote = []
+        for key in keys:
+            blob = None
+            if self.in_l1(key):
+                blob = self.tier.lru.get(
+                    self.make_and_validate_key(key, version=version)
+                )
+            if blob is not None:
+                self.tier.count("l1_hits")
+                result[key] = pickle.loads(blob)
+            else:
+                remote.append(key)
+        if not remote:
+            return result
+        generation = self.tier.lru.generation if self.tier else None
+        fetched = super().get_many(remote, version=version)
+        for key in remote:
+            if not self.in_l1(key):
+                continue
+            if key in fetched:
+                self.tier.count("l2_hits")
+                self.remember(
+                    self.make_and_validate_key(key, version=version),
+                    fetched[key],
+                    generation=generation,
+                )
+            else:
+                self.tier.count("misses")
+        result.update(fetched)
+        return result
+
+    def has_key(self, key, version=None):
+        if self.in_l1(key):
+            full_key = self.make_and_validate_key(key, version=version)
+            if self.tier.lru.get(full_key) is not None:
+                return True
+        return super().has_key(key, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        super().set(key, value, timeout, version=version)
+        self.invalidate([key], version)
+        if self.in_l1(key):
+            self.remember(
+                self.make_and_validate_key(key, version=version),
+                value,
+                timeout,
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not super().add(key, value, timeout, version=version):
+            return False
+        self.invalidate([key], version)
+        return True
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        try:
+            return super().set_many(data, timeout, version=version)
+        finally:
+            self.invalidate(data, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        try:
+            return super().touch(key, timeout, version=version)
+        finally:
+            self.invalidate([key], version)
+
+    def delete(self, key, version=None):
+        try:
+            return super().delete(key, version=version)
+        finally:
+            self.invalidate([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        try:
+            super().delete_many(keys, version=version)
+        finally:
+            self.invalidate(keys, version)
+
+    def incr(self, key, delta=1, version=None):
+        try:
+            return super().incr(key, delta, version=version)
+        finally:
+            self.invalidate([key], version)
+
+    def clear(self):
+        try:
+            return super().clear()
+        finally:
+            if self.tier is not None:
+                self.tier.lru.clear()
+                self._cache.get_client(write=True).publish(
+                    self.tier.channel, self.tier.message([CLEAR_ALL])
+                )
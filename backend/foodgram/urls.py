@@ -19,6 +19,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 
+from api.async_views import short_link_redirect
 from api.views import recipe_hash_redirect
 from foodgram import settings
 
@@ -29,7 +30,11 @@ urlpatterns = [
     ),
     path(
         "a/r/<str:url_hash>/",
-        recipe_hash_redirect,
+        (
+            short_link_redirect
+            if settings.ASYNC_READ_VIEWS_ENABLED
+            else recipe_hash_redirect
+        ),
         name="recipe_short_link"
     ),
     path(
@@ -0,0 +1,35 @@
+"""
+Настройки gunicorn. Профиль выбирается переменной GUNICORN_PROFILE:
+
+- wsgi (по умолчанию) — синхронные воркеры и foodgram.wsgi;
+- asgi — воркеры uvicorn и foodgram.asgi с асинхронными версиями
+  читающих эндпоинтов (ASYNC_READ_VIEWS_ENABLED).
+
+Число воркеров одинаково для обоих профилей, чтобы их пропускная
+способность сравнивалась честно (manage.py benchmark_servers). По
+умолчанию воркер один, как и раньше: cpu_count() в контейнере — это
+ядра хоста, а каждый воркер держит свои соединения с БД, поэтому
+GUNICORN_WORKERS задаётся при развёртывании явно.
+"""
+import os
+
+
+PROFILE = os.getenv("GUNICORN_PROFILE", "wsgi")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 1))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+if PROFILE == "asgi":
+    wsgi_app = "foodgram.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+    os.environ.setdefault("ASYNC_READ_VIEWS_ENABLED", "True")
+    # Под ASGI соединения на поток не живут между запросами, поэтому
+    # вместо CONN_MAX_AGE используется общий пул процесса.
+    os.environ.setdefault("DB_POOL_ENABLED", "True")
+elif PROFILE == "wsgi":
+    wsgi_app = "foodgram.wsgi:application"
+    worker_class = "sync"
+else:
+    raise RuntimeError(f"Unknown GUNICORN_PROFILE: {PROFILE}")
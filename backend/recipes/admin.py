@@ -8,7 +8,8 @@ from .models import (
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ("name", "author")
+    list_display = ("name", "author", "favorites_count", "in_cart_count")
+    readonly_fields = ("favorites_count", "in_cart_count")
     search_fields = ("name", "author")
     list_filter = ("author", "name")
 
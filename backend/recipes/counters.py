@@ -0,0 +1,69 @@
+"""Денормализованные счётчики рецептов и пользователей."""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Favorite, Follow, Recipe, ShoppingCart, User
+
+
+# Модель-связь -> (внешний ключ, модель со счётчиком, поле счётчика)
+COUNTED_RELATIONS = {
+    Favorite: (("recipe", Recipe, "favorites_count"),),
+    ShoppingCart: (("recipe", Recipe, "in_cart_count"),),
+    Recipe: (("author", User, "recipes_count"),),
+    Follow: (
+        ("author", User, "followers_count"),
+        ("user", User, "following_count"),
+    ),
+}
+
+
+def change_counter(model, pk, field, delta, **extra):
+    """
+    Атомарно меняет счётчик в БД, не опускаясь ниже нуля.
+    В `extra` можно передать другие поля той же строки.
+    """
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}, **extra
+    )
+
+
+def actual_count(related_model, foreign_key):
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(**{foreign_key: OuterRef("pk")})
+            .order_by()
+            .values(foreign_key)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def counter_specs():
+    for related_model, counters in COUNTED_RELATIONS.items():
+        for foreign_key, model, field in counters:
+            yield related_model, foreign_key, model, field
+
+
+def reconcile_counter(related_model, foreign_key, model, field, batch_size):
+    """Исправляет расхождения счётчика пачками, возвращает число правок."""
+    fixed = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            model.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .annotate(actual=actual_count(related_model, foreign_key))
+            .values_list("pk", field, "actual")[:batch_size]
+        )
+        if not batch:
+            return fixed
+        last_pk = batch[-1][0]
+        drifted = [
+            model(pk=pk, **{field: actual})
+            for pk, stored, actual in batch
+            if stored != actual
+        ]
+        model.objects.bulk_update(drifted, [field])
+        fixed += len(drifted)
@@ -0,0 +1,177 @@
+"""
+Лента рецептов от авторов, на которых подписан пользователь.
+
+Для обычных авторов записи ленты материализуются при публикации
+(fan-out on write). Рецепты авторов с очень большим числом подписчиков
+в таблицу не копируются и подмешиваются при чтении (fan-out on read).
+Когда такой автор опускается до порога FEED_FANOUT_MAX_FOLLOWERS,
+он ставится в очередь FeedBackfill: пока команда backfill_feeds не
+разложит его последние рецепты по лентам подписчиков, они по-прежнему
+подмешиваются при чтении.
+
+Страница ленты читается по ключу (created_at, recipe_id): записи
+FeedEntry пользователя — по индексу (user, -created_at, -recipe),
+рецепты немногих авторов fan-out on read — отдельным запросом, после
+чего обе выборки сливаются (feed_page).
+"""
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import FeedBackfill, FeedEntry, Follow, Recipe, User
+
+
+def is_fanout_author(author_id):
+    """Раскладывать ли рецепты автора по лентам при публикации."""
+    return User.objects.filter(
+        pk=author_id,
+        followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).exists()
+
+
+def fan_out_recipe(recipe):
+    """Добавляет новый рецепт в ленты подписчиков автора."""
+    if not is_fanout_author(recipe.author_id):
+        return
+    followers = Follow.objects.filter(author=recipe.author_id).values_list(
+        "user_id", flat=True
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe=recipe,
+                author_id=recipe.author_id,
+                created_at=recipe.created_at,
+            )
+            for user_id in followers.iterator()
+        ),
+        batch_size=settings.FEED_FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def latest_recipes(author_id):
+    return list(
+        Recipe.objects.filter(author_id=author_id)
+        .order_by("-created_at")
+        .values_list("id", "created_at")[:settings.FEED_BACKFILL_SIZE]
+    )
+
+
+def backfill_feed(user_id, author_id):
+    """Заполняет ленту последними рецептами нового автора."""
+    if not is_fanout_author(author_id):
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                created_at=created_at,
+            )
+            for recipe_id, created_at in latest_recipes(author_id)
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def schedule_backfill(author_id):
+    """
+    Ставит автора в очередь backfill_feeds. Повторная постановка
+    обновляет время, чтобы идущий обход не снял новую заявку.
+    """
+    FeedBackfill.objects.update_or_create(
+        author_id=author_id, defaults={"created_at": timezone.now()}
+    )
+
+
+def backfill_followers(author_id):
+    """
+    Автор перешёл на fan-out on write: его рецепты, опубликованные
+    в режиме чтения, раскладываются по лентам всех подписчиков.
+    Подписчики обходятся пачками по FEED_FANOUT_BATCH_SIZE, каждая
+    пачка — отдельная вставка. Возвращает число обработанных подписчиков.
+    """
+    if not is_fanout_author(author_id):
+        return 0
+    recipes = latest_recipes(author_id)
+    done = 0
+    last_user_id = 0
+    while recipes:
+        followers = list(
+            Follow.objects.filter(author=author_id, user_id__gt=last_user_id)
+            .order_by("user_id")
+            .values_list("user_id", flat=True)[
+                :settings.FEED_FANOUT_BATCH_SIZE
+            ]
+        )
+        if not followers:
+            break
+        last_user_id = followers[-1]
+        FeedEntry.objects.bulk_create(
+            (
+                FeedEntry(
+                    user_id=user_id,
+                    recipe_id=recipe_id,
+                    author_id=author_id,
+                    created_at=created_at,
+                )
+                for user_id in followers
+                for recipe_id, created_at in recipes
+            ),
+            batch_size=settings.FEED_FANOUT_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        done += len(followers)
+    return done
+
+
+def trim_feed(user_id, author_id):
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def read_time_authors(user):
+    """Авторы, чьи рецепты подмешиваются при чтении ленты."""
+    return list(
+        Follow.objects.filter(user=user)
+        .filter(
+            Q(author__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS)
+            | Q(author__feed_backfill__isnull=False)
+        )
+        .values_list("author_id", flat=True)
+    )
+
+
+def before(created_at, recipe_id, created_field, id_field):
+    """Условие «строго раньше позиции» для ключа (created_at, id)."""
+    return Q(**{f"{created_field}__lt": created_at}) | Q(
+        **{created_field: created_at, f"{id_field}__lt": recipe_id}
+    )
+
+
+def feed_page(user, after=None, limit=10):
+    """
+    Ключи (created_at, recipe_id) ленты по убыванию, строго после
+    позиции after (того же вида), не больше limit.
+    """
+    entries = FeedEntry.objects.filter(user=user)
+    if after is not None:
+        entries = entries.filter(before(*after, "created_at", "recipe_id"))
+    keys = set(
+        entries.order_by("-created_at", "-recipe_id").values_list(
+            "created_at", "recipe_id"
+        )[:limit]
+    )
+    authors = read_time_authors(user)
+    if authors:
+        recipes = Recipe.objects.filter(author_id__in=authors)
+        if after is not None:
+            recipes = recipes.filter(before(*after, "created_at", "id"))
+        keys.update(
+            recipes.order_by("-created_at", "-id").values_list(
+                "created_at", "id"
+            )[:limit]
+        )
+    return sorted(keys, reverse=True)[:limit]
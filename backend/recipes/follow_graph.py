@@ -0,0 +1,148 @@
+"""
+Граф подписок для рекомендаций «на кого подписаны ваши подписки».
+
+Исходящие рёбра пользователя хранятся в кэше как отсортированный
+массив int32 (байты numpy), поэтому двухшаговый обход графа — это
+один get_many по подпискам и подсчёт через np.unique, без
+самосоединений Follow в SQL. Массивы перестраиваются из БД при
+промахе. Подписка и отписка меняют поколение пользователя (случайную
+метку); массив, построенный при другом поколении, считается промахом,
+поэтому ни одновременные изменения, ни перестроение по снимку,
+прочитанному до изменения, не оставят в кэше устаревший граф.
+"""
+import secrets
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from foodgram.db.router import pin_primary
+
+from .models import Follow, User
+
+
+FOLLOWING_KEY = "follow_graph:following:{user_id}"
+GENERATION_KEY = "follow_graph:generation:{user_id}"
+DTYPE = np.int32
+
+
+def following_key(user_id):
+    return FOLLOWING_KEY.format(user_id=user_id)
+
+
+def generation_key(user_id):
+    return GENERATION_KEY.format(user_id=user_id)
+
+
+def new_generation():
+    return secrets.token_hex(8)
+
+
+def encode(ids):
+    return np.asarray(ids, dtype=DTYPE).tobytes()
+
+
+def decode(raw):
+    return np.frombuffer(raw, dtype=DTYPE)
+
+
+def current_generations(user_ids):
+    """Поколения пользователей; отсутствующие создаются через add."""
+    keys = {generation_key(user_id): user_id for user_id in user_ids}
+    generations = {
+        keys[key]: value for key, value in cache.get_many(keys).items()
+    }
+    created = [
+        key for key, user_id in keys.items() if user_id not in generations
+    ]
+    if created:
+        for key in created:
+            cache.add(
+                key, new_generation(), settings.FOLLOW_GRAPH_CACHE_TIMEOUT
+            )
+        generations.update(
+            (keys[key], value)
+            for key, value in cache.get_many(created).items()
+        )
+    return generations
+
+
+def load_following(user_ids):
+    """Исходящие рёбра пользователей: {user_id: отсортированный массив}."""
+    keys = {following_key(user_id): user_id for user_id in user_ids}
+    generations = current_generations(user_ids)
+    result = {}
+    for key, entry in cache.get_many(keys).items():
+        user_id = keys[key]
+        generation, raw = entry
+        if generation == generations.get(user_id):
+            result[user_id] = decode(raw)
+
+    missing = [user_id for user_id in user_ids if user_id not in result]
+    if missing:
+        edges = {user_id: [] for user_id in missing}
+        # Массивы кэшируются надолго, поэтому читаем основную БД.
+        with pin_primary():
+            rows = list(
+                Follow.objects.filter(user_id__in=missing).order_by(
+                    "user_id", "author_id"
+                ).values_list("user_id", "author_id")
+            )
+        for user_id, author_id in rows:
+            edges[user_id].append(author_id)
+        # Поколение прочитано до БД: если граф успел измениться, метка
+        # уже другая и этот снимок не будет принят.
+        cache.set_many(
+            {
+                following_key(user_id): (generations[user_id], encode(ids))
+                for user_id, ids in edges.items()
+                if user_id in generations
+            },
+            settings.FOLLOW_GRAPH_CACHE_TIMEOUT,
+        )
+        result.update(
+            (user_id, np.asarray(ids, dtype=DTYPE))
+            for user_id, ids in edges.items()
+        )
+    return result
+
+
+def invalidate_following(user_id):
+    """Делает недействительным массив подписок пользователя."""
+    cache.set(
+        generation_key(user_id),
+        new_generation(),
+        settings.FOLLOW_GRAPH_CACHE_TIMEOUT,
+    )
+
+
+def suggest_authors(user_id, limit):
+    """
+    Авторы, на которых подписаны подписки пользователя, упорядоченные
+    по числу таких подписок, затем по числу рецептов автора.
+    Возвращает список пар (автор, число общих подписок).
+    """
+    following = load_following([user_id])[user_id]
+    if not len(following):
+        return []
+    second_hop = load_following(following.tolist())
+    arrays = [ids for ids in second_hop.values() if len(ids)]
+    if not arrays:
+        return []
+    candidates, overlap = np.unique(np.concatenate(arrays), return_counts=True)
+    keep = ~np.isin(candidates, following) & (candidates != user_id)
+    candidates, overlap = candidates[keep], overlap[keep]
+
+    # Активность нужна только претендентам на страницу: берём с запасом
+    # лучших по пересечению, а порядок уточняем по числу рецептов.
+    shortlist = np.argsort(-overlap, kind="stable")[
+        :limit * settings.FOLLOW_SUGGESTIONS_SHORTLIST_FACTOR
+    ]
+    scores = dict(
+        zip(candidates[shortlist].tolist(), overlap[shortlist].tolist())
+    )
+    authors = User.objects.filter(pk__in=scores)
+    return sorted(
+        ((author, scores[author.pk]) for author in authors),
+        key=lambda item: (-item[1], -item[0].recipes_count, item[0].pk),
+    )[:limit]
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from foodgram.db.router import pin_primary
+from recipes.feed import backfill_followers
+from recipes.models import FeedBackfill
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy recent recipes of authors that dropped to fan-out on write "
+        "into their followers' feeds; schedule it e.g. every minute "
+        "from cron"
+    )
+
+    def handle(self, *args, **options):
+        authors = 0
+        with pin_primary():
+            for pending in FeedBackfill.objects.order_by("created_at"):
+                followers = backfill_followers(pending.author_id)
+                # Пока запись в очереди, рецепты автора подмешиваются
+                # при чтении, поэтому она удаляется последней.
+                FeedBackfill.objects.filter(
+                    pk=pending.pk, created_at=pending.created_at
+                ).delete()
+                authors += 1
+                self.stdout.write(
+                    f"Author {pending.author_id}: {followers} followers"
+                )
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfilled feeds for {authors} authors")
+        )
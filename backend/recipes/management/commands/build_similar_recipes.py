@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from foodgram.db.router import pin_primary
+from recipes.similarity import build_neighbours, store_neighbours
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute top-k similar recipes by ingredient Jaccard "
+        "similarity (exact for small catalogs, MinHash/LSH for large)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--method",
+            choices=["auto", "exact", "minhash"],
+            default="auto",
+        )
+        parser.add_argument("--top-k", type=int, default=None)
+
+    def handle(self, *args, **options):
+        with pin_primary():
+            neighbours = build_neighbours(
+                options["method"], options["top_k"]
+            )
+            store_neighbours(neighbours)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored neighbours for {len(neighbours)} recipes"
+            )
+        )
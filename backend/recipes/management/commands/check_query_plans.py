@@ -0,0 +1,229 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import RequestFactory
+
+from api.filters import RECIPE_ORDERINGS, IngredientFilter, RecipeFilter
+from recipes.models import (
+    Favorite,
+    Follow,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeShortLink,
+    ShoppingCart,
+    User,
+)
+
+
+FULL_SCAN_PATTERNS = (
+    re.compile(r"Seq Scan on (\w+)"),
+    re.compile(r"\bSCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)"),
+)
+SORT_PATTERNS = (
+    re.compile(r"^\s*(?:->\s*)?Sort\b"),
+    re.compile(r"USE TEMP B-TREE FOR ORDER BY"),
+)
+
+RECIPE_FILTER_CASES = (
+    {},
+    {"author": "{author}"},
+    {"is_favorited": "1"},
+    {"is_in_shopping_cart": "1"},
+    {"cooking_time_min": "10", "cooking_time_max": "30"},
+    *({"ordering": ordering} for ordering in RECIPE_ORDERINGS),
+)
+
+
+def analyze_plan(plan, filtered=True):
+    """
+    Возвращает список замечаний по тексту плана запроса.
+    Полный проход по таблице считается проблемой только для
+    запросов с условием WHERE.
+    """
+    warnings = []
+    for line in plan.splitlines():
+        for pattern in FULL_SCAN_PATTERNS:
+            match = pattern.search(line)
+            if match and filtered:
+                warnings.append(f"full scan of {match.group(1)}")
+        for pattern in SORT_PATTERNS:
+            if pattern.search(line):
+                warnings.append("sort without index support")
+    return warnings
+
+
+def filtered_recipes(user, params):
+    request = RequestFactory().get("/api/recipes/", params)
+    request.user = user
+    return RecipeFilter(
+        request.GET, queryset=Recipe.objects.all(), request=request
+    ).qs
+
+
+def canonical_queries(user, author, recipe):
+    """Запросы, стоящие за эндпоинтами API и опциями RecipeFilter."""
+    queries = []
+    for case in RECIPE_FILTER_CASES:
+        params = {
+            key: value.format(author=author.id) for key, value in case.items()
+        }
+        name = "recipes list " + (
+            "&".join(f"{key}={value}" for key, value in params.items())
+            or "(no filters)"
+        )
+        queries.append((name, filtered_recipes(user, params)[:6]))
+    ingredient_request = RequestFactory().get(
+        "/api/ingredients/", {"name": "ab"}
+    )
+    queries.extend(
+        (
+            ("recipe detail", Recipe.objects.filter(pk=recipe.id)),
+            (
+                "recipe ingredients",
+                RecipeIngredient.objects.filter(recipe=recipe),
+            ),
+            (
+                "is_favorited check",
+                Favorite.objects.filter(user=user, recipe=recipe),
+            ),
+            (
+                "is_in_shopping_cart check",
+                ShoppingCart.objects.filter(user=user, recipe=recipe),
+            ),
+            (
+                "ingredients search",
+                IngredientFilter(
+                    ingredient_request.GET,
+                    queryset=Ingredient.objects.all(),
+                    request=ingredient_request,
+                ).qs,
+            ),
+            ("users list", User.objects.order_by("id")[:6]),
+            (
+                "is_subscribed check",
+                Follow.objects.filter(user=user, author=author),
+            ),
+            (
+                "subscriptions",
+                User.objects.filter(following__user=user).order_by("id")[:6],
+            ),
+            (
+                "author recipes",
+                Recipe.objects.filter(author=author)[:3],
+            ),
+            (
+                "download shopping cart",
+                RecipeIngredient.objects.filter(
+                    recipe__shoppingcart__user=user
+                )
+                .values("ingredient__name", "ingredient__measurement_unit")
+                .annotate(total_amount=Sum("amount"))
+                .order_by("ingredient__name"),
+            ),
+            (
+                "short link redirect",
+                RecipeShortLink.objects.filter(url_hash="abcdefgh"),
+            ),
+        )
+    )
+    return queries
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the canonical endpoint queries through EXPLAIN and flag "
+        "full scans and sorts without index support"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Create N temporary recipes (rolled back afterwards)",
+        )
+        parser.add_argument(
+            "--disable-seqscan",
+            action="store_true",
+            help="PostgreSQL: SET enable_seqscan = off to reveal "
+                 "missing indexes on small tables",
+        )
+        parser.add_argument("--verbose-plans", action="store_true")
+        parser.add_argument(
+            "--fail-on-warning",
+            action="store_true",
+            help="Exit with an error when any plan is flagged",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            flagged = self.check_plans(options)
+            transaction.set_rollback(True)
+        if flagged and options["fail_on_warning"]:
+            raise CommandError(f"{flagged} query plan(s) flagged")
+
+    def check_plans(self, options):
+        if options["disable_seqscan"] and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        user, author, recipe = self.seed(options["seed"])
+        flagged = 0
+        for name, queryset in canonical_queries(user, author, recipe):
+            plan = queryset.explain()
+            warnings = analyze_plan(plan, bool(queryset.query.where))
+            if warnings:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f"[WARN] {name}"))
+                for warning in sorted(set(warnings)):
+                    self.stdout.write(f"    {warning}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"[OK]   {name}"))
+            if warnings or options["verbose_plans"]:
+                for line in plan.splitlines():
+                    self.stdout.write(f"        {line}")
+        self.stdout.write("Seed data rolled back")
+        return flagged
+
+    def seed(self, count):
+        """Создаёт пользователей и рецепты для построения планов."""
+        user = User.objects.create(
+            email="plan_user@example.com", username="plan_user"
+        )
+        author = User.objects.create(
+            email="plan_author@example.com", username="plan_author"
+        )
+        Follow.objects.create(user=user, author=author)
+        ingredients = list(Ingredient.objects.all()[:10])
+        if not ingredients:
+            ingredients = [
+                Ingredient.objects.create(
+                    name="plan_ingredient", measurement_unit="g"
+                )
+            ]
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                name=f"plan recipe {index}",
+                author=author if index % 2 else user,
+                text="text",
+                cooking_time=index % 120 + 1,
+            )
+            for index in range(max(count, 1))
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient=ingredients[index % len(ingredients)],
+                amount=1,
+            )
+            for index, recipe in enumerate(recipes)
+        )
+        Favorite.objects.bulk_create(
+            Favorite(user=user, recipe=recipe) for recipe in recipes[::3]
+        )
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=user, recipe=recipe) for recipe in recipes[::5]
+        )
+        return user, author, recipes[0]
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.ranking import decay_trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply time decay to trending scores; schedule it every --hours "
+        "hours (e.g. hourly from cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        updated = decay_trending(options["hours"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Decayed trending score of {updated} recipes")
+        )
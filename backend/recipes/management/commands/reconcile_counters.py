@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from foodgram.db.router import pin_primary
+from recipes.counters import counter_specs, reconcile_counter
+from recipes.ranking import reconcile_popularity
+
+
+class Command(BaseCommand):
+    help = "Fix drift in denormalized recipe and user counters and popularity"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # Сверять с отстающей репликой — значит вносить расхождения.
+        with pin_primary():
+            for related_model, foreign_key, model, field in counter_specs():
+                fixed = reconcile_counter(
+                    related_model,
+                    foreign_key,
+                    model,
+                    field,
+                    options["batch_size"],
+                )
+                self.stdout.write(
+                    f"{model._meta.label}.{field}: {fixed} fixed"
+                )
+            # Счётчики уже сверены: popularity считается по ним.
+            fixed = reconcile_popularity(options["batch_size"])
+            self.stdout.write(f"recipes.Recipe.popularity: {fixed} fixed")
+        self.stdout.write(self.style.SUCCESS("Counters reconciled"))
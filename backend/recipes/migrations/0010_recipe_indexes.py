@@ -0,0 +1,47 @@
+# Generated by Django 4.2.21 on 2026-10-19 07:39
+
+from django.db import migrations, models
+
+
+INGREDIENT_PREFIX_INDEX = "ingredient_name_upper_prefix_idx"
+
+
+def create_ingredient_prefix_index(apps, schema_editor):
+    """
+    IngredientFilter ищет по name__istartswith, что в PostgreSQL
+    превращается в UPPER(name) LIKE 'X%' и не использует обычный индекс.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INGREDIENT_PREFIX_INDEX} "
+        "ON recipes_ingredient (UPPER(name) varchar_pattern_ops)"
+    )
+
+
+def drop_ingredient_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INGREDIENT_PREFIX_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_alter_favorite_user_alter_shoppingcart_user'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-created_at'], name='recipe_author_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.UniqueConstraint(fields=('recipe', 'ingredient'), name='unique_recipe_ingredient'),
+        ),
+        migrations.RunPython(
+            create_ingredient_prefix_index,
+            drop_ingredient_prefix_index,
+        ),
+    ]
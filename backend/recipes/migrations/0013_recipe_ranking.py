@@ -0,0 +1,50 @@
+# Generated by Django 4.2.21 on 2026-10-19 07:49
+
+from django.db import migrations, models
+from django.db.models import F
+
+# Веса на момент миграции: результат не должен зависеть от настроек
+# окружения, в котором она применяется. Пересчитать popularity под
+# новые RANKING_*_WEIGHT можно командой reconcile_counters.
+FAVORITE_WEIGHT = 2
+CART_WEIGHT = 1
+
+
+def populate_ranking(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Recipe.objects.update(
+        popularity=(
+            F("favorites_count") * FAVORITE_WEIGHT
+            + F("in_cart_count") * CART_WEIGHT
+        ),
+    )
+    Recipe.objects.update(trending_score=F("popularity"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_feedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Рейтинг трендов'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-popularity', '-id'], name='recipe_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-id'], name='recipe_trending_idx'),
+        ),
+        migrations.RunPython(populate_ranking, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.21 on 2026-10-19 08:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_counters'),
+        ('recipes', '0016_feed_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedBackfill',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_backfill', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Поставлен в очередь')),
+            ],
+            options={
+                'verbose_name': 'Заполнение лент',
+                'verbose_name_plural': 'Заполнение лент',
+            },
+        ),
+    ]
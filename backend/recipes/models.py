@@ -86,11 +86,60 @@ class Recipe(models.Model):
         auto_now_add=True,
         db_index=True,
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name="В избранном",
+        default=0,
+        editable=False,
+    )
+    in_cart_count = models.PositiveIntegerField(
+        verbose_name="В корзинах",
+        default=0,
+        editable=False,
+    )
+    popularity = models.PositiveIntegerField(
+        verbose_name="Популярность",
+        default=0,
+        editable=False,
+    )
+    trending_score = models.FloatField(
+        verbose_name="Рейтинг трендов",
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(
+                fields=["author", "-created_at"],
+                name="recipe_author_created_idx",
+            ),
+            # Сортировки RecipeFilter.ordering: id делает порядок
+            # однозначным (нужно для keyset-пагинации), а обратный
+            # порядок читается тем же индексом в обратную сторону.
+            models.Index(
+                fields=["created_at", "id"],
+                name="recipe_created_idx",
+            ),
+            models.Index(
+                fields=["cooking_time", "id"],
+                name="recipe_cooking_time_idx",
+            ),
+            models.Index(
+                fields=["name", "id"],
+                name="recipe_name_idx",
+            ),
+            models.Index(
+                fields=["-popularity", "-id"],
+                name="recipe_popularity_idx",
+            ),
+            models.Index(
+                fields=["-trending_score", "-id"],
+                name="recipe_trending_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -119,6 +168,12 @@ class RecipeIngredient(models.Model):
     class Meta:
         verbose_name = "Ингридиент рецепта"
         verbose_name_plural = "Ингридиенты рецептов"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "ingredient"],
+                name="unique_recipe_ingredient"
+            ),
+        ]
 
     def __str__(self):
         name = self.ingredient.name
@@ -235,3 +290,109 @@ class Follow(models.Model):
 
     def __str__(self):
         return f"{self.user} {self.author}"
+
+
+class FeedEntry(models.Model):
+    """Запись ленты подписок, материализованная при публикации рецепта."""
+
+    user = models.ForeignKey(
+        User,
+        verbose_name="Читатель ленты",
+        related_name="feed_entries",
+        on_delete=models.CASCADE,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name="Рецепт",
+        related_name="feed_entries",
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name="Автор рецепта",
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+    created_at = models.DateTimeField(verbose_name="Дата публикации")
+
+    class Meta:
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="unique_user_recipe_in_feed"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-recipe"],
+                name="feed_user_created_idx",
+            ),
+            models.Index(
+                fields=["user", "author"],
+                name="feed_user_author_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.recipe}"
+
+
+class FeedBackfill(models.Model):
+    """Автор, чьи рецепты ещё не разложены по лентам подписчиков."""
+
+    author = models.OneToOneField(
+        User,
+        verbose_name="Автор",
+        related_name="feed_backfill",
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name="Поставлен в очередь", auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = "Заполнение лент"
+        verbose_name_plural = "Заполнение лент"
+
+    def __str__(self):
+        return str(self.author)
+
+
+class RecipeSimilarity(models.Model):
+    """Предрассчитанный сосед рецепта по составу ингредиентов."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name="Рецепт",
+        related_name="similarities",
+        on_delete=models.CASCADE,
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        verbose_name="Похожий рецепт",
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+    score = models.FloatField(verbose_name="Сходство")
+
+    class Meta:
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "similar"],
+                name="unique_recipe_similar"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "-score"],
+                name="similarity_recipe_score_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe} ~ {self.similar}"
@@ -0,0 +1,79 @@
+"""
+Рейтинги popular и trending, поддерживаемые инкрементально.
+
+Каждое добавление в избранное или корзину сразу увеличивает
+popularity и trending_score рецепта; trending_score периодически
+затухает командой decay_trending. Удаление уменьшает только
+popularity: вклад старого события в тренд уже затух, и вычитание
+полного веса обнулило бы вклад свежих событий. Оба поля
+проиндексированы, поэтому страница рейтинга читается за O(размер
+страницы).
+"""
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Favorite, Recipe, ShoppingCart
+
+
+TRENDING_EPSILON = 0.01
+
+
+def event_weight(sender):
+    return {
+        Favorite: settings.RANKING_FAVORITE_WEIGHT,
+        ShoppingCart: settings.RANKING_CART_WEIGHT,
+    }.get(sender, 0)
+
+
+def ranking_updates(sender, delta):
+    """Выражения F() для обновления рейтинга вместе со счётчиком."""
+    weight = event_weight(sender) * delta
+    if not weight:
+        return {}
+    updates = {"popularity": Greatest(F("popularity") + weight, 0)}
+    if weight > 0:
+        updates["trending_score"] = F("trending_score") + weight
+    return updates
+
+
+def popularity():
+    """popularity, вычисленная из счётчиков избранного и корзины."""
+    return (
+        F("favorites_count") * settings.RANKING_FAVORITE_WEIGHT
+        + F("in_cart_count") * settings.RANKING_CART_WEIGHT
+    )
+
+
+def reconcile_popularity(batch_size):
+    """Исправляет расхождения popularity пачками, возвращает число правок."""
+    fixed = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            Recipe.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not batch:
+            return fixed
+        fixed += (
+            Recipe.objects.filter(pk__gt=last_pk, pk__lte=batch[-1])
+            .exclude(popularity=popularity())
+            .update(popularity=popularity())
+        )
+        last_pk = batch[-1]
+
+
+def decay_factor(hours):
+    return 0.5 ** (hours / settings.TRENDING_HALF_LIFE_HOURS)
+
+
+def decay_trending(hours):
+    """Затухание трендов за прошедшие `hours` часов одним UPDATE."""
+    Recipe.objects.filter(
+        trending_score__gt=0, trending_score__lt=TRENDING_EPSILON
+    ).update(trending_score=0)
+    return Recipe.objects.filter(trending_score__gt=0).update(
+        trending_score=F("trending_score") * decay_factor(hours)
+    )
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import COUNTED_RELATIONS, change_counter
+from .feed import backfill_feed, schedule_backfill, trim_feed
+from .models import Follow, User
+from .ranking import ranking_updates
+
+
+@receiver(post_save)
+def increment_counters(sender, instance, created, **kwargs):
+    if not created:
+        return
+    for foreign_key, model, field in COUNTED_RELATIONS.get(sender, ()):
+        change_counter(
+            model,
+            getattr(instance, f"{foreign_key}_id"),
+            field,
+            1,
+            **ranking_updates(sender, 1),
+        )
+
+
+@receiver(post_delete)
+def decrement_counters(sender, instance, **kwargs):
+    for foreign_key, model, field in COUNTED_RELATIONS.get(sender, ()):
+        change_counter(
+            model,
+            getattr(instance, f"{foreign_key}_id"),
+            field,
+            -1,
+            **ranking_updates(sender, -1),
+        )
+
+
+@receiver(post_save, sender=Follow)
+def backfill_follower_feed(sender, instance, created, **kwargs):
+    if created:
+        backfill_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_follower_feed(sender, instance, **kwargs):
+    trim_feed(instance.user_id, instance.author_id)
+    # Счётчик уже уменьшен decrement_counters: автор только что опустился
+    # до порога и переходит с fan-out on read на fan-out on write.
+    if User.objects.filter(
+        pk=instance.author_id,
+        followers_count=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).exists():
+        schedule_backfill(instance.author_id)
@@ -0,0 +1,323 @@
+"""
+Похожие рецепты по пересечению ингредиентов (коэффициент Жаккара).
+
+Соседи рассчитываются заранее командой build_similar_recipes и
+хранятся в RecipeSimilarity. Для небольших каталогов сходство
+считается точно перемножением матрицы инцидентности; целиком она не
+строится, в памяти только пара блоков по BLOCK_SIZE рецептов. Для
+больших — через MinHash-сигнатуры и LSH, а точный коэффициент
+вычисляется только для пар-кандидатов. При изменении ингредиентов
+рецепта его соседи пересчитываются точечно (refresh_recipe) после
+фиксации транзакции записи.
+"""
+import heapq
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+
+from .models import RecipeIngredient, RecipeSimilarity
+
+
+HASH_PRIME = 2147483647
+BLOCK_SIZE = 128
+MAX_BUCKET_SIZE = 200
+MINHASH_SEED = 42
+PERMUTATION_CHUNK = 16
+
+
+def load_pairs():
+    """Пары (рецепт, ингредиент), отсортированные по рецепту."""
+    pairs = np.array(
+        RecipeIngredient.objects.order_by("recipe_id").values_list(
+            "recipe_id", "ingredient_id"
+        ),
+        dtype=np.int64,
+    )
+    return pairs.reshape(-1, 2)
+
+
+def top_neighbours(scores, ids, top_k):
+    """Лучшие top_k столбцов для каждой строки матрицы сходства."""
+    k = min(top_k, scores.shape[1] - 1)
+    if k <= 0:
+        return {}
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    neighbours = {}
+    for row, columns in enumerate(candidates):
+        ranked = sorted(
+            (
+                (int(ids[column]), float(scores[row, column]))
+                for column in columns
+                if scores[row, column] > 0
+            ),
+            key=lambda item: (-item[1], item[0]),
+        )
+        neighbours[row] = ranked
+    return neighbours
+
+
+def exact_neighbours(pairs, top_k):
+    """Точный Жаккар через произведение матрицы инцидентности блоками."""
+    pairs = np.unique(pairs, axis=0)
+    recipe_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    _, columns = np.unique(pairs[:, 1], return_inverse=True)
+    width = columns.max() + 1
+    total = len(recipe_ids)
+    sizes = np.bincount(rows, minlength=total).astype(np.float32)
+
+    def incidence(start):
+        """Строки матрицы инцидентности для рецептов start..+BLOCK_SIZE."""
+        stop = min(start + BLOCK_SIZE, total)
+        first, last = np.searchsorted(rows, [start, stop])
+        block = np.zeros((stop - start, width), dtype=np.float32)
+        block[rows[first:last] - start, columns[first:last]] = 1
+        return block
+
+    result = {}
+    for start in range(0, total, BLOCK_SIZE):
+        block = incidence(start)
+        intersection = np.empty((len(block), total), dtype=np.float32)
+        for other in range(0, total, BLOCK_SIZE):
+            right = block if other == start else incidence(other)
+            intersection[:, other:other + len(right)] = block @ right.T
+        union = sizes[start:start + len(block), None] + sizes - intersection
+        scores = np.divide(
+            intersection,
+            union,
+            out=np.zeros_like(intersection),
+            where=union > 0,
+        )
+        scores[np.arange(len(block)), np.arange(start, start + len(block))] = 0
+        for row, ranked in top_neighbours(scores, recipe_ids, top_k).items():
+            result[int(recipe_ids[start + row])] = ranked
+    return result
+
+
+def minhash_signatures(pairs, permutations):
+    """
+    MinHash-сигнатуры рецептов: для каждой хэш-функции вида
+    (a * x + b) mod p берётся минимум по ингредиентам рецепта.
+    """
+    recipe_ids, starts = np.unique(pairs[:, 0], return_index=True)
+    rng = np.random.default_rng(MINHASH_SEED)
+    a = rng.integers(1, HASH_PRIME, permutations, dtype=np.int64)
+    b = rng.integers(0, HASH_PRIME, permutations, dtype=np.int64)
+    signatures = np.empty((permutations, len(recipe_ids)), dtype=np.int64)
+    for chunk in range(0, permutations, PERMUTATION_CHUNK):
+        part = slice(chunk, chunk + PERMUTATION_CHUNK)
+        hashes = (
+            a[part, None] * pairs[None, :, 1] + b[part, None]
+        ) % HASH_PRIME
+        signatures[part] = np.minimum.reduceat(hashes, starts, axis=1)
+    return recipe_ids, signatures
+
+
+def lsh_candidates(signatures, bands):
+    """Пары рецептов, совпавших хотя бы в одной полосе сигнатуры."""
+    rows_per_band = signatures.shape[0] // bands
+    candidates = set()
+    for band in range(bands):
+        chunk = signatures[band * rows_per_band:(band + 1) * rows_per_band]
+        _, buckets = np.unique(chunk.T, axis=0, return_inverse=True)
+        order = np.argsort(buckets.ravel(), kind="stable")
+        bounds = np.flatnonzero(np.diff(buckets.ravel()[order])) + 1
+        for members in np.split(order, bounds):
+            if 1 < len(members) <= MAX_BUCKET_SIZE:
+                members = members.tolist()
+                for position, first in enumerate(members):
+                    for second in members[position + 1:]:
+                        candidates.add((first, second))
+    return candidates
+
+
+def minhash_neighbours(pairs, top_k, permutations, bands):
+    """Приближённый поиск соседей для больших каталогов."""
+    recipe_ids, signatures = minhash_signatures(pairs, permutations)
+    ingredients = defaultdict(set)
+    for recipe_id, ingredient_id in pairs.tolist():
+        ingredients[recipe_id].add(ingredient_id)
+
+    scored = defaultdict(list)
+    for first, second in lsh_candidates(signatures, bands):
+        first_id, second_id = int(recipe_ids[first]), int(recipe_ids[second])
+        score = jaccard(ingredients[first_id], ingredients[second_id])
+        if score > 0:
+            scored[first_id].append((second_id, score))
+            scored[second_id].append((first_id, score))
+    return {
+        recipe_id: rank(candidates, top_k)
+        for recipe_id, candidates in scored.items()
+    }
+
+
+def jaccard(first, second):
+    union = len(first | second)
+    return len(first & second) / union if union else 0.0
+
+
+def rank(candidates, top_k):
+    return heapq.nsmallest(
+        top_k, candidates, key=lambda item: (-item[1], item[0])
+    )
+
+
+def build_neighbours(method="auto", top_k=None):
+    """Соседи всех рецептов: {recipe_id: [(similar_id, score), ...]}."""
+    top_k = top_k or settings.SIMILAR_RECIPES_TOP_K
+    pairs = load_pairs()
+    if not len(pairs):
+        return {}
+    if method == "auto":
+        recipes = len(np.unique(pairs[:, 0]))
+        method = (
+            "exact"
+            if recipes <= settings.SIMILARITY_EXACT_MAX_RECIPES
+            else "minhash"
+        )
+    if method == "exact":
+        return exact_neighbours(pairs, top_k)
+    return minhash_neighbours(
+        pairs,
+        top_k,
+        settings.SIMILARITY_MINHASH_PERMUTATIONS,
+        settings.SIMILARITY_LSH_BANDS,
+    )
+
+
+@transaction.atomic
+def store_neighbours(neighbours):
+    RecipeSimilarity.objects.all().delete()
+    RecipeSimilarity.objects.bulk_create(
+        (
+            RecipeSimilarity(
+                recipe_id=recipe_id, similar_id=similar_id, score=score
+            )
+            for recipe_id, ranked in neighbours.items()
+            for similar_id, score in ranked
+        ),
+        batch_size=1000,
+    )
+
+
+def refresh_candidates(recipe_id, ingredient_ids):
+    """
+    Рецепты с наибольшим числом общих ингредиентов, кроме самых
+    распространённых: через соль или муку связан почти весь каталог.
+    """
+    popularity = dict(
+        RecipeIngredient.objects.filter(ingredient_id__in=ingredient_ids)
+        .values("ingredient_id")
+        .annotate(recipes=Count("id"))
+        .values_list("ingredient_id", "recipes")
+    )
+    limit = settings.SIMILARITY_COMMON_INGREDIENT_RECIPES
+    distinctive = [
+        ingredient_id
+        for ingredient_id, recipes in popularity.items()
+        if recipes <= limit
+    ] or [min(popularity, key=popularity.get)]
+    return list(
+        RecipeIngredient.objects.filter(ingredient_id__in=distinctive)
+        .exclude(recipe_id=recipe_id)
+        .values("recipe_id")
+        .annotate(shared=Count("id"))
+        .order_by("-shared", "recipe_id")
+        .values_list("recipe_id", flat=True)[
+            :settings.SIMILARITY_REFRESH_CANDIDATES
+        ]
+    )
+
+
+@transaction.atomic
+def refresh_recipe(recipe_id):
+    """
+    Точечно пересчитывает соседей рецепта после смены ингредиентов.
+
+    Рецепт также встаёт в списки соседей тех рецептов, где теперь
+    попадает в top_k. Освободившиеся места в чужих списках
+    заполняются при следующей полной перестройке.
+    """
+    top_k = settings.SIMILAR_RECIPES_TOP_K
+    RecipeSimilarity.objects.filter(recipe_id=recipe_id).delete()
+    RecipeSimilarity.objects.filter(similar_id=recipe_id).delete()
+
+    ingredient_ids = list(
+        RecipeIngredient.objects.filter(recipe_id=recipe_id).values_list(
+            "ingredient_id", flat=True
+        )
+    )
+    if not ingredient_ids:
+        return
+    candidates = refresh_candidates(recipe_id, ingredient_ids)
+    shared = dict(
+        RecipeIngredient.objects.filter(
+            recipe_id__in=candidates, ingredient_id__in=ingredient_ids
+        )
+        .values("recipe_id")
+        .annotate(shared=Count("id"))
+        .values_list("recipe_id", "shared")
+    )
+    sizes = dict(
+        RecipeIngredient.objects.filter(recipe_id__in=candidates)
+        .values("recipe_id")
+        .annotate(size=Count("id"))
+        .values_list("recipe_id", "size")
+    )
+    scores = {
+        other_id: count / (len(ingredient_ids) + sizes[other_id] - count)
+        for other_id, count in shared.items()
+    }
+    RecipeSimilarity.objects.bulk_create(
+        RecipeSimilarity(recipe_id=recipe_id, similar_id=other_id, score=score)
+        for other_id, score in rank(scores.items(), top_k)
+    )
+
+    lists = {
+        row["recipe_id"]: row
+        for row in RecipeSimilarity.objects.filter(recipe_id__in=scores)
+        .values("recipe_id")
+        .annotate(size=Count("id"), lowest=Min("score"))
+    }
+    entered = [
+        other_id
+        for other_id, score in scores.items()
+        if other_id not in lists
+        or lists[other_id]["size"] < top_k
+        or score > lists[other_id]["lowest"]
+    ]
+    RecipeSimilarity.objects.bulk_create(
+        RecipeSimilarity(
+            recipe_id=other_id, similar_id=recipe_id, score=scores[other_id]
+        )
+        for other_id in entered
+    )
+    trim_neighbours(
+        [
+            other_id
+            for other_id in entered
+            if other_id in lists and lists[other_id]["size"] >= top_k
+        ],
+        top_k,
+    )
+
+
+def trim_neighbours(recipe_ids, top_k):
+    """Оставляет в списках соседей recipe_ids лучшие top_k строк."""
+    if not recipe_ids:
+        return
+    ranked = defaultdict(list)
+    for row in RecipeSimilarity.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values("id", "recipe_id", "similar_id", "score"):
+        ranked[row["recipe_id"]].append(row)
+    extra = [
+        row["id"]
+        for rows in ranked.values()
+        for row in sorted(
+            rows, key=lambda row: (-row["score"], row["similar_id"])
+        )[top_k:]
+    ]
+    RecipeSimilarity.objects.filter(id__in=extra).delete()
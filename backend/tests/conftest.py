@@ -1,20 +1,27 @@
 from django.core.management import call_command
+from django.test import override_settings
 from rest_framework.test import APIClient
 import pytest
 
+from api.throttling import local_backend
 from recipes.models import Recipe, RecipeIngredient, Ingredient
 
 
+DUMMY_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+}
+
+
 @pytest.fixture(autouse=True)
 def _patch_cache(settings):
     """
     Отключаем redis на время выполнения тестов.
     """
-    settings.CACHES = {
-        'default': {
-            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-        }
-    }
+    settings.CACHES = DUMMY_CACHES
+    settings.REDIS_URL = ''
+    local_backend.clear()
 
 
 @pytest.fixture(scope='session')
@@ -22,8 +29,12 @@ def django_db_setup(django_db_blocker):
     """
     Настройка тестовой БД с миграциями и загрузкой данных.
     """
-    with django_db_blocker.unblock():
+    # Сигналы сохранения (версии кэша) не должны обращаться к Redis.
+    with django_db_blocker.unblock(), override_settings(CACHES=DUMMY_CACHES):
         call_command('migrate', interactive=False, verbosity=0)
+        call_command(
+            'migrate', database='replica', interactive=False, verbosity=0
+        )
 
         try:
             call_command('load_ingredients')
@@ -0,0 +1,183 @@
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from rest_framework.test import APIRequestFactory, force_authenticate
+import pytest
+
+from api import async_views
+from api.views import IngredientViewSet, RecipeViewSet, UserProfileViewSet
+from recipes.models import (
+    Favorite,
+    Follow,
+    Ingredient,
+    Recipe,
+    RecipeShortLink,
+)
+
+
+factory = APIRequestFactory()
+
+
+@pytest.fixture(autouse=True)
+def shared_connection(settings):
+    """В тестах все запросы идут в одном соединении внутри транзакции."""
+    settings.ASYNC_CONCURRENT_QUERIES = False
+
+
+@pytest.fixture
+def catalog(author, not_author, recipe):
+    Recipe.objects.create(
+        name='Второй', author=author, text='Текст', cooking_time=7
+    )
+    Recipe.objects.filter(pk=recipe.pk).update(image='recipes/images/a.png')
+    Favorite.objects.create(user=not_author, recipe=recipe)
+    Follow.objects.create(user=not_author, author=author)
+    return recipe
+
+
+def compare(async_view, sync_view, path, params=None, user=None, **kwargs):
+    responses = []
+    for view in (async_to_sync(async_view), sync_view):
+        request = factory.get(path, params or {})
+        if user is not None:
+            force_authenticate(request, user=user)
+        response = view(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        responses.append(response)
+    async_response, sync_response = responses
+    assert async_response.status_code == sync_response.status_code
+    assert async_response.content == sync_response.content
+    assert async_response['Content-Type'] == sync_response['Content-Type']
+    return async_response
+
+
+@pytest.mark.parametrize(
+    'params',
+    (
+        {},
+        {'limit': 1, 'offset': 1},
+        {'count': 'false', 'view': 'summary'},
+        {'facets': 'author,cooking_time', 'is_favorited': 1},
+        {'fields': 'unknown'},
+    )
+)
+@pytest.mark.parametrize('reader', (None, 'not_author'))
+@pytest.mark.django_db
+def test_recipe_list_matches_sync(catalog, not_author, params, reader):
+    """Тест совпадения асинхронного списка рецептов с синхронным."""
+    compare(
+        async_views.recipe_list,
+        RecipeViewSet.as_view({'get': 'list'}),
+        '/api/recipes/',
+        params,
+        user=not_author if reader else None,
+    )
+
+
+@pytest.mark.django_db
+def test_recipe_detail_matches_sync(catalog, not_author):
+    """Тест совпадения детального ответа и 404."""
+    sync_view = RecipeViewSet.as_view({'get': 'retrieve'})
+    for pk in (catalog.id, 10 ** 6):
+        compare(
+            async_views.recipe_detail,
+            sync_view,
+            f'/api/recipes/{pk}/',
+            user=not_author,
+            pk=str(pk),
+        )
+
+
+@pytest.mark.django_db
+def test_ingredients_match_sync():
+    """Тест совпадения списка ингредиентов с фильтром по названию."""
+    sync_view = IngredientViewSet.as_view({'get': 'list'})
+    for params in ({}, {'name': 'абри'}):
+        compare(
+            async_views.ingredient_list,
+            sync_view,
+            '/api/ingredients/',
+            params,
+        )
+
+
+@pytest.mark.django_db
+def test_ingredient_change_invalidates_async_list(settings):
+    """Тест: изменение ингредиента сбрасывает кэш асинхронного списка."""
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'async-ingredients',
+        }
+    }
+    sync_view = IngredientViewSet.as_view({'get': 'list'})
+    params = {'name': 'абри'}
+    compare(
+        async_views.ingredient_list, sync_view, '/api/ingredients/', params
+    )
+
+    ingredient = Ingredient.objects.filter(name__startswith='абри').first()
+    ingredient.name = 'абрикосы сушёные'
+    ingredient.save()
+
+    response = compare(
+        async_views.ingredient_list, sync_view, '/api/ingredients/', params
+    )
+    assert 'абрикосы сушёные' in response.content.decode()
+
+
+@pytest.mark.parametrize(
+    'params', ({}, {'recipes_limit': 1}, {'limit': 1, 'count': 'false'})
+)
+@pytest.mark.django_db
+def test_subscriptions_match_sync(catalog, not_author, author, params):
+    """Тест совпадения подписок, в том числе без подписок и без токена."""
+    sync_view = UserProfileViewSet.as_view(
+        {'get': 'subscriptions'}, **UserProfileViewSet.subscriptions.kwargs
+    )
+    path = '/api/users/subscriptions/'
+    compare(async_views.subscriptions, sync_view, path, params, not_author)
+    compare(async_views.subscriptions, sync_view, path, params, author)
+    response = compare(async_views.subscriptions, sync_view, path, params)
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_short_link_redirect(recipe):
+    """Тест асинхронного редиректа по короткой ссылке."""
+    RecipeShortLink.objects.create(recipe=recipe, url_hash='abcdefgh')
+    view = async_to_sync(async_views.short_link_redirect)
+
+    response = view(factory.get('/a/r/abcdefgh/'), url_hash='abcdefgh')
+    assert response.status_code == 302
+    assert response['Location'].endswith(f'/api/recipes/{recipe.id}')
+
+    response = view(factory.get('/a/r/missing/'), url_hash='missing')
+    assert response.status_code == 404
+
+
+def test_read_async_delegates_writes_to_sync_view():
+    """Тест маршрута: GET — async-версия, остальное — синхронный view."""
+    async def async_view(request):
+        return HttpResponse('async')
+
+    def sync_view(request):
+        return HttpResponse('sync')
+
+    view = async_to_sync(async_views.read_async(async_view, sync_view))
+    assert view(factory.get('/')).content == b'async'
+    assert view(factory.post('/')).content == b'sync'
+
+
+def test_concurrently_runs_in_worker_threads(settings):
+    """Тест параллельного выполнения синхронных функций."""
+    settings.ASYNC_CONCURRENT_QUERIES = True
+
+    async def run():
+        import asyncio
+        return await asyncio.gather(
+            async_views.concurrently(lambda: 1),
+            async_views.concurrently(lambda: 2),
+        )
+
+    assert async_to_sync(run)() == [1, 2]
@@ -0,0 +1,116 @@
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+import pytest
+
+from api.authentication import CachedTokenAuthentication, token_cache
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    settings.MIDDLEWARE = [
+        middleware for middleware in settings.MIDDLEWARE
+        if 'cache' not in middleware
+    ]
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture
+def token_client(author):
+    token = Token.objects.create(user=author)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def token_queries(context):
+    return [
+        query for query in context.captured_queries
+        if 'authtoken_token' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+def test_token_lookup_is_cached(token_client, locmem_cache):
+    """Тест, что повторная аутентификация не обращается к БД."""
+    url = reverse('users-me')
+    assert token_client.get(url).status_code == HTTPStatus.OK
+
+    with CaptureQueriesContext(connection) as context:
+        response = token_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.data['email'] == 'author@gmail.ru'
+    assert not token_queries(context)
+
+
+@pytest.mark.django_db
+def test_logout_invalidates_cached_token(token_client, locmem_cache):
+    """Тест, что после logout закэшированный токен не принимается."""
+    url = reverse('users-me')
+    assert token_client.get(url).status_code == HTTPStatus.OK
+
+    response = token_client.post(reverse('logout'))
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert token_client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_deactivation_invalidates_cached_token(
+    token_client,
+    author,
+    locmem_cache
+):
+    """Тест, что деактивированный пользователь теряет доступ сразу."""
+    url = reverse('users-me')
+    assert token_client.get(url).status_code == HTTPStatus.OK
+
+    author.is_active = False
+    author.save()
+    assert token_client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_metrics_are_staff_only(token_client, not_author):
+    """Тест доступа к метрикам только для персонала."""
+    url = reverse('metrics')
+    assert token_client.get(url).status_code == HTTPStatus.FORBIDDEN
+
+    not_author.is_staff = True
+    not_author.save()
+    staff_client = APIClient()
+    staff_client.force_authenticate(user=not_author)
+    response = staff_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert 'hit_rate' in response.data['auth_token_cache']
+
+
+@pytest.mark.django_db
+def test_cached_user_does_not_overwrite_counters(
+    token_client, not_author_client, author, locmem_cache
+):
+    """Тест: пользователь из кэша токенов не хранит счётчики."""
+    token = Token.objects.get(user=author)
+    url = reverse('users-me')
+    assert token_client.get(url).status_code == HTTPStatus.OK
+    not_author_client.post(
+        reverse('users-subscribe', kwargs={'id': author.id})
+    )
+
+    user, _ = CachedTokenAuthentication().authenticate_credentials(token.key)
+    user.first_name = 'Новое имя'
+    user.save()
+
+    author.refresh_from_db()
+    assert author.first_name == 'Новое имя'
+    assert author.followers_count == 1
@@ -0,0 +1,141 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+import pytest
+
+from api.serializers import RecipeWriteSerializer
+from recipes.models import Recipe, User
+
+
+@pytest.mark.django_db
+def test_favorite_and_cart_counters(author_client, not_author_client, recipe):
+    """Тест счётчиков избранного и корзины у рецепта."""
+    for client in (author_client, not_author_client):
+        client.post(reverse('recipe-favorite', kwargs={'pk': recipe.id}))
+    author_client.post(
+        reverse('recipe-shopping-cart', kwargs={'pk': recipe.id})
+    )
+    not_author_client.delete(
+        reverse('recipe-favorite', kwargs={'pk': recipe.id})
+    )
+
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == 1
+    assert recipe.in_cart_count == 1
+
+    response = author_client.get(
+        reverse('recipe-detail', kwargs={'pk': recipe.id})
+    )
+    assert response.data['favorites_count'] == 1
+    assert response.data['in_cart_count'] == 1
+
+
+@pytest.mark.django_db
+def test_follow_and_recipe_counters(
+    not_author_client,
+    author,
+    not_author,
+    recipe
+):
+    """Тест счётчиков рецептов, подписчиков и подписок у пользователя."""
+    response = not_author_client.post(
+        reverse('users-subscribe', kwargs={'id': author.id})
+    )
+    assert response.data['recipes_count'] == 1
+    assert response.data['followers_count'] == 1
+
+    not_author.refresh_from_db()
+    assert not_author.following_count == 1
+
+    recipe.delete()
+    author.refresh_from_db()
+    assert author.recipes_count == 0
+
+
+@pytest.mark.django_db
+def test_reconcile_counters_fixes_drift(author, recipe):
+    """Тест исправления расхождений командой reconcile_counters."""
+    User.objects.filter(pk=author.pk).update(recipes_count=7)
+    Recipe.objects.filter(pk=recipe.pk).update(
+        favorites_count=3, popularity=9
+    )
+
+    out = StringIO()
+    call_command('reconcile_counters', batch_size=1, stdout=out)
+
+    author.refresh_from_db()
+    recipe.refresh_from_db()
+    assert author.recipes_count == 1
+    assert recipe.favorites_count == 0
+    assert recipe.popularity == 0
+    assert 'users.User.recipes_count: 1 fixed' in out.getvalue()
+    assert 'recipes.Recipe.popularity: 1 fixed' in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_avatar_delete_keeps_counters(
+    author_client, not_author_client, author
+):
+    """Тест: удаление аватара устаревшим пользователем не трогает счётчики."""
+    not_author_client.post(
+        reverse('users-subscribe', kwargs={'id': author.id})
+    )
+    response = author_client.delete('/api/users/me/avatar/')
+    assert response.status_code == 204
+
+    author.refresh_from_db()
+    assert author.followers_count == 1
+
+
+@pytest.mark.django_db
+def test_recipe_update_keeps_counters(not_author_client, recipe):
+    """Тест: редактирование рецепта не затирает счётчики избранного."""
+    stale = Recipe.objects.get(pk=recipe.pk)
+    not_author_client.post(
+        reverse('recipe-favorite', kwargs={'pk': recipe.id})
+    )
+    serializer = RecipeWriteSerializer(
+        stale,
+        data={'name': 'Новое название', 'cooking_time': 5},
+        partial=True,
+    )
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+
+    recipe.refresh_from_db()
+    assert recipe.name == 'Новое название'
+    assert recipe.favorites_count == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url, data, changed', [
+    (
+        '/api/users/set_password/',
+        {'new_password': 'NewPassword123'},
+        lambda user: user.check_password('NewPassword123'),
+    ),
+    (
+        '/api/users/set_email/',
+        {'new_email': 'new_author@gmail.ru'},
+        lambda user: user.email == 'new_author@gmail.ru',
+    ),
+])
+def test_credentials_change_keeps_counters(
+    author_client, not_author_client, author, url, data, changed
+):
+    """Тест: смена пароля или почты не затирает счётчики пользователя."""
+    author.set_password('OldPassword123')
+    author.save()
+    not_author_client.post(
+        reverse('users-subscribe', kwargs={'id': author.id})
+    )
+
+    response = author_client.post(
+        url, data={**data, 'current_password': 'OldPassword123'}
+    )
+    assert response.status_code == 204
+
+    author.refresh_from_db()
+    assert changed(author)
+    assert author.followers_count == 1
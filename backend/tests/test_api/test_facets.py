@@ -0,0 +1,103 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from recipes.models import Favorite, Recipe
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+@pytest.fixture
+def recipes(author, not_author):
+    created = [
+        Recipe.objects.create(
+            name=f'Рецепт {index}',
+            author=recipe_author,
+            text='Описание',
+            cooking_time=cooking_time,
+        )
+        for index, (recipe_author, cooking_time) in enumerate(
+            [(author, 10), (author, 25), (author, 90), (not_author, 30)]
+        )
+    ]
+    Favorite.objects.create(user=not_author, recipe=created[0])
+    return created
+
+
+def facet_query_count(queries):
+    return sum('GROUP BY' in query['sql'] for query in queries)
+
+
+@pytest.mark.django_db
+def test_facets_in_single_grouped_query(
+    not_author_client,
+    author,
+    not_author,
+    recipes
+):
+    """Тест подсчёта фасетов одним сгруппированным запросом."""
+    with CaptureQueriesContext(connection) as context:
+        response = not_author_client.get(
+            reverse('recipe-list'),
+            {'facets': 'author,cooking_time,is_favorited'},
+        )
+    assert facet_query_count(context.captured_queries) == 1
+
+    facets = response.data['facets']
+    assert facets['author'] == [
+        {'id': author.id, 'username': author.username, 'count': 3},
+        {'id': not_author.id, 'username': not_author.username, 'count': 1},
+    ]
+    assert facets['cooking_time'] == [
+        {'value': '0-15', 'count': 1},
+        {'value': '16-30', 'count': 2},
+        {'value': '31-60', 'count': 0},
+        {'value': '61+', 'count': 1},
+    ]
+    assert facets['is_favorited'] == [
+        {'value': 1, 'count': 1},
+        {'value': 0, 'count': 3},
+    ]
+
+
+@pytest.mark.django_db
+def test_facets_follow_filters_and_validate(author_client, author, recipes):
+    """Тест фасетов с учётом фильтров и ошибки для неизвестного фасета."""
+    response = author_client.get(
+        reverse('recipe-list'), {'facets': 'cooking_time', 'author': author.id}
+    )
+    facets = response.data['facets']
+    counts = [item['count'] for item in facets['cooking_time']]
+    assert counts == [1, 1, 0, 1]
+
+    response = author_client.get(reverse('recipe-list'), {'facets': 'name'})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_facets_cached_and_invalidated(
+    author_client,
+    author,
+    recipes,
+    locmem_cache
+):
+    """Тест кэширования фасетов и сброса кэша при изменении рецептов."""
+    url = reverse('recipe-list')
+    author_client.get(url, {'facets': 'author', 'limit': 1})
+    with CaptureQueriesContext(connection) as context:
+        author_client.get(url, {'facets': 'author', 'limit': 2})
+    assert facet_query_count(context.captured_queries) == 0
+
+    Recipe.objects.create(
+        name='Новый', author=author, text='Описание', cooking_time=5
+    )
+    response = author_client.get(url, {'facets': 'author', 'limit': 3})
+    assert response.data['facets']['author'][0]['count'] == 4
@@ -0,0 +1,108 @@
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+import pytest
+
+from api.fast_read import build_short_recipes
+from api.serializers import ShortRecipeSerializer
+from recipes.models import (
+    Favorite,
+    Follow,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    User,
+)
+
+
+@pytest.fixture
+def catalog(author, not_author, recipe):
+    """Рецепты с картинками, аватаром, избранным, корзиной и подпиской."""
+    second = Recipe.objects.create(
+        name='Второй', author=not_author, text='Текст', cooking_time=7
+    )
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe=second,
+            ingredient=Ingredient.objects.create(
+                name=f'Ингредиент {index}', measurement_unit='г'
+            ),
+            amount=index + 1,
+        )
+        for index in range(3)
+    )
+    Recipe.objects.filter(pk=recipe.pk).update(
+        image='recipes/images/борщ.png'
+    )
+    User.objects.filter(pk=author.pk).update(avatar='users/avatar.png')
+    Favorite.objects.create(user=not_author, recipe=recipe)
+    ShoppingCart.objects.create(user=not_author, recipe=second)
+    Follow.objects.create(user=not_author, author=author)
+    return recipe, second
+
+
+@pytest.fixture(params=('anonymous', 'author', 'not_author'))
+def reader(request, author, not_author):
+    client = APIClient()
+    if request.param != 'anonymous':
+        client.force_authenticate(
+            user=author if request.param == 'author' else not_author
+        )
+    return client
+
+
+def both_paths(client, settings, url, params=None):
+    contents = []
+    for enabled in (False, True):
+        settings.FAST_READ_PATH_ENABLED = enabled
+        response = client.get(url, params or {})
+        contents.append((response.status_code, response.content))
+    return contents
+
+
+@pytest.mark.parametrize(
+    'params',
+    (
+        {},
+        {'view': 'summary'},
+        {'fields': 'name,ingredients,is_favorited'},
+        {'omit': 'author,text'},
+        {'is_favorited': 1},
+        {'is_in_shopping_cart': 1, 'ordering': 'name'},
+        {'limit': 1, 'offset': 1},
+        {'count': 'false'},
+    )
+)
+@pytest.mark.django_db
+def test_list_parity(reader, catalog, settings, params):
+    """Тест побайтового совпадения списка с ответом сериализаторов."""
+    slow, fast = both_paths(reader, settings, reverse('recipe-list'), params)
+    assert slow == fast
+
+
+@pytest.mark.django_db
+def test_retrieve_parity(reader, catalog, settings):
+    """Тест побайтового совпадения детального ответа и ответа 404."""
+    for recipe in catalog:
+        url = reverse('recipe-detail', kwargs={'pk': recipe.id})
+        slow, fast = both_paths(reader, settings, url)
+        assert slow == fast
+        slow, fast = both_paths(reader, settings, url, {'view': 'summary'})
+        assert slow == fast
+
+    for pk in (10 ** 6, 'abc'):
+        url = reverse('recipe-detail', kwargs={'pk': pk})
+        slow, fast = both_paths(reader, settings, url)
+        assert slow == fast
+
+
+@pytest.mark.django_db
+def test_short_recipes_parity(catalog):
+    """Тест совпадения build_short_recipes с ShortRecipeSerializer."""
+    queryset = Recipe.objects.order_by('id')
+    rows = queryset.values('id', 'name', 'image', 'cooking_time')
+    renderer = JSONRenderer()
+    assert renderer.render(build_short_recipes(rows)) == renderer.render(
+        ShortRecipeSerializer(queryset, many=True).data
+    )
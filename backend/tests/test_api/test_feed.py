@@ -0,0 +1,194 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+import pytest
+
+from recipes.feed import fan_out_recipe
+from recipes.models import FeedBackfill, FeedEntry, Follow, Recipe
+
+
+def create_recipe(client, name):
+    response = client.post(
+        reverse('recipe-list'),
+        data={
+            'name': name,
+            'text': 'Описание',
+            'ingredients': [{'id': 1, 'amount': 10}],
+            'cooking_time': 5,
+            'image': None,
+        },
+        format='json',
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    return response.data['id']
+
+
+@pytest.fixture
+def subscribe(not_author_client, author):
+    url = reverse('users-subscribe', kwargs={'id': author.id})
+    return lambda: not_author_client.post(url)
+
+
+@pytest.mark.django_db
+def test_feed_fan_out_and_pagination(
+    author_client,
+    not_author_client,
+    not_author,
+    recipe,
+    subscribe,
+):
+    """Тест ленты: backfill при подписке и раскладка новых рецептов."""
+    subscribe()
+    assert FeedEntry.objects.filter(user=not_author).count() == 1
+
+    new_ids = [
+        create_recipe(author_client, f'Рецепт {index}')
+        for index in range(3)
+    ]
+    url = reverse('recipe-feed')
+    response = not_author_client.get(url, {'limit': 2})
+    assert response.status_code == HTTPStatus.OK
+    assert [item['id'] for item in response.data['results']] == (
+        new_ids[::-1][:2]
+    )
+
+    response = not_author_client.get(response.data['next'])
+    assert [item['id'] for item in response.data['results']] == [
+        new_ids[0], recipe.id
+    ]
+    assert response.data['next'] is None
+
+
+@pytest.mark.django_db
+def test_feed_trimmed_on_unsubscribe(
+    not_author_client,
+    not_author,
+    author,
+    recipe,
+    subscribe,
+):
+    """Тест очистки ленты при отписке."""
+    subscribe()
+    not_author_client.delete(
+        reverse('users-subscribe', kwargs={'id': author.id})
+    )
+    assert not FeedEntry.objects.filter(user=not_author).exists()
+    response = not_author_client.get(reverse('recipe-feed'))
+    assert response.data['results'] == []
+
+
+@pytest.mark.django_db
+def test_feed_reads_popular_authors_on_read(
+    settings,
+    not_author_client,
+    not_author,
+    author,
+    recipe,
+    subscribe,
+):
+    """Тест fan-out on read для авторов с большим числом подписчиков."""
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 0
+    subscribe()
+    Recipe.objects.create(
+        name='Ещё рецепт', author=author, text='Описание', cooking_time=5
+    )
+
+    assert not FeedEntry.objects.filter(user=not_author).exists()
+    response = not_author_client.get(reverse('recipe-feed'))
+    assert len(response.data['results']) == 2
+
+
+@pytest.mark.django_db
+def test_feed_requires_auth(client):
+    """Тест, что лента доступна только авторизованным."""
+    response = client.get(reverse('recipe-feed'))
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.fixture
+def mixed_feed(settings, author, not_author, django_user_model):
+    """
+    Читатель подписан на популярного автора (fan-out on read) и на
+    обычного (fan-out on write); рецепты авторов чередуются по времени.
+    """
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 1
+    regular = django_user_model.objects.create(
+        email='regular@gmail.ru', username='Обычный'
+    )
+    fan = django_user_model.objects.create(
+        email='fan@gmail.ru', username='Поклонник'
+    )
+    for user, followed in (
+        (not_author, author),
+        (fan, author),
+        (not_author, regular),
+    ):
+        Follow.objects.create(user=user, author=followed)
+    recipes = []
+    for index in range(5):
+        recipe = Recipe.objects.create(
+            name=f'Рецепт {index}',
+            author=author if index % 2 else regular,
+            text='Описание',
+            cooking_time=5,
+        )
+        fan_out_recipe(recipe)
+        recipes.append(recipe.id)
+    return recipes
+
+
+@pytest.mark.django_db
+def test_feed_merges_read_time_authors_by_keyset(
+    not_author_client, not_author, mixed_feed
+):
+    """Тест слияния записей ленты и авторов fan-out on read по курсору."""
+    assert FeedEntry.objects.filter(user=not_author).count() == 3
+
+    seen = []
+    response = not_author_client.get(reverse('recipe-feed'), {'limit': 2})
+    while True:
+        assert response.status_code == HTTPStatus.OK
+        seen += [item['id'] for item in response.data['results']]
+        if response.data['next'] is None:
+            break
+        response = not_author_client.get(response.data['next'])
+    assert seen == mixed_feed[::-1]
+
+
+@pytest.mark.django_db
+def test_feed_backfilled_when_author_drops_to_fan_out(
+    settings,
+    not_author_client,
+    not_author,
+    author,
+    mixed_feed,
+    django_capture_on_commit_callbacks,
+):
+    """Тест: автор опустился до порога — его рецепты попадают в ленты."""
+    url = reverse('recipe-feed')
+    fan = Follow.objects.exclude(user=not_author).get(author=author)
+    with django_capture_on_commit_callbacks(execute=True):
+        fan.delete()
+
+    # До запуска команды рецепты автора по-прежнему читаются из Recipe.
+    assert FeedBackfill.objects.filter(author=author).exists()
+    assert not FeedEntry.objects.filter(
+        user=not_author, author=author
+    ).exists()
+    response = not_author_client.get(url)
+    assert [item['id'] for item in response.data['results']] == (
+        mixed_feed[::-1]
+    )
+
+    settings.FEED_FANOUT_BATCH_SIZE = 1
+    call_command('backfill_feeds', stdout=StringIO())
+    assert not FeedBackfill.objects.exists()
+    assert FeedEntry.objects.filter(
+        user=not_author, author=author
+    ).count() == 2
+    response = not_author_client.get(url)
+    assert [item['id'] for item in response.data['results']] == (
+        mixed_feed[::-1]
+    )
@@ -0,0 +1,69 @@
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from recipes.models import Recipe
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+@pytest.fixture
+def recipes(author):
+    return Recipe.objects.bulk_create(
+        Recipe(
+            name=f'Рецепт {index}',
+            author=author,
+            text='Описание',
+            cooking_time=10,
+        )
+        for index in range(5)
+    )
+
+
+@pytest.mark.django_db
+def test_count_can_be_skipped(client, recipes):
+    """Тест, что с ?count=false подсчёт не выполняется."""
+    url = reverse('recipe-list')
+    response = client.get(url, {'limit': 2, 'count': 'false'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'count' not in response.data
+    assert len(response.data['results']) == 2
+    assert 'offset=2' in response.data['next']
+
+    response = client.get(url, {'limit': 2, 'offset': 4, 'count': 'false'})
+    assert len(response.data['results']) == 1
+    assert response.data['next'] is None
+
+
+@pytest.mark.django_db
+def test_count_is_cached_and_invalidated(
+    client,
+    author,
+    recipes,
+    locmem_cache,
+):
+    """Тест кэширования COUNT(*) и его сброса при изменении рецептов."""
+    url = reverse('recipe-list')
+    assert client.get(url, {'limit': 1}).data['count'] == 5
+
+    with CaptureQueriesContext(connection) as context:
+        assert client.get(url, {'limit': 2}).data['count'] == 5
+    assert not any(
+        'COUNT(' in query['sql'] for query in context.captured_queries
+    )
+
+    Recipe.objects.create(
+        name='Новый рецепт', author=author, text='Описание', cooking_time=5
+    )
+    assert client.get(url, {'limit': 3}).data['count'] == 6
@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+import pytest
+
+from recipes.models import Recipe
+
+
+@pytest.mark.django_db
+def test_ranking_updates_on_favorite_and_cart(
+    author_client,
+    not_author_client,
+    recipe
+):
+    """Тест инкрементального обновления popularity и trending_score."""
+    not_author_client.post(
+        reverse('recipe-favorite', kwargs={'pk': recipe.id})
+    )
+    author_client.post(
+        reverse('recipe-shopping-cart', kwargs={'pk': recipe.id})
+    )
+    recipe.refresh_from_db()
+    assert recipe.popularity == 3
+    assert recipe.trending_score == 3
+
+    not_author_client.delete(
+        reverse('recipe-favorite', kwargs={'pk': recipe.id})
+    )
+    recipe.refresh_from_db()
+    assert recipe.popularity == 1
+
+
+@pytest.mark.django_db
+def test_removal_keeps_trending_of_fresh_events(
+    author_client,
+    not_author_client,
+    recipe
+):
+    """Тест: удаление старого избранного не обнуляет свежий тренд."""
+    favorite_url = reverse('recipe-favorite', kwargs={'pk': recipe.id})
+    not_author_client.post(favorite_url)
+    # Вклад избранного почти затух, затем пришло свежее событие.
+    Recipe.objects.filter(pk=recipe.pk).update(trending_score=0.1)
+    author_client.post(
+        reverse('recipe-shopping-cart', kwargs={'pk': recipe.id})
+    )
+    not_author_client.delete(favorite_url)
+
+    recipe.refresh_from_db()
+    assert recipe.trending_score == pytest.approx(1.1)
+    assert recipe.popularity == 1
+
+
+@pytest.mark.django_db
+def test_popular_and_trending_ordering(author_client, author, recipe):
+    """Тест сортировки списка рецептов по популярности и трендам."""
+    other = Recipe.objects.create(
+        name='Другой рецепт', author=author, text='Описание', cooking_time=5
+    )
+    Recipe.objects.filter(pk=recipe.pk).update(popularity=10, trending_score=1)
+    Recipe.objects.filter(pk=other.pk).update(popularity=1, trending_score=5)
+
+    url = reverse('recipe-list')
+    response = author_client.get(url, {'ordering': 'popular'})
+    assert [item['id'] for item in response.data['results']] == [
+        recipe.id, other.id
+    ]
+    response = author_client.get(url, {'ordering': 'trending'})
+    assert [item['id'] for item in response.data['results']] == [
+        other.id, recipe.id
+    ]
+    response = author_client.get(url, {'ordering': 'unknown'})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_decay_trending_command(recipe, settings):
+    """Тест затухания trending_score командой decay_trending."""
+    settings.TRENDING_HALF_LIFE_HOURS = 24
+    Recipe.objects.filter(pk=recipe.pk).update(trending_score=8)
+
+    call_command('decay_trending', '--hours', '48', stdout=StringIO())
+
+    recipe.refresh_from_db()
+    assert recipe.trending_score == pytest.approx(2)
@@ -0,0 +1,63 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+
+def first_result(client, params):
+    response = client.get(reverse('recipe-list'), params)
+    assert response.status_code == 200
+    return response.data['results'][0]
+
+
+@pytest.mark.django_db
+def test_summary_view_skips_text_and_ingredients(author_client, recipe):
+    """Тест режима summary: меньше полей и без лишних чтений из БД."""
+    with CaptureQueriesContext(connection) as context:
+        item = first_result(author_client, {'view': 'summary'})
+
+    assert set(item) == {'id', 'name', 'image', 'author', 'cooking_time'}
+    sql = ' '.join(query['sql'] for query in context.captured_queries)
+    assert 'recipeingredient' not in sql
+    assert '"recipes_recipe"."text"' not in sql
+
+
+@pytest.mark.parametrize(
+    'params, expected',
+    (
+        ({'fields': 'name,cooking_time'}, {'id', 'name', 'cooking_time'}),
+        (
+            {'view': 'summary', 'omit': 'author,image'},
+            {'id', 'name', 'cooking_time'},
+        ),
+        (
+            {'omit': 'text,ingredients,author,image,is_favorited'},
+            {
+                'id',
+                'name',
+                'cooking_time',
+                'is_in_shopping_cart',
+                'favorites_count',
+                'in_cart_count',
+            },
+        ),
+    )
+)
+@pytest.mark.django_db
+def test_fields_and_omit(author_client, recipe, params, expected):
+    """Тест параметров fields и omit."""
+    assert set(first_result(author_client, params)) == expected
+
+
+@pytest.mark.django_db
+def test_fieldset_applies_to_detail_and_validates(author_client, recipe):
+    """Тест набора полей в детальном ответе и ошибок в параметрах."""
+    response = author_client.get(
+        reverse('recipe-detail', kwargs={'pk': recipe.id}),
+        {'fields': 'ingredients'},
+    )
+    assert set(response.data) == {'id', 'ingredients'}
+
+    for params in ({'fields': 'secret'}, {'view': 'tiny'}):
+        response = author_client.get(reverse('recipe-list'), params)
+        assert response.status_code == 400
@@ -0,0 +1,44 @@
+from django.urls import reverse
+import pytest
+
+from recipes.models import Recipe
+
+
+@pytest.fixture
+def recipes(author):
+    return [
+        Recipe.objects.create(
+            name=name, author=author, text='Описание', cooking_time=time
+        )
+        for name, time in (('Борщ', 60), ('Азу', 40), ('Вареники', 40))
+    ]
+
+
+def ids(response):
+    return [item['id'] for item in response.data['results']]
+
+
+@pytest.mark.parametrize(
+    'ordering, expected',
+    (
+        ('created_at', [0, 1, 2]),
+        ('-created_at', [2, 1, 0]),
+        ('cooking_time', [1, 2, 0]),
+        ('name', [1, 0, 2]),
+    )
+)
+@pytest.mark.django_db
+def test_recipe_ordering(client, recipes, ordering, expected):
+    """Тест сортировок списка рецептов с однозначным порядком по id."""
+    response = client.get(reverse('recipe-list'), {'ordering': ordering})
+    assert ids(response) == [recipes[index].id for index in expected]
+
+
+@pytest.mark.django_db
+def test_cooking_time_range(client, recipes):
+    """Тест фильтрации по диапазону времени приготовления."""
+    response = client.get(
+        reverse('recipe-list'),
+        {'cooking_time_min': 30, 'cooking_time_max': 50, 'ordering': 'name'},
+    )
+    assert ids(response) == [recipes[1].id, recipes[2].id]
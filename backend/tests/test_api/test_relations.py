@@ -0,0 +1,143 @@
+from types import SimpleNamespace
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from api import relations
+from api.relations import UserRelations, relation_key
+from recipes.models import Favorite
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(relations, 'get_redis', lambda: client)
+    return client
+
+
+@pytest.mark.django_db
+def test_relations_are_rebuilt_and_written_through(
+    fake_redis,
+    author_client,
+    author,
+    recipe,
+    django_capture_on_commit_callbacks,
+):
+    """Тест перестроения множеств и сквозной записи при изменениях."""
+    assert UserRelations(author).favorites == set()
+    key = relation_key(author.id, 'favorites')
+    assert fake_redis.exists(key)
+
+    url = reverse('recipe-favorite', kwargs={'pk': recipe.id})
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(url)
+    assert UserRelations(author).favorites == {recipe.id}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.delete(url)
+    assert UserRelations(author).favorites == set()
+
+
+@pytest.mark.django_db
+def test_write_through_skips_cold_cache(
+    fake_redis,
+    author_client,
+    author,
+    recipe,
+    django_capture_on_commit_callbacks,
+):
+    """Тест, что частичное множество не создаётся до перестроения."""
+    url = reverse('recipe-shopping-cart', kwargs={'pk': recipe.id})
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(url)
+
+    assert not fake_redis.exists(relation_key(author.id, 'cart'))
+    assert UserRelations(author).cart == {recipe.id}
+
+
+@pytest.mark.django_db
+def test_filters_use_relations(author_client, author, recipe):
+    """Тест фильтров is_favorited и is_in_shopping_cart."""
+    url = reverse('recipe-list')
+    response = author_client.get(url, {'is_in_shopping_cart': 1})
+    assert response.data['results'] == []
+
+    author_client.post(
+        reverse('recipe-shopping-cart', kwargs={'pk': recipe.id})
+    )
+    response = author_client.get(url, {'is_in_shopping_cart': 1})
+    assert [item['id'] for item in response.data['results']] == [recipe.id]
+    assert response.data['results'][0]['is_in_shopping_cart'] is True
+
+
+def test_anonymous_relations_are_empty():
+    """Тест, что для анонима запросы к БД не выполняются."""
+    anonymous = SimpleNamespace(is_authenticated=False, pk=None)
+    assert UserRelations(anonymous).following == set()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('change', ('add', 'remove'))
+def test_rebuild_skips_snapshot_older_than_change(
+    fake_redis, monkeypatch, author, recipe, change
+):
+    """Тест: изменение во время перестроения не теряется."""
+    if change == 'remove':
+        Favorite.objects.create(user=author, recipe=recipe)
+    load_from_db = relations.load_from_db
+
+    def load_then_change(user_id, name):
+        try:
+            return load_from_db(user_id, name)
+        finally:
+            # Изменение фиксируется после чтения снимка, но до записи.
+            if change == 'add':
+                Favorite.objects.create(user=author, recipe=recipe)
+                relations.add_relation(author.id, name, recipe.id)
+            else:
+                Favorite.objects.filter(user=author, recipe=recipe).delete()
+                relations.remove_relation(author.id, name, recipe.id)
+
+    monkeypatch.setattr(relations, 'load_from_db', load_then_change)
+    relations.load_relation(author.id, 'favorites')
+    monkeypatch.setattr(relations, 'load_from_db', load_from_db)
+
+    assert not fake_redis.exists(relation_key(author.id, 'favorites'))
+    expected = {recipe.id} if change == 'add' else set()
+    assert UserRelations(author).favorites == expected
+    assert fake_redis.exists(relation_key(author.id, 'favorites'))
+
+
+@pytest.mark.django_db
+def test_large_set_is_cached(fake_redis, monkeypatch, author):
+    """Тест: множество больше предела unpack() в Lua тоже кэшируется."""
+    ids = set(range(1, 20001))
+    monkeypatch.setattr(relations, 'load_from_db', lambda *args: ids)
+
+    assert relations.load_relation(author.id, 'favorites') == ids
+    assert fake_redis.scard(relation_key(author.id, 'favorites')) == 20001
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('inline_max', (0, 1000))
+def test_large_set_filters_by_subquery(
+    settings, author_client, author, recipe, inline_max
+):
+    """Тест: большое множество фильтруется подзапросом, а не списком id."""
+    settings.RELATIONS_INLINE_MAX_IDS = inline_max
+    Favorite.objects.create(user=author, recipe=recipe)
+
+    with CaptureQueriesContext(connection) as context:
+        response = author_client.get(
+            reverse('recipe-list'), {'is_favorited': 1}
+        )
+    assert [item['id'] for item in response.data['results']] == [recipe.id]
+    assert any(
+        'recipes_favorite' in query['sql']
+        and 'recipes_recipe' in query['sql']
+        for query in context.captured_queries
+    ) == (inline_max == 0)
@@ -0,0 +1,108 @@
+import datetime
+import json
+from decimal import Decimal
+
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+import msgpack
+import pytest
+
+from api.renderers import FastJSONRenderer, MessagePackRenderer
+
+
+MSGPACK = 'application/msgpack'
+
+
+@pytest.mark.parametrize(
+    'data',
+    (
+        {'name': 'Борщ', 'id': 1, 'ok': True, 'image': None},
+        [{'amount': Decimal('1.50')}, {1: 'int key'}],
+        {'created': datetime.datetime(2024, 5, 1, 12, 30)},
+        {
+            'created': datetime.datetime(
+                2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+            ),
+            'day': datetime.date(2024, 5, 1),
+            'time': datetime.time(12, 30, 15, 123456),
+        },
+        {
+            'created': datetime.datetime(
+                2024, 5, 1, 15, 30,
+                tzinfo=datetime.timezone(datetime.timedelta(hours=3)),
+            ),
+        },
+        {'text': 'строка\u2028с разделителем '},
+        {'detail': gettext_lazy('Not found.')},
+    )
+)
+def test_fast_json_renderer_matches_drf(data):
+    """Тест совпадения FastJSONRenderer с JSONRenderer DRF."""
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.parametrize('value', (float('nan'), float('inf')))
+def test_non_finite_floats_become_null(value):
+    """Тест: NaN и бесконечности дают null, а не ошибку, как в DRF."""
+    with pytest.raises(ValueError):
+        JSONRenderer().render({'score': value})
+    assert FastJSONRenderer().render({'score': value}) == b'{"score":null}'
+
+
+def test_indent_falls_back_to_stdlib():
+    """Тест отступов через `; indent=` в Accept."""
+    data = {'id': 1}
+    media_type = 'application/json; indent=2'
+    assert FastJSONRenderer().render(data, media_type) == (
+        JSONRenderer().render(data, media_type)
+    )
+
+
+@pytest.mark.django_db
+def test_msgpack_negotiated_by_accept(author_client, recipe):
+    """Тест выбора MessagePack по заголовку Accept."""
+    url = reverse('recipe-list')
+    json_response = author_client.get(url)
+    response = author_client.get(url, HTTP_ACCEPT=MSGPACK)
+
+    assert response['Content-Type'] == MSGPACK
+    assert msgpack.unpackb(response.content) == json.loads(
+        json_response.content
+    )
+    assert MessagePackRenderer().render(None) == b''
+
+
+@pytest.mark.django_db
+def test_msgpack_request_body(author_client):
+    """Тест разбора тела MessagePack с той же валидацией, что и JSON."""
+    url = reverse('recipe-list')
+    payload = {'name': 'Рецепт', 'text': 'Описание', 'cooking_time': 0}
+
+    json_response = author_client.post(url, payload, format='json')
+    response = author_client.post(
+        url,
+        msgpack.packb(payload),
+        content_type=MSGPACK,
+        HTTP_ACCEPT=MSGPACK,
+    )
+    assert response.status_code == json_response.status_code == 400
+    assert msgpack.unpackb(response.content) == json_response.json()
+
+
+@pytest.mark.parametrize(
+    'content_type, body, message',
+    (
+        ('application/json', b'{"name": ', 'JSON parse error - '),
+        (MSGPACK, b'\x81\xa4na', 'MessagePack parse error - '),
+    )
+)
+@pytest.mark.django_db
+def test_parse_errors(author_client, content_type, body, message):
+    """Тест единого формата ошибки разбора тела запроса."""
+    response = author_client.post(
+        reverse('recipe-list'), body, content_type=content_type
+    )
+    assert response.status_code == 400
+    assert set(response.json()) == {'detail'}
+    assert response.json()['detail'].startswith(message)
@@ -0,0 +1,176 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+import pytest
+
+from recipes import similarity
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeSimilarity,
+)
+from recipes.similarity import (
+    build_neighbours,
+    refresh_recipe,
+    trim_neighbours,
+)
+
+
+@pytest.fixture
+def catalog(author):
+    """Рецепты с частично пересекающимися наборами ингредиентов."""
+    ingredients = [
+        Ingredient.objects.create(name=f'Ингредиент {index}',
+                                  measurement_unit='г')
+        for index in range(6)
+    ]
+    compositions = {
+        'Первый': [0, 1, 2, 3],
+        'Второй': [0, 1, 2, 4],
+        'Третий': [0, 5],
+        'Четвёртый': [5],
+    }
+    recipes = {}
+    for name, indexes in compositions.items():
+        recipe = Recipe.objects.create(
+            name=name, author=author, text='Описание', cooking_time=10
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient=ingredients[index], amount=1
+            )
+            for index in indexes
+        )
+        recipes[name] = recipe
+    return recipes, ingredients
+
+
+@pytest.mark.django_db
+def test_exact_and_minhash_neighbours_agree(catalog):
+    """Тест совпадения точного расчёта и MinHash/LSH на малом каталоге."""
+    recipes, _ = catalog
+    exact = build_neighbours('exact', top_k=2)
+    approximate = build_neighbours('minhash', top_k=2)
+
+    first, second = recipes['Первый'].id, recipes['Второй'].id
+    assert exact[first][0] == (second, pytest.approx(0.6))
+    assert approximate[first][0] == (second, pytest.approx(0.6))
+    assert exact[recipes['Четвёртый'].id] == [
+        (recipes['Третий'].id, pytest.approx(0.5))
+    ]
+
+
+@pytest.mark.django_db
+def test_exact_neighbours_do_not_depend_on_block_size(catalog, monkeypatch):
+    """Тест: матрица, собранная по блокам, даёт тот же результат."""
+    expected = build_neighbours('exact', top_k=3)
+    monkeypatch.setattr(similarity, 'BLOCK_SIZE', 1)
+    assert build_neighbours('exact', top_k=3) == expected
+
+
+@pytest.mark.django_db
+def test_similar_endpoint(client, catalog):
+    """Тест выдачи предрассчитанных похожих рецептов."""
+    recipes, _ = catalog
+    call_command('build_similar_recipes', stdout=StringIO())
+
+    response = client.get(
+        reverse('recipe-similar', kwargs={'pk': recipes['Первый'].id})
+    )
+    assert response.status_code == 200
+    assert [item['id'] for item in response.data] == [
+        recipes['Второй'].id, recipes['Третий'].id
+    ]
+    for pk in (10 ** 6, 'abc'):
+        response = client.get(reverse('recipe-similar', kwargs={'pk': pk}))
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_similar_refreshed_on_update(
+    author_client, catalog, django_capture_on_commit_callbacks
+):
+    """Тест точечного пересчёта соседей при смене ингредиентов."""
+    recipes, ingredients = catalog
+    call_command('build_similar_recipes', stdout=StringIO())
+    fourth = recipes['Четвёртый']
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = author_client.patch(
+            reverse('recipe-detail', kwargs={'pk': fourth.id}),
+            data={
+                'name': fourth.name,
+                'text': fourth.text,
+                'cooking_time': fourth.cooking_time,
+                'ingredients': [
+                    {'id': ingredients[index].id, 'amount': 1}
+                    for index in (0, 1, 2, 3)
+                ],
+            },
+            format='json',
+        )
+    assert response.status_code == 200
+    # Пересчёт выполняется после фиксации, а не внутри транзакции записи.
+    assert RecipeSimilarity.objects.filter(
+        recipe=recipes['Третий'], similar=fourth, score=0.5
+    ).exists()
+    for callback in callbacks:
+        callback()
+
+    neighbours = RecipeSimilarity.objects.filter(recipe=fourth).order_by(
+        '-score'
+    )
+    assert neighbours[0].similar_id == recipes['Первый'].id
+    assert neighbours[0].score == pytest.approx(1.0)
+    assert RecipeSimilarity.objects.filter(
+        recipe=recipes['Первый'], similar=fourth, score=1.0
+    ).exists()
+    assert not RecipeSimilarity.objects.filter(
+        recipe=recipes['Третий'], similar=fourth, score=0.5
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_refresh_skips_common_ingredients_and_trims(settings, catalog):
+    """Тест: частые ингредиенты не дают кандидатов, списки обрезаются."""
+    recipes, ingredients = catalog
+    settings.SIMILAR_RECIPES_TOP_K = 1
+    call_command('build_similar_recipes', stdout=StringIO())
+    third, fourth = recipes['Третий'], recipes['Четвёртый']
+    RecipeIngredient.objects.create(
+        recipe=fourth, ingredient=ingredients[0], amount=1
+    )
+
+    # Ингредиент 0 есть у трёх рецептов из четырёх: через него
+    # кандидатами стали бы «Первый» и «Второй».
+    settings.SIMILARITY_COMMON_INGREDIENT_RECIPES = 2
+    refresh_recipe(fourth.id)
+    assert list(
+        RecipeSimilarity.objects.filter(recipe=fourth).values_list(
+            'similar_id', 'score'
+        )
+    ) == [(third.id, 1.0)]
+    assert list(
+        RecipeSimilarity.objects.filter(recipe=third).values_list(
+            'similar_id', flat=True
+        )
+    ) == [fourth.id]
+
+
+@pytest.mark.django_db
+def test_trim_neighbours(catalog, django_assert_max_num_queries):
+    """Тест обрезки списков соседей запросами, не зависящими от их числа."""
+    recipes, _ = catalog
+    call_command('build_similar_recipes', stdout=StringIO())
+    first, second = recipes['Первый'], recipes['Второй']
+
+    # Выборка строк, сбор удаляемых (из-за сигналов post_delete) и DELETE.
+    with django_assert_max_num_queries(3):
+        trim_neighbours([first.id, second.id], 1)
+    assert list(
+        RecipeSimilarity.objects.filter(
+            recipe__in=[first, second]
+        ).order_by('recipe_id').values_list('recipe_id', 'similar_id')
+    ) == [(first.id, second.id), (second.id, first.id)]
@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+import pytest
+
+from recipes import follow_graph as graph
+from recipes.follow_graph import invalidate_following, load_following
+from recipes.models import Follow, Recipe
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    cache.clear()
+
+
+@pytest.fixture
+def follow_graph(django_user_model):
+    """Граф: я -> b, c; b -> x, y, z; c -> x, z."""
+    users = {
+        name: django_user_model.objects.create(
+            username=name, email=f'{name}@example.com'
+        )
+        for name in ('me', 'b', 'c', 'x', 'y', 'z')
+    }
+    edges = [
+        ('me', 'b'), ('me', 'c'),
+        ('b', 'x'), ('b', 'y'), ('b', 'z'), ('c', 'x'), ('c', 'z'),
+    ]
+    for follower, author in edges:
+        Follow.objects.create(user=users[follower], author=users[author])
+    Recipe.objects.create(
+        name='Рецепт', author=users['z'], text='Описание', cooking_time=5
+    )
+    client = APIClient()
+    client.force_authenticate(user=users['me'])
+    return users, client
+
+
+def suggested(client, limit):
+    response = client.get(reverse('users-suggestions'), {'limit': limit})
+    assert response.status_code == 200
+    return [
+        (item['username'], item['followed_by_following'])
+        for item in response.data
+    ]
+
+
+@pytest.mark.django_db
+def test_suggestions_ranked_by_overlap_and_activity(follow_graph):
+    """Тест ранжирования рекомендаций по общим подпискам и рецептам."""
+    _, client = follow_graph
+    assert suggested(client, 10) == [('z', 2), ('x', 2), ('y', 1)]
+    assert suggested(client, 1) == [('z', 2)]
+
+
+@pytest.mark.django_db
+def test_subscribe_updates_cached_graph(
+    follow_graph,
+    locmem_cache,
+    django_capture_on_commit_callbacks
+):
+    """Тест сброса массива подписок при подписке и отписке."""
+    users, client = follow_graph
+    assert suggested(client, 10) == [('z', 2), ('x', 2), ('y', 1)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(
+            reverse('users-subscribe', kwargs={'id': users['x'].id})
+        )
+    assert users['x'].id in load_following([users['me'].id])[
+        users['me'].id
+    ]
+    assert suggested(client, 9) == [('z', 2), ('y', 1)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.delete(
+            reverse('users-subscribe', kwargs={'id': users['x'].id})
+        )
+    assert suggested(client, 8) == [('z', 2), ('x', 2), ('y', 1)]
+
+
+@pytest.mark.django_db
+def test_rebuild_during_change_is_not_cached(
+    follow_graph, locmem_cache, monkeypatch
+):
+    """Тест: снимок, прочитанный до подписки, не остаётся в кэше."""
+    users = follow_graph[0]
+    me, x = users['me'].id, users['x'].id
+    primary = graph.pin_primary
+
+    @contextmanager
+    def follow_after_read():
+        with primary():
+            yield
+        Follow.objects.create(user=users['me'], author=users['x'])
+        invalidate_following(me)
+
+    monkeypatch.setattr(graph, 'pin_primary', follow_after_read)
+    assert x not in load_following([me])[me]
+    monkeypatch.setattr(graph, 'pin_primary', primary)
+    assert x in load_following([me])[me]
@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+from django.urls import reverse
+from rest_framework.test import APIClient
+import pytest
+
+from api.throttling import (
+    LocalWindowBackend,
+    RedisWindowBackend,
+    ThrottleBackendSelector,
+    UserSlidingWindowThrottle,
+)
+
+
+WINDOW = 60
+LIMIT = 5
+
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture(params=('local', 'redis'))
+def backend(request):
+    if request.param == 'local':
+        return LocalWindowBackend()
+    return RedisWindowBackend(request.getfixturevalue('fake_redis'))
+
+
+def test_window_limits_and_costs(backend):
+    """Тест лимита окна и учёта стоимости запросов."""
+    now = WINDOW * 100
+    assert backend.consume('key', LIMIT, WINDOW, 3, now)[0]
+    assert backend.consume('key', LIMIT, WINDOW, 2, now + 1)[0]
+
+    allowed, wait = backend.consume('key', LIMIT, WINDOW, 1, now + 2)
+    assert not allowed
+    assert 0 < wait <= WINDOW
+    assert backend.consume('other', LIMIT, WINDOW, 1, now + 2)[0]
+
+
+def test_previous_window_is_weighted(backend):
+    """Тест, что прошлое окно учитывается пропорционально остатку."""
+    start = WINDOW * 100
+    for _ in range(LIMIT):
+        assert backend.consume('key', LIMIT, WINDOW, 1, start)[0]
+
+    assert not backend.consume('key', LIMIT, WINDOW, 1, start + WINDOW)[0]
+    late = start + WINDOW + WINDOW * 0.9
+    assert backend.consume('key', LIMIT, WINDOW, 1, late)[0]
+
+
+def test_selector_falls_back_when_redis_is_down(settings):
+    """Тест перехода на локальный счётчик при недоступном Redis."""
+    settings.REDIS_URL = 'redis://127.0.0.1:1/0'
+    settings.REDIS_SOCKET_TIMEOUT = 0.05
+    selector = ThrottleBackendSelector()
+
+    assert selector.consume('fallback', LIMIT, WINDOW, 1, WINDOW * 100)[0]
+    assert selector.unavailable_until > 0
+
+
+@pytest.mark.django_db
+def test_action_cost_is_applied(monkeypatch, author):
+    """Тест, что дорогие действия расходуют больше лимита."""
+    monkeypatch.setattr(
+        UserSlidingWindowThrottle,
+        'THROTTLE_RATES',
+        {'anon': '100/hour', 'user': '15/hour'},
+    )
+    client = APIClient()
+    client.force_authenticate(user=author)
+    url = reverse('recipe-download-shopping-cart')
+
+    assert client.get(url).status_code == HTTPStatus.OK
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert 'Retry-After' in response
@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from recipes.models import Follow, Recipe
+
+
+@pytest.fixture
+def many_authors(django_user_model):
+    return django_user_model.objects.bulk_create(
+        django_user_model(
+            email=f'user{index}@gmail.ru',
+            username=f'user{index}',
+        )
+        for index in range(5)
+    )
+
+
+def count_queries(client, url, params=None):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == HTTPStatus.OK
+    return response, len(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_users_list_is_subscribed(not_author_client, not_author, author):
+    """Тест флага is_subscribed в списке пользователей."""
+    Follow.objects.create(user=not_author, author=author)
+    response = not_author_client.get(reverse('users-list'))
+
+    assert response.status_code == HTTPStatus.OK
+    flags = {
+        user['email']: user['is_subscribed']
+        for user in response.data['results']
+    }
+    assert flags == {author.email: True, not_author.email: False}
+
+
+@pytest.mark.django_db
+def test_users_list_constant_queries(
+    not_author_client,
+    not_author,
+    many_authors
+):
+    """Тест, что число запросов не зависит от числа пользователей."""
+    url = reverse('users-list')
+    _, few = count_queries(not_author_client, url, {'limit': 2})
+
+    for author in many_authors:
+        Follow.objects.create(user=not_author, author=author)
+    _, many = count_queries(not_author_client, url, {'limit': 6})
+    assert few == many
+
+
+@pytest.mark.django_db
+def test_recipes_list_constant_queries(
+    not_author_client,
+    not_author,
+    author,
+    recipe,
+    many_authors
+):
+    """Тест, что подписка на авторов рецептов не даёт N+1 запросов."""
+    url = reverse('recipe-list')
+    Follow.objects.create(user=not_author, author=author)
+    _, few = count_queries(not_author_client, url, {'limit': 1})
+
+    for index, other in enumerate(many_authors):
+        Recipe.objects.create(
+            name=f'Рецепт {index}',
+            author=other,
+            text='Описание',
+            cooking_time=10,
+        )
+    response, many = count_queries(not_author_client, url, {'limit': 6})
+    subscribed = {
+        item['author']['email']: item['author']['is_subscribed']
+        for item in response.data['results']
+    }
+    assert subscribed[author.email] is True
+    assert subscribed[many_authors[0].email] is False
+    assert few == many
@@ -0,0 +1,25 @@
+from io import StringIO
+
+from django.core.management import call_command
+import pytest
+
+from recipes.models import Recipe
+
+
+@pytest.mark.django_db
+def test_benchmark_cache_serializers_reports_and_rolls_back():
+    """Тест сравнения сериализаторов кэша и отката тестовых данных."""
+    out = StringIO()
+    call_command(
+        'benchmark_cache_serializers',
+        '--recipes', '20',
+        '--limit', '10',
+        '--iterations', '2',
+        stdout=out,
+    )
+    output = out.getvalue()
+    for payload in ('recipe list page', 'shopping list', 'token user'):
+        assert payload in output
+    for label in ('pickle + zlib', 'msgpack', 'json + zlib'):
+        assert label in output
+    assert not Recipe.objects.filter(name__startswith='bench').exists()
@@ -0,0 +1,14 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+
+def test_benchmark_middleware_reports_all_cases():
+    """Тест замера накладных расходов middleware."""
+    out = StringIO()
+    call_command('benchmark_middleware', '--iterations', '5', stdout=out)
+    output = out.getvalue()
+    for case in (
+        'no middleware', 'api, lean lane', 'api, full stack', 'admin path'
+    ):
+        assert case in output
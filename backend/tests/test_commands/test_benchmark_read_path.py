@@ -0,0 +1,24 @@
+from io import StringIO
+
+from django.core.management import call_command
+import pytest
+
+from recipes.models import Recipe
+
+
+@pytest.mark.django_db
+def test_benchmark_read_path_reports_and_rolls_back():
+    """Тест сравнения путей чтения и отката тестовых данных."""
+    out = StringIO()
+    call_command(
+        'benchmark_read_path',
+        '--recipes', '20',
+        '--limit', '10',
+        '--iterations', '2',
+        stdout=out,
+    )
+    output = out.getvalue()
+    for case in ('list', 'list summary', 'retrieve'):
+        assert f'{case} ' in output
+    assert 'fast path' in output
+    assert not Recipe.objects.filter(name__startswith='bench').exists()
@@ -0,0 +1,36 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+from api.management.commands.benchmark_servers import run_load
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):  # noqa: N802
+        self.send_response(404 if self.path == '/missing/' else 200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_run_load_reports_throughput_and_errors(stub_server):
+    """Тест подсчёта пропускной способности, задержек и ошибок."""
+    result = run_load(stub_server, ['/ok/', '/missing/'], 20, 4)
+    assert result['rps'] > 0
+    assert 0 < result['p50'] <= result['p95']
+    assert result['errors'] == 10
@@ -0,0 +1,34 @@
+from io import StringIO
+
+from django.core.management import call_command
+import pytest
+
+from recipes.management.commands.check_query_plans import analyze_plan
+
+
+@pytest.mark.parametrize(
+    'plan, expected',
+    (
+        ('Seq Scan on recipes_favorite  (cost=0.00..1.01)', True),
+        ('  ->  Sort  (cost=1.02..1.03 rows=1 width=8)', True),
+        ('2 0 0 SCAN recipes_follow', True),
+        ('3 0 0 USE TEMP B-TREE FOR ORDER BY', True),
+        ('Index Scan using recipe_author_created_idx on t', False),
+        ('2 0 0 SEARCH recipes_favorite USING INDEX x (user_id=?)', False),
+        ('2 0 0 SCAN recipes_recipe USING INDEX recipe_created_idx', False),
+    )
+)
+def test_analyze_plan(plan, expected):
+    """Тест распознавания полных проходов и сортировок без индекса."""
+    assert bool(analyze_plan(plan)) is expected
+
+
+@pytest.mark.django_db
+def test_check_query_plans_command():
+    """Тест запуска команды на временно засеянной базе."""
+    out = StringIO()
+    call_command('check_query_plans', seed=20, stdout=out)
+    output = out.getvalue()
+    assert '[OK]   recipes list author=' in output
+    assert 'short link redirect' in output
+    assert 'Seed data rolled back' in output
@@ -0,0 +1,108 @@
+import random
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+import pytest
+
+from foodgram.cache import LOCK_KEY, Entry, get_or_compute
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'get-or-compute',
+        }
+    }
+    settings.CACHE_EARLY_REFRESH_BETA = 0
+    cache.clear()
+
+
+def counting(value, delay=0.0, error=None):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return value
+
+    return compute, calls
+
+
+def test_concurrent_misses_compute_once():
+    """Тест: одновременные промахи вызывают compute() один раз."""
+    compute, calls = counting('value', delay=0.2)
+    results = []
+
+    def worker():
+        results.append(get_or_compute('key', compute, 60))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+    assert not cache.has_key(LOCK_KEY.format(key='key'))
+
+
+def test_missing_object_is_cached():
+    """Тест отрицательного кэша: отсутствие объекта не пересчитывается."""
+    compute, calls = counting(None, error=ObjectDoesNotExist('missing'))
+
+    for _ in range(3):
+        with pytest.raises(ObjectDoesNotExist):
+            get_or_compute('key', compute, 60, negative_timeout=30)
+
+    assert len(calls) == 1
+
+
+def test_other_errors_are_not_cached():
+    """Тест: прочие исключения не кэшируются и снимают блокировку."""
+    compute, calls = counting(None, error=ValueError('boom'))
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            get_or_compute('key', compute, 60)
+
+    assert len(calls) == 2
+    assert not cache.has_key(LOCK_KEY.format(key='key'))
+
+
+def test_early_refresh(monkeypatch):
+    """Тест раннего обновления: при большом beta значение пересчитывается."""
+    # При случайном числе меньше ~0.06 пересчёта не было бы и с beta=1000.
+    monkeypatch.setattr(random, 'random', lambda: 0.5)
+    cache.set('key', Entry('old', time.time() + 60, 1.0, None), 60)
+    compute, calls = counting('new')
+
+    assert get_or_compute('key', compute, 60) == 'old'
+    assert get_or_compute('key', compute, 60, beta=1000) == 'new'
+    assert len(calls) == 1
+    assert get_or_compute('key', compute, 60) == 'new'
+
+
+def test_stale_value_while_another_refreshes():
+    """Тест: пока другой процесс пересчитывает, отдаётся прежнее значение."""
+    cache.set('key', Entry('old', time.time() + 60, 1.0, None), 60)
+    cache.add(LOCK_KEY.format(key='key'), 1, 10)
+    compute, calls = counting('new')
+
+    assert get_or_compute('key', compute, 60, beta=1000) == 'old'
+    assert not calls
+
+
+def test_legacy_value_is_a_miss():
+    """Тест: значение старого формата считается промахом."""
+    cache.set('key', 42, 60)
+    compute, calls = counting(7)
+
+    assert get_or_compute('key', compute, 60) == 7
+    assert len(calls) == 1
@@ -0,0 +1,95 @@
+import pickle
+
+from django.core.cache.backends.redis import RedisCache
+import pytest
+
+from foodgram.cache_serializers import (
+    JSONSerializer,
+    MsgpackSerializer,
+    PickleSerializer,
+)
+
+SERIALIZERS = (PickleSerializer, MsgpackSerializer, JSONSerializer)
+VALUES = (
+    'строка',
+    b'\x00\x01',
+    {'results': [{'id': 1, 'name': 'Рецепт', 'ok': True, 'rate': 0.5}]},
+    {1: 'ключ-число'},
+    [1, (2, 3)],
+    None,
+    True,
+    2 ** 70,
+)
+
+
+@pytest.mark.parametrize('serializer_class', SERIALIZERS)
+@pytest.mark.parametrize('value', VALUES)
+def test_values_round_trip_with_types(serializer_class, value):
+    """Тест сохранения значения и его типов в каждом формате."""
+    serializer = serializer_class(compress_min_bytes=0)
+    data = serializer.dumps(value)
+    if isinstance(data, int):
+        # Целые числа Redis хранит и возвращает строкой.
+        data = str(data).encode()
+    loaded = serializer.loads(data)
+    assert loaded == value
+    assert type(loaded) is type(value)
+    if isinstance(value, list):
+        assert type(loaded[1]) is tuple
+
+
+@pytest.mark.parametrize(
+    'serializer_class, value, marker',
+    (
+        (MsgpackSerializer, {'a': [1]}, b'm'),
+        (MsgpackSerializer, {'a': (1,)}, b'p'),
+        (JSONSerializer, {'a': [1]}, b'j'),
+        (JSONSerializer, {1: 'a'}, b'p'),
+    ),
+)
+def test_unsupported_values_fall_back_to_pickle(
+    serializer_class, value, marker
+):
+    """Тест перехода на pickle для значений, которые формат исказит."""
+    assert serializer_class(compress_min_bytes=0).dumps(value)[:1] == marker
+
+
+def test_large_values_are_compressed():
+    """Тест сжатия значений от порога размера."""
+    value = 'Список покупок\n' * 200
+    serializer = MsgpackSerializer(compress_min_bytes=1024)
+    data = serializer.dumps(value)
+    assert data[:1] == b'M'
+    assert len(data) < len(value)
+    assert serializer.loads(data) == value
+    assert serializer.dumps('коротко')[:1] == b'm'
+
+
+def test_integers_and_legacy_pickle_are_readable():
+    """Тест чисел для INCR и записей старого формата."""
+    serializer = PickleSerializer()
+    assert serializer.dumps(5) == 5
+    assert serializer.loads(b'-12') == -12
+    assert serializer.loads(pickle.dumps({'old': 1})) == {'old': 1}
+
+
+def test_redis_cache_uses_serializer():
+    """Тест работы RedisCache с сериализатором и сжатием."""
+    fakeredis = pytest.importorskip('fakeredis')
+    cache = RedisCache(
+        'redis://serializers:6379/0',
+        {
+            'OPTIONS': {
+                'connection_class': fakeredis.FakeRedisConnection,
+                'serializer': 'foodgram.cache_serializers.MsgpackSerializer',
+            },
+        },
+    )
+    page = {'results': [{'text': 'Описание ' * 50}] * 20}
+    cache.set('page', page)
+    cache.set('counter', 1)
+    cache.incr('counter')
+    assert cache.get('page') == page
+    assert cache.get('counter') == 2
+    raw = cache._cache.get_client().get(cache.make_and_validate_key('page'))
+    assert raw[:1] == b'M'
@@ -0,0 +1,193 @@
+import sqlite3
+import threading
+import time
+
+from django.db import connections, transaction
+import pytest
+
+from foodgram import metrics
+from foodgram.db import pool as db_pool
+from foodgram.db.pool import ConnectionPool, PoolExhaustedError
+from foodgram.db.sqlite3.base import DatabaseWrapper
+
+
+class StandInConnection:
+    """
+    Заменитель соединения psycopg2: после разрыва со стороны сервера
+    любой запрос падает, как у настоящего соединения.
+    """
+
+    def __init__(self):
+        self.broken = False
+        self.closed = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        if self.broken:
+            raise OSError('server closed the connection unexpectedly')
+
+    def rollback(self):
+        if self.broken:
+            raise OSError('server closed the connection unexpectedly')
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def sqlite_pool(tmp_path):
+    return ConnectionPool(
+        lambda: sqlite3.connect(
+            tmp_path / 'pool.sqlite3', check_same_thread=False
+        ),
+        max_size=2,
+        timeout=0.2,
+    )
+
+
+def test_pool_reuses_returned_connections(sqlite_pool):
+    """Тест повторного использования соединения из пула."""
+    first = sqlite_pool.checkout()
+    sqlite_pool.checkin(first)
+    assert sqlite_pool.checkout() is first
+
+    stats = sqlite_pool.stats()
+    assert stats['created'] == 1
+    assert stats['checkouts'] == 2
+    assert stats['in_use'] == 1
+
+
+def test_pool_rolls_back_open_transaction_on_checkin(sqlite_pool):
+    """Тест отката незавершённой транзакции при возврате в пул."""
+    connection = sqlite_pool.checkout()
+    connection.execute('CREATE TABLE t (id INTEGER)')
+    connection.commit()
+    connection.execute('INSERT INTO t VALUES (1)')
+    sqlite_pool.checkin(connection)
+
+    connection = sqlite_pool.checkout()
+    assert connection.execute('SELECT COUNT(*) FROM t').fetchone() == (0,)
+
+
+def test_pool_times_out_when_exhausted(sqlite_pool):
+    """Тест ожидания и таймаута при исчерпании пула."""
+    sqlite_pool.checkout()
+    sqlite_pool.checkout()
+    with pytest.raises(PoolExhaustedError):
+        sqlite_pool.checkout()
+    assert sqlite_pool.stats()['timeouts'] == 1
+    assert sqlite_pool.stats()['size'] == 2
+
+
+def test_waiting_thread_gets_released_connection(sqlite_pool):
+    """Тест выдачи освободившегося соединения ожидающему потоку."""
+    sqlite_pool.timeout = 2
+    first = sqlite_pool.checkout()
+    sqlite_pool.checkout()
+    result = {}
+    waiter = threading.Thread(
+        target=lambda: result.update(connection=sqlite_pool.checkout())
+    )
+    waiter.start()
+    time.sleep(0.05)
+    sqlite_pool.checkin(first)
+    waiter.join()
+
+    assert result['connection'] is first
+    stats = sqlite_pool.stats()
+    assert stats['waits'] == 1
+    assert stats['max_wait_ms'] > 0
+
+
+def test_health_check_replaces_broken_connection():
+    """Тест замены разорванного соединения после простоя."""
+    opened = []
+
+    def connect():
+        opened.append(StandInConnection())
+        return opened[-1]
+
+    pool = ConnectionPool(connect, max_size=1, check_interval=0)
+    connection = pool.checkout()
+    pool.checkin(connection)
+    connection.broken = True
+
+    assert pool.checkout() is opened[1]
+    assert opened[0].closed
+    assert pool.stats()['health_check_failures'] == 1
+    assert pool.stats()['size'] == 1
+
+
+def test_broken_connection_is_dropped_on_checkin():
+    """Тест закрытия соединения, которое не удалось откатить."""
+    pool = ConnectionPool(StandInConnection, max_size=1)
+    connection = pool.checkout()
+    connection.broken = True
+    pool.checkin(connection)
+
+    assert connection.closed
+    assert pool.stats()['size'] == 0
+    assert pool.checkout() is not connection
+
+
+def test_old_connections_are_recycled():
+    """Тест закрытия соединений старше max_lifetime."""
+    pool = ConnectionPool(StandInConnection, max_lifetime=0)
+    connection = pool.checkout()
+    pool.checkin(connection)
+    assert connection.closed
+    assert pool.stats()['idle'] == 0
+
+
+@pytest.fixture
+def pooled_wrapper(tmp_path, django_db_blocker):
+    settings_dict = dict(
+        connections['default'].settings_dict,
+        ENGINE='foodgram.db.sqlite3',
+        NAME=str(tmp_path / 'db.sqlite3'),
+        CONN_MAX_AGE=0,
+        POOL={'max_size': 2},
+    )
+    wrapper = DatabaseWrapper(settings_dict, alias='pool_test')
+    connections['pool_test'] = wrapper
+    with django_db_blocker.unblock():
+        yield wrapper
+        wrapper.close()
+    del connections['pool_test']
+    db_pool.pools.pop('pool_test').close_all()
+
+
+def test_database_wrapper_returns_connection_to_pool(pooled_wrapper):
+    """Тест возврата соединения Django в пул вместо закрытия."""
+    with pooled_wrapper.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    raw = pooled_wrapper.connection
+    pooled_wrapper.close()
+    assert pooled_wrapper.connection is None
+
+    with pooled_wrapper.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    assert pooled_wrapper.connection is raw
+    stats = metrics.collect()['db_pool']['pool_test']
+    assert stats['created'] == 1
+    assert stats['checkouts'] == 2
+
+
+def test_database_wrapper_discards_connection_closed_in_atomic(
+    pooled_wrapper
+):
+    """Тест сброса соединения, закрытого внутри atomic()."""
+    with transaction.atomic(using='pool_test'):
+        with pooled_wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw = pooled_wrapper.connection
+        pooled_wrapper.close()
+
+    with pooled_wrapper.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    assert pooled_wrapper.connection is not raw
+    assert metrics.collect()['db_pool']['pool_test']['closed'] == 1
@@ -0,0 +1,75 @@
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+import pytest
+
+from foodgram.middleware import (
+    LeanAuthenticationMiddleware,
+    LeanCsrfViewMiddleware,
+    LeanMessageMiddleware,
+    LeanSessionMiddleware,
+    show_toolbar,
+)
+
+
+def ok_view(request):
+    return HttpResponse('ok')
+
+
+@pytest.mark.parametrize('path', ('/api/recipes/', '/a/r/abc/'))
+def test_lean_paths_skip_session_and_messages(path):
+    """Тест пропуска сессий и сообщений для API и коротких ссылок."""
+    request = RequestFactory().get(path)
+    LeanSessionMiddleware(LeanMessageMiddleware(ok_view))(request)
+    assert not hasattr(request, 'session')
+    assert not hasattr(request, '_messages')
+
+
+def test_admin_keeps_session_and_messages():
+    """Тест полной обработки путей вне быстрого списка."""
+    request = RequestFactory().get('/admin/')
+    LeanSessionMiddleware(LeanMessageMiddleware(ok_view))(request)
+    assert hasattr(request, 'session')
+    assert hasattr(request, '_messages')
+
+
+def test_lean_auth_sets_anonymous_user_without_session():
+    """Тест анонимного пользователя Django на быстрых путях."""
+    request = RequestFactory().get('/api/recipes/')
+    LeanAuthenticationMiddleware(ok_view)(request)
+    assert request.user.is_anonymous
+
+
+def test_lean_csrf_skips_check_only_for_lean_paths():
+    """Тест отключения проверки CSRF только для быстрых путей."""
+    factory = RequestFactory()
+    middleware = LeanCsrfViewMiddleware(ok_view)
+
+    api_request = factory.post('/api/recipes/')
+    assert middleware.process_view(api_request, ok_view, (), {}) is None
+
+    admin_request = factory.post('/admin/login/')
+    middleware.process_request(admin_request)
+    response = middleware.process_view(admin_request, ok_view, (), {})
+    assert response.status_code == 403
+
+
+def test_debug_toolbar_hidden_on_lean_paths(settings):
+    """Тест скрытия debug toolbar для API."""
+    settings.DEBUG = True
+    settings.INTERNAL_IPS = ['127.0.0.1']
+    factory = RequestFactory()
+    assert not show_toolbar(factory.get('/api/recipes/'))
+    assert show_toolbar(factory.get('/admin/'))
+
+
+@pytest.mark.django_db
+def test_api_responses_set_no_session_or_csrf_cookies():
+    """Тест ответов API без cookie сессии и CSRF."""
+    client = Client(enforce_csrf_checks=True)
+    response = client.get('/api/recipes/')
+    assert response.status_code == 200
+    assert 'Cookie' not in response.get('Vary', '')
+    assert not response.cookies
+
+    response = client.get('/admin/login/')
+    assert 'csrftoken' in response.cookies
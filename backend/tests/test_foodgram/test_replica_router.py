@@ -0,0 +1,117 @@
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+import pytest
+
+from api.relations import rebuild_relation
+from foodgram.db.router import ReplicaRouter, pin_primary
+from recipes.follow_graph import load_following
+from recipes.models import Favorite, Follow, Recipe, User
+
+DATABASES = [DEFAULT_DB_ALIAS, 'replica']
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    cache.clear()
+
+
+@pytest.fixture
+def token_client(author):
+    token = Token.objects.create(user=author)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture
+def primary_recipe(author):
+    return Recipe.objects.create(
+        name='Только в основной БД',
+        author=author,
+        text='Описание',
+        cooking_time=10,
+    )
+
+
+def test_router_without_replicas_uses_default():
+    """Тест чтения из основной БД, если реплики не настроены."""
+    assert ReplicaRouter().db_for_read(Recipe) == DEFAULT_DB_ALIAS
+
+
+def test_router_sends_app_reads_to_replicas(replicas):
+    """Тест маршрутизации чтений и записей."""
+    router = ReplicaRouter()
+    assert router.db_for_read(Recipe) == 'replica'
+    assert router.db_for_read(Session) == DEFAULT_DB_ALIAS
+    assert router.db_for_write(Recipe) == DEFAULT_DB_ALIAS
+    with pin_primary():
+        assert router.db_for_read(Recipe) == DEFAULT_DB_ALIAS
+    assert router.db_for_read(Recipe) == 'replica'
+
+
+@pytest.mark.django_db(databases=DATABASES)
+def test_reads_go_to_replica(replicas, client, primary_recipe):
+    """Тест чтения списка рецептов с реплики."""
+    response = client.get('/api/recipes/', {'limit': 10})
+    assert response.json()['count'] == 0
+
+
+@pytest.mark.django_db(databases=DATABASES)
+def test_writer_reads_primary_after_write(
+    replicas, client, token_client, primary_recipe
+):
+    """Тест чтения из основной БД после записи клиента."""
+    response = token_client.post(f'/api/recipes/{primary_recipe.id}/favorite/')
+    assert response.status_code == 201
+
+    response = token_client.get('/api/recipes/', {'limit': 11})
+    data = response.json()
+    assert data['count'] == 1
+    assert data['results'][0]['is_favorited'] is True
+
+    response = client.get('/api/recipes/', {'limit': 12})
+    assert response.json()['count'] == 0
+
+
+@pytest.mark.django_db(databases=DATABASES)
+def test_pin_expires(settings, replicas, token_client, primary_recipe):
+    """Тест возврата к репликам после окна закрепления."""
+    settings.REPLICA_PIN_SECONDS = 0
+    token_client.post(f'/api/recipes/{primary_recipe.id}/favorite/')
+    response = token_client.get('/api/recipes/', {'limit': 13})
+    assert response.json()['count'] == 0
+
+
+@pytest.mark.django_db(databases=DATABASES)
+def test_rebuilds_read_primary(replicas, author, not_author, primary_recipe):
+    """Тест: сверка счётчиков и снимки кэша строятся по основной БД."""
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    Favorite.objects.create(user=author, recipe=primary_recipe)
+    Follow.objects.create(user=author, author=not_author)
+    User.objects.filter(pk=author.pk).update(recipes_count=7)
+
+    call_command('reconcile_counters', stdout=StringIO())
+    with pin_primary():
+        author.refresh_from_db()
+    assert author.recipes_count == 1
+
+    client = fakeredis.FakeRedis()
+    assert rebuild_relation(client, author.id, 'favorites') == {
+        primary_recipe.id
+    }
+    assert load_following([author.id])[author.id].tolist() == [
+        not_author.id
+    ]
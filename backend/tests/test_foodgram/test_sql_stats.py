@@ -0,0 +1,94 @@
+from django.urls import reverse
+import pytest
+
+from foodgram.sql_stats import (
+    StatementStats,
+    load_flushed,
+    normalize_sql,
+    reset_flushed,
+    stats,
+    top_statements,
+)
+from recipes.models import Favorite
+
+
+@pytest.mark.parametrize(
+    'sql, expected',
+    (
+        (
+            'SELECT * FROM "t" WHERE "t"."id" = 15 AND "name" = \'abc\'',
+            'SELECT * FROM "t" WHERE "t"."id" = ? AND "name" = ?',
+        ),
+        (
+            'SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)',
+            'SELECT * FROM "t" WHERE "id" IN (...)',
+        ),
+        (
+            'INSERT INTO "t" ("a") VALUES (%s), (%s), (%s)',
+            'INSERT INTO "t" ("a") VALUES (?), ...',
+        ),
+        (
+            'SELECT "T3"."id" FROM "t"   LIMIT 6 OFFSET 12',
+            'SELECT "T3"."id" FROM "t" LIMIT ? OFFSET ?',
+        ),
+    )
+)
+def test_normalize_sql(sql, expected):
+    """Тест нормализации литералов и IN-списков."""
+    assert normalize_sql(sql) == expected
+
+
+def test_statement_stats_eviction_and_flush(tmp_path):
+    """Тест вытеснения редких запросов и сброса таблицы на диск."""
+    stats = StatementStats(max_entries=2, directory=tmp_path)
+    stats.record('SELECT 1 FROM "b"', 1.0, 1)
+    stats.record('SELECT 1 FROM "c"', 1.0, 1)
+    stats.record('SELECT 1 FROM "a"', 1.0, 1)
+    stats.record('SELECT 1 FROM "a"', 3.0, 1)
+    assert len(stats.snapshot()) == 2
+
+    stats.flush()
+    entries = top_statements(load_flushed(tmp_path), 'calls', 1)
+    assert entries[0]['query'] == 'SELECT ? FROM "a"'
+    assert entries[0]['calls'] == 2
+    assert entries[0]['mean_time'] == 2.0
+
+
+def test_reset_reaches_running_workers(tmp_path):
+    """Тест: после --reset воркер не возвращает на диск старые итоги."""
+    worker = StatementStats(flush_interval=0, directory=tmp_path)
+    for _ in range(3):
+        worker.record('SELECT 1 FROM "a"', 1.0, 1)
+    assert load_flushed(tmp_path)[0]['calls'] == 2
+
+    reset_flushed(tmp_path)
+    assert load_flushed(tmp_path) == []
+    worker.record('SELECT 1 FROM "a"', 1.0, 1)
+    worker.record('SELECT 1 FROM "a"', 1.0, 1)
+    assert load_flushed(tmp_path)[0]['calls'] == 1
+
+
+@pytest.mark.django_db
+def test_middleware_reports_view_and_origin(
+    settings,
+    author_client,
+    author,
+    recipe
+):
+    """Тест определения view и метода, из которого выполнен запрос."""
+    settings.MIDDLEWARE = [
+        *settings.MIDDLEWARE, 'foodgram.middleware.SqlStatsMiddleware'
+    ]
+    Favorite.objects.create(user=author, recipe=recipe)
+    stats.reset()
+
+    response = author_client.get(reverse('recipe-list'))
+    assert response.data['results'][0]['is_favorited'] is True
+
+    origins = {
+        (entry['view'], entry['origin']) for entry in stats.snapshot()
+    }
+    assert ('recipe-list', 'api.relations.load_from_db') in origins
+    assert (
+        'recipe-list', 'CachedCountPagination.paginate_queryset'
+    ) in origins
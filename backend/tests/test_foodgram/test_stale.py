@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.db import OperationalError
+import pytest
+
+from api.views import SHORT_LINK_CACHE_KEY
+from foodgram import stale
+from foodgram.db.faults import inject_faults
+from recipes.models import RecipeShortLink
+
+
+@pytest.fixture(autouse=True)
+def stale_settings(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'stale-while-revalidate',
+        }
+    }
+    settings.CACHE_MIDDLEWARE_SECONDS = 0
+    settings.SWR_DB_SLOW_SECONDS = 0.05
+    cache.clear()
+    stale.health.recover()
+    yield
+    stale.health.recover()
+
+
+@pytest.fixture
+def background(monkeypatch):
+    """Фоновые обновления копятся в списке и запускаются вручную."""
+    tasks = []
+    monkeypatch.setattr(stale, 'run_in_background', tasks.append)
+    return tasks
+
+
+@pytest.mark.django_db
+def test_copy_served_on_database_error(client, recipe):
+    """Тест: при ошибке БД отдаётся последняя исправная копия."""
+    url = f'/api/recipes/{recipe.id}/'
+    fresh = client.get(url)
+    assert fresh.status_code == 200
+    assert not fresh.has_header('Warning')
+
+    with inject_faults(error_rate=1):
+        response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.content == fresh.content
+    assert response['Warning'] == stale.WARNING_REVALIDATION_FAILED
+    assert response['Age'] == '0'
+    assert 'private' in response['Cache-Control']
+    assert stale.health.degraded()
+
+
+@pytest.mark.django_db
+def test_database_error_without_copy(client, recipe):
+    """Тест: без сохранённой копии ошибка БД не скрывается."""
+    with inject_faults(error_rate=1), pytest.raises(OperationalError):
+        client.get(f'/api/recipes/{recipe.id}/')
+
+
+@pytest.mark.django_db
+def test_slow_database_serves_copy_and_refreshes(client, recipe, background):
+    """Тест: при медленной БД копия отдаётся сразу, обновление — в фоне."""
+    url = '/api/recipes/?limit=5'
+    client.get(url)
+    assert not stale.health.degraded()
+
+    with inject_faults(delay=0.1):
+        slow = client.get(url)
+    assert slow.status_code == 200
+    assert not slow.has_header('Warning')
+    assert stale.health.degraded()
+
+    recipe.name = 'Новое название'
+    recipe.save()
+    response = client.get(url)
+    assert response['Warning'] == stale.WARNING_STALE
+    assert 'Новое название' not in response.content.decode()
+    assert len(background) == 1
+
+    # Повторный запрос не запускает второе обновление того же ключа.
+    client.get(url)
+    assert len(background) == 1
+
+    background.pop()()
+    assert not stale.health.degraded()
+    response = client.get(url)
+    assert not response.has_header('Warning')
+    assert 'Новое название' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_other_requests_are_not_stored(client, recipe):
+    """Тест: копии хранятся только для GET путей из SWR_PATHS."""
+    client.get(f'/api/users/{recipe.author.id}/')
+
+    with inject_faults(error_rate=1), pytest.raises(OperationalError):
+        client.get(f'/api/users/{recipe.author.id}/')
+
+
+@pytest.mark.django_db
+def test_short_link_copy_on_database_error(client, recipe):
+    """Тест: редирект по короткой ссылке переживает ошибку БД."""
+    RecipeShortLink.objects.create(recipe=recipe, url_hash='abcdefgh')
+    assert client.get('/a/r/missing/').status_code == 404
+    fresh = client.get('/a/r/abcdefgh/')
+    assert fresh.status_code == 302
+
+    cache.delete(SHORT_LINK_CACHE_KEY.format(url_hash='abcdefgh'))
+    with inject_faults(error_rate=1):
+        response = client.get('/a/r/abcdefgh/')
+
+    assert response.status_code == 302
+    assert response['Location'] == fresh['Location']
+    assert response['Warning'] == stale.WARNING_REVALIDATION_FAILED
@@ -0,0 +1,180 @@
+import logging
+import time
+
+import pytest
+
+from foodgram import metrics
+from foodgram import tiered_cache
+from foodgram.tiered_cache import ByteLRU, LocalTier, TwoTierRedisCache
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def make_process():
+    """
+    Создаёт бэкенд так, как его создал бы отдельный процесс: со своим
+    L1 и своей подпиской, но с общим Redis.
+    """
+    created = []
+
+    def make(**options):
+        tiered_cache.tiers.clear()
+        backend = TwoTierRedisCache(
+            'redis://tiered-cache:6379/0',
+            {
+                'OPTIONS': {
+                    'connection_class': fakeredis.FakeRedisConnection,
+                    'L1_KEY_PREFIXES': ['hot:'],
+                    **options,
+                },
+            },
+        )
+        if backend.tier is not None:
+            backend.tier.ensure_listener()
+            wait_for(lambda: backend.tier.listening)
+        created.append(backend)
+        return backend
+
+    yield make
+    created[0].clear()
+    tiered_cache.tiers.clear()
+
+
+def test_byte_lru_evicts_by_size_and_expires():
+    """Тест вытеснения по размеру и истечения TTL."""
+    lru = ByteLRU(max_bytes=10)
+    lru.set('a', b'12345', 60)
+    lru.set('b', b'12345', 60)
+    lru.get('a')
+    lru.set('c', b'123', 60)
+    assert lru.get('b') is None
+    assert lru.get('a') == b'12345'
+    assert lru.size == 8
+    assert lru.evictions == 1
+
+    lru.set('d', b'1', -1)
+    assert lru.get('d') is None
+    lru.set('huge', b'x' * 11, 60)
+    assert lru.get('huge') is None
+
+
+def test_reads_are_served_from_l1(make_process):
+    """Тест чтения горячего ключа из памяти процесса."""
+    cache = make_process()
+    assert cache.get('hot:key') is None
+    cache.set('hot:key', {'value': 1})
+    cache._cache.get_client(write=True).set(
+        cache.make_and_validate_key('hot:key'), b'0'
+    )
+    assert cache.get('hot:key') == {'value': 1}
+
+    stats = metrics.collect()['two_tier_cache']
+    tier_stats = next(iter(stats.values()))
+    assert tier_stats['l1_hits'] == 1
+    assert tier_stats['misses'] == 1
+
+
+def test_returned_values_do_not_share_state(make_process):
+    """Тест независимости L1 от изменения полученного объекта."""
+    cache = make_process()
+    cache.set('hot:list', [1, 2])
+    cache.get('hot:list').append(3)
+    assert cache.get('hot:list') == [1, 2]
+
+
+def test_writes_invalidate_other_processes(make_process):
+    """Тест рассылки инвалидации между процессами."""
+    first, second = make_process(), make_process()
+    first.set('hot:shared', 'old')
+    assert second.get('hot:shared') == 'old'
+
+    first.set('hot:shared', 'new')
+    wait_for(lambda: second.get('hot:shared') == 'new')
+    first.delete('hot:shared')
+    wait_for(lambda: second.get('hot:shared') is None)
+    first.set('hot:counter', 1)
+    assert second.get('hot:counter') == 1
+    first.incr('hot:counter')
+    wait_for(lambda: second.get('hot:counter') == 2)
+    assert second.tier.stats()['invalidations_received'] >= 3
+    assert second.tier.stats()['l2_hits'] >= 2
+
+
+def test_other_keys_bypass_l1(make_process):
+    """Тест ключей без префикса L1: только Redis."""
+    cache = make_process()
+    cache.set('cold:key', 1)
+    assert cache.get('cold:key') == 1
+    assert cache.get_many(['cold:key', 'hot:missing']) == {'cold:key': 1}
+    assert not cache.tier.lru.entries
+
+
+def test_l1_is_skipped_until_subscribed(make_process):
+    """Тест отказа от L1 без подписки на инвалидацию."""
+    cache = make_process()
+    cache.set('hot:key', 1)
+    cache.tier.listening = False
+    cache._cache.get_client(write=True).delete(
+        cache.make_and_validate_key('hot:key')
+    )
+    assert cache.get('hot:key') is None
+
+
+def test_l1_can_be_disabled(make_process):
+    """Тест работы только с Redis при L1_MAX_BYTES=0."""
+    cache = make_process(L1_MAX_BYTES=0)
+    assert cache.tier is None
+    cache.set('hot:key', 1)
+    assert cache.get('hot:key') == 1
+    assert cache.get_many(['hot:key']) == {'hot:key': 1}
+
+
+def test_invalidation_during_read_is_not_lost(make_process, monkeypatch):
+    """Тест: значение, прочитанное до инвалидации, не попадает в L1."""
+    writer, reader = make_process(), make_process()
+    writer.set('hot:version', 1)
+    received = reader.tier.invalidations
+    read_from_redis = reader._cache.get
+
+    def read_then_write(key, default):
+        try:
+            return read_from_redis(key, default)
+        finally:
+            # Запись другого процесса и её инвалидация приходят после
+            # чтения из Redis, но до записи в L1.
+            writer.incr('hot:version')
+            wait_for(lambda: reader.tier.invalidations > received)
+
+    monkeypatch.setattr(reader._cache, 'get', read_then_write)
+    assert reader.get('hot:version') == 1
+    monkeypatch.setattr(reader._cache, 'get', read_from_redis)
+
+    assert reader.get('hot:version') == 2
+
+
+def test_listener_errors_are_logged(caplog):
+    """Тест: ошибка подписчика видна в логе, а не проглатывается."""
+    class Stop(BaseException):
+        pass
+
+    attempts = []
+
+    def subscribe():
+        attempts.append(1)
+        if len(attempts) > 1:
+            raise Stop
+        raise RuntimeError('broken subscriber')
+
+    tier = LocalTier(1024, 'cache:invalidate', subscribe, retry_interval=0)
+    with caplog.at_level(logging.WARNING), pytest.raises(Stop):
+        tier.listen()
+    assert 'broken subscriber' in caplog.text
+    assert not tier.listening
@@ -12,7 +12,11 @@ class UserAdmin(admin.ModelAdmin):
         "username",
         "first_name",
         "last_name",
-        "password"
+        "password",
+        "recipes_count",
+        "followers_count",
+        "following_count",
     )
+    readonly_fields = ("recipes_count", "followers_count", "following_count")
     search_fields = ("email", "username")
     search_help_text = SEARCH_EMAIL_USERNAME
@@ -9,6 +9,9 @@ from const.const import (
     AVATAR_UPLOAD_PATH,
 )
 
+# Денормализованные счётчики: меняются только атомарными UPDATE.
+COUNTER_FIELDS = ("recipes_count", "followers_count", "following_count")
+
 
 class User(AbstractUser):
     first_name = models.CharField(
@@ -34,6 +37,21 @@ class User(AbstractUser):
         verbose_name="Фото профиля",
         upload_to=AVATAR_UPLOAD_PATH
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name="Рецептов",
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name="Подписчиков",
+        default=0,
+        editable=False,
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name="Подписок",
+        default=0,
+        editable=False,
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name", "username"]